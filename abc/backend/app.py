@@ -1,12 +1,30 @@
-from fastapi import FastAPI, UploadFile, File, Form, HTTPException
+from fastapi import FastAPI, UploadFile, File, Form, HTTPException, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
+from fastapi.responses import FileResponse, JSONResponse
 from pydantic import BaseModel
-import shutil
 import os
 import json
-from models_engine import run_inference
-from model_registry import load_models
+import tempfile
+from email.utils import formatdate, parsedate_to_datetime
+from typing import List, Optional
+from models_engine import run_inference_async
+from model_registry import MODEL_DIR, load_models
+from visualizer import chart_etag, ensure_chart
+from chart_data import (
+    CHART_DATA_BINS, CHART_DATA_MAX_BINS, CHART_DATA_MAX_POINTS, CHART_DATA_POINTS, CHART_DATA_SCHEMA_VERSION,
+    chart_data,
+)
+from graph_store import manifest_path, start_sweeper, stop_sweeper, store_stats
+from executors import start_pools, shutdown_pools, run_io
+from prediction_jobs import submit_job, get_job, job_status, job_result
+from result_cache import cache_stats
+from shadow_eval import shutdown_shadow_pool
+from record_predict import RECORD_BATCHER, predict_record
+from feature_store import append_csv, store_status
+from batch_predict import BATCH_MAX_FILES, extract_csv_members, remove_files, run_batch
+from pendency_forecast import (
+    DEFAULT_ENGINE, DEFAULT_FREQ, DEFAULT_PERIODS, validate_engine, validate_horizon,
+)
 from db_manager import (
     register_user, validate_login,
     create_community_post, fetch_community_posts, get_community_post, delete_community_post,
@@ -30,6 +48,18 @@ class AddCommentRequest(BaseModel):
     author_name: str
     content: str
 
+
+class RecordPredictRequest(BaseModel):
+    record: dict
+    dataset: Optional[str] = None
+
+# ----------------------- UPLOAD SETTINGS -----------------------
+UPLOAD_CHUNK_BYTES = int(os.getenv("UPLOAD_CHUNK_BYTES", str(1024 * 1024)))
+STREAM_THRESHOLD_BYTES = int(os.getenv("PREDICT_STREAM_THRESHOLD_BYTES", str(64 * 1024 * 1024)))
+UPLOAD_TMP_DIR = os.getenv("UPLOAD_TMP_DIR") or None
+# ⚙️ Browser cache lifetime for rendered charts; after it, they revalidate with ETag / Last-Modified.
+GRAPH_CACHE_MAX_AGE = int(os.getenv("GRAPH_CACHE_MAX_AGE", "3600"))
+
 app = FastAPI(title="Hack4Safety AI Backend", version="2.2")
 
 # ----------------------- CORS -----------------------
@@ -41,18 +71,93 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# ----------------------- STATIC FILES -----------------------
-app.mount(
-    "/graphs",
-    StaticFiles(directory="C:/Users/SAPTARSHI MONDAL/Copsight/copsight-police-app/abc/generated_graphs"),
-    name="graphs",
-)
+# ----------------------- GRAPHS -----------------------
+def _not_modified(request: Request, etag: str, mtime: float) -> bool:
+    """Conditional GET: If-None-Match wins over If-Modified-Since, as in RFC 9110."""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+        return "*" in tags or etag in tags
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since:
+        try:
+            return int(mtime) <= parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+def _graph_headers(stat, variant: str = "") -> dict:
+    return {
+        "ETag": chart_etag(stat, variant),
+        "Last-Modified": formatdate(stat.st_mtime, usegmt=True),
+        "Cache-Control": f"public, max-age={GRAPH_CACHE_MAX_AGE}",
+    }
+
+
+@app.get("/graphs/stats")
+async def graph_store_stats():
+    """Sweeps, removals and dedup hits of the graph store, and what the last sweep left."""
+    return {"status": "success", "data": store_stats()}
+
+
+@app.get("/graphs/{folder}/data")
+async def get_graph_data(folder: str, request: Request, points: int = CHART_DATA_POINTS, bins: int = CHART_DATA_BINS):
+    """
+    The charts of a prediction as compact JSON for client-side rendering: district
+    means, LTTB-downsampled monthly series (`points` per district), histogram bins
+    and the correlation matrix. Its size doesn't grow with the upload's row count.
+    """
+    if not 3 <= points <= CHART_DATA_MAX_POINTS or not 1 <= bins <= CHART_DATA_MAX_BINS:
+        raise HTTPException(status_code=400, detail=f"points must be 3-{CHART_DATA_MAX_POINTS}, "
+                                                    f"bins 1-{CHART_DATA_MAX_BINS}")
+    path = manifest_path(folder)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Graph data not found")
+    stat = os.stat(path)
+    # Same manifest, different response for every points/bins and chart_data version.
+    headers = _graph_headers(stat, f"{points}-{bins}-{CHART_DATA_SCHEMA_VERSION}")
+    if _not_modified(request, headers["ETag"], stat.st_mtime):
+        return Response(status_code=304, headers=headers)
+    data = await run_io(chart_data, folder, points, bins)
+    if data is None:
+        raise HTTPException(status_code=404, detail="Graph data not found")
+    return JSONResponse(data, headers=headers)
+
+
+@app.get("/graphs/{folder}/{file_name}")
+async def get_graph(folder: str, file_name: str, request: Request):
+    """
+    A chart of a prediction's graph folder. Charts are rendered on their first request
+    from the data /predict/ stored, then served from disk.
+    """
+    path = await ensure_chart(folder, file_name)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Graph not found")
+    stat = os.stat(path)
+    headers = _graph_headers(stat)
+    if _not_modified(request, headers["ETag"], stat.st_mtime):
+        return Response(status_code=304, headers=headers)
+    return FileResponse(path, media_type="image/png", headers=headers)
 
 # ----------------------- MODEL LOAD -----------------------
 @app.on_event("startup")
 def startup_event():
-    load_models("C:/Users/SAPTARSHI MONDAL/Copsight/copsight-police-app/abc/saved_models")
-    print("✅ Models loaded successfully!")
+    load_models(MODEL_DIR)
+    print("✅ Model registry ready (models load on first use)!")
+    start_pools(MODEL_DIR)
+
+
+@app.on_event("startup")
+async def start_graph_sweeper():
+    start_sweeper()
+
+
+@app.on_event("shutdown")
+def shutdown_event():
+    stop_sweeper()
+    shutdown_pools()
+    shutdown_shadow_pool()
 
 
 # ----------------------- AUTH: REGISTER -----------------------
@@ -102,27 +207,67 @@ async def login_user_route(
 
 
 # ----------------------- PREDICTION -----------------------
+async def _save_upload(file: UploadFile):
+    """Copy the upload body to a unique temp file in fixed-size chunks. Returns (path, size)."""
+    fd, temp_path = tempfile.mkstemp(prefix="predict_", suffix=".csv", dir=UPLOAD_TMP_DIR)
+    size = 0
+    try:
+        with os.fdopen(fd, "wb") as buffer:
+            while True:
+                chunk = await file.read(UPLOAD_CHUNK_BYTES)
+                if not chunk:
+                    break
+                buffer.write(chunk)
+                size += len(chunk)
+    except Exception:
+        os.remove(temp_path)
+        raise
+    return temp_path, size
+
+
+def _forecast_options(periods: int, freq: str, engine: str) -> dict:
+    """Validate the CrimePendency forecast horizon and engine from query parameters."""
+    try:
+        periods, freq = validate_horizon(periods, freq)
+        engine = validate_engine(engine, freq)
+    except (TypeError, ValueError) as e:
+        raise HTTPException(status_code=400, detail=f"Invalid forecast options: {str(e)}")
+    return {"periods": periods, "freq": freq, "engine": engine}
+
+
 @app.post("/predict/")
-async def predict(file: UploadFile = File(...)):
+async def predict(
+    file: UploadFile = File(...),
+    stream: Optional[bool] = None,
+    forecast_periods: int = DEFAULT_PERIODS,
+    forecast_freq: str = DEFAULT_FREQ,
+    forecast_engine: str = DEFAULT_ENGINE,
+):
     """
     Predict from uploaded CSV file.
     Works for both:
     - Full datasets (multi-row CSVs)
     - Single-row datasets (one record)
+    Uploads larger than STREAM_THRESHOLD_BYTES (or stream=true) are scored chunk by chunk.
+    forecast_periods / forecast_freq / forecast_engine control the CrimePendency forecast.
     """
-    temp_path = f"temp_{file.filename}"
+    forecast_options = _forecast_options(forecast_periods, forecast_freq, forecast_engine)
+    temp_path = None
     try:
-        # --- Save temporary uploaded CSV ---
-        with open(temp_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
+        temp_path, size = await _save_upload(file)
+        if stream is None:
+            stream = size > STREAM_THRESHOLD_BYTES
 
         # --- Run model inference ---
-        result = run_inference(temp_path)
+        result = await run_inference_async(
+            temp_path, file_name=file.filename, stream=stream, forecast_options=forecast_options
+        )
 
         # --- Build response ---
         result["file_name"] = file.filename
         result["status"] = "success"
         result["mode"] = "single_row" if len(result.get("predictions", [])) == 1 else "batch_csv"
+        result["streamed"] = stream
         return result
 
     except Exception as e:
@@ -130,9 +275,154 @@ async def predict(file: UploadFile = File(...)):
 
     finally:
         # --- Clean up temporary file ---
-        if os.path.exists(temp_path):
+        if temp_path and os.path.exists(temp_path):
             os.remove(temp_path)
 
+
+@app.post("/predict/batch")
+async def predict_batch(
+    files: List[UploadFile] = File(...),
+    stream: Optional[bool] = None,
+    forecast_periods: int = DEFAULT_PERIODS,
+    forecast_freq: str = DEFAULT_FREQ,
+    forecast_engine: str = DEFAULT_ENGINE,
+):
+    """
+    Predict several datasets in one call: a multipart list of CSVs and/or zip archives
+    of CSVs. Each file's dataset is detected on its own, the pipelines run concurrently
+    (bounded by BATCH_MAX_CONCURRENCY), and per-file results and errors come back together.
+    """
+    forecast_options = _forecast_options(forecast_periods, forecast_freq, forecast_engine)
+    items = []
+    try:
+        for index, upload in enumerate(files, start=1):
+            # A multipart part without a filename can't be told apart in the results.
+            if not upload.filename:
+                raise HTTPException(status_code=400, detail=f"File #{index} has no filename")
+            temp_path, size = await _save_upload(upload)
+            if upload.filename.lower().endswith(".zip"):
+                try:
+                    items.extend(await run_io(extract_csv_members, temp_path, UPLOAD_TMP_DIR))
+                except ValueError as e:
+                    raise HTTPException(status_code=400, detail=f"{upload.filename}: {str(e)}")
+                finally:
+                    os.remove(temp_path)
+            else:
+                items.append((upload.filename, temp_path))
+
+            if len(items) > BATCH_MAX_FILES:
+                raise HTTPException(status_code=400, detail=f"At most {BATCH_MAX_FILES} CSV files per batch")
+
+        return await run_batch(items, stream=stream, forecast_options=forecast_options,
+                               stream_threshold_bytes=STREAM_THRESHOLD_BYTES)
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        remove_files(path for _, path in items)
+
+
+@app.post("/predict/record")
+async def predict_single_record(request: RecordPredictRequest):
+    """
+    Score one district-month record sent as JSON, e.g.
+    {"record": {"district": "Khordha", "month": "2025-05", ...}, "dataset": "Firearms_Drive"}.
+    dataset is optional (detected from the record's fields). Concurrent records for the
+    same dataset are micro-batched into a single model.predict call.
+    """
+    try:
+        return await predict_record(request.record, request.dataset)
+    except (KeyError, ValueError) as e:
+        raise HTTPException(status_code=400, detail=f"Invalid record: {str(e)}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.get("/predict/record/stats")
+async def record_prediction_stats():
+    """Latency and batch-size histograms of the single-record micro-batcher."""
+    return {"status": "success", "data": RECORD_BATCHER.stats()}
+
+
+@app.get("/predict/cache/stats")
+async def prediction_cache_stats():
+    """Hit / miss / eviction counters for the prediction result cache."""
+    return {"status": "success", "data": cache_stats()}
+
+
+# ----------------------- PREDICTION JOBS -----------------------
+@app.post("/predict/jobs")
+async def submit_prediction_job(
+    file: UploadFile = File(...),
+    stream: Optional[bool] = None,
+    forecast_periods: int = DEFAULT_PERIODS,
+    forecast_freq: str = DEFAULT_FREQ,
+    forecast_engine: str = DEFAULT_ENGINE,
+):
+    """
+    Queue a prediction and return its job id immediately.
+    Poll /predict/jobs/{job_id} for progress and /predict/jobs/{job_id}/result for output.
+    """
+    forecast_options = _forecast_options(forecast_periods, forecast_freq, forecast_engine)
+    temp_path = None
+    try:
+        temp_path, size = await _save_upload(file)
+        if stream is None:
+            stream = size > STREAM_THRESHOLD_BYTES
+        job = submit_job(temp_path, file.filename, stream=stream, forecast_options=forecast_options)
+        return {"status": "accepted", **job_status(job)}
+    except Exception as e:
+        # The job only owns the upload once it has been submitted.
+        if temp_path and os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.get("/predict/jobs/{job_id}")
+async def get_prediction_job(job_id: str):
+    """Job status with per-stage progress."""
+    job = get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job_status(job)
+
+
+@app.get("/predict/jobs/{job_id}/result")
+async def get_prediction_job_result(job_id: str):
+    """Results produced so far; predictions and map points arrive before graphs and the report."""
+    job = get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job_result(job)
+
+# ----------------------- FEATURE STORE -----------------------
+@app.post("/features/append")
+async def append_monthly_features(file: UploadFile = File(...)):
+    """
+    Append a new month of a drive dataset to its incremental feature store. Only the
+    new rows and each district's previous month are recomputed.
+    """
+    temp_path = None
+    try:
+        temp_path, _ = await _save_upload(file)
+        return {"status": "success", "data": await run_io(append_csv, temp_path)}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        if temp_path and os.path.exists(temp_path):
+            os.remove(temp_path)
+
+
+@app.get("/features/status")
+async def feature_store_status():
+    """Rows, districts and latest month held in each dataset's feature store."""
+    return {"status": "success", "data": store_status()}
+
+
 @app.post("/analyze_case_document/")
 async def analyze_case_document(file: UploadFile = File(...)):
     """
@@ -0,0 +1,106 @@
+import asyncio
+import os
+import shutil
+import tempfile
+import time
+import zipfile
+
+from models_engine import run_inference_async
+
+# ⚙️ Batch limits: pipelines run at most BATCH_MAX_CONCURRENCY at a time, and a zip
+# archive may hold at most BATCH_MAX_FILES CSVs totalling BATCH_MAX_UNZIPPED_BYTES.
+BATCH_MAX_CONCURRENCY = int(os.getenv("BATCH_MAX_CONCURRENCY", "4"))
+BATCH_MAX_FILES = int(os.getenv("BATCH_MAX_FILES", "20"))
+BATCH_MAX_UNZIPPED_BYTES = int(os.getenv("BATCH_MAX_UNZIPPED_BYTES", str(1024 * 1024 * 1024)))
+
+
+def extract_csv_members(zip_path: str, tmp_dir=None) -> list:
+    """
+    Extract every .csv in a zip archive to its own temp file.
+    Returns [(member_name, temp_path), ...]; raises ValueError if the archive is
+    unusable or exceeds the batch limits.
+    """
+    try:
+        archive = zipfile.ZipFile(zip_path)
+    except zipfile.BadZipFile:
+        raise ValueError("Uploaded archive is not a valid zip file")
+
+    extracted = []
+    with archive:
+        members = [
+            info for info in archive.infolist()
+            if not info.is_dir()
+            and info.filename.lower().endswith(".csv")
+            and not os.path.basename(info.filename).startswith(("._", "~$"))
+        ]
+        if not members:
+            raise ValueError("Zip archive contains no CSV files")
+        if len(members) > BATCH_MAX_FILES:
+            raise ValueError(f"Zip archive holds {len(members)} CSVs; the limit is {BATCH_MAX_FILES}")
+        if sum(info.file_size for info in members) > BATCH_MAX_UNZIPPED_BYTES:
+            raise ValueError("Zip archive is too large once extracted")
+
+        try:
+            for info in members:
+                fd, temp_path = tempfile.mkstemp(prefix="batch_", suffix=".csv", dir=tmp_dir)
+                with os.fdopen(fd, "wb") as target, archive.open(info) as source:
+                    shutil.copyfileobj(source, target, 1024 * 1024)
+                extracted.append((os.path.basename(info.filename), temp_path))
+        except Exception:
+            remove_files(path for _, path in extracted)
+            raise
+    return extracted
+
+
+def remove_files(paths):
+    for path in paths:
+        if path and os.path.exists(path):
+            os.remove(path)
+
+
+async def _predict_one(semaphore, file_name: str, temp_path: str, stream, stream_threshold_bytes,
+                       forecast_options):
+    if stream is None:
+        stream = stream_threshold_bytes is not None and os.path.getsize(temp_path) > stream_threshold_bytes
+    async with semaphore:
+        start = time.perf_counter()
+        try:
+            result = await run_inference_async(
+                temp_path, file_name=file_name, stream=stream, forecast_options=forecast_options
+            )
+        except Exception as e:
+            result = {"status": "error", "message": f"⚠️ Inference failed: {str(e)}"}
+        elapsed = round(time.perf_counter() - start, 3)
+
+    if result.get("status") == "error":
+        return {"file_name": file_name, "status": "error", "message": result.get("message"), "elapsed_s": elapsed}
+    return {**result, "file_name": file_name, "status": "success", "elapsed_s": elapsed}
+
+
+async def run_batch(items: list, stream=None, forecast_options=None,
+                    concurrency: int = BATCH_MAX_CONCURRENCY, stream_threshold_bytes=None) -> dict:
+    """
+    Run one pipeline per (file_name, temp_path) concurrently, at most `concurrency`
+    at a time, and combine the per-file results and errors into one response.
+    With stream=None each file streams only if it is larger than stream_threshold_bytes.
+    """
+    start = time.perf_counter()
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    files = await asyncio.gather(*[
+        _predict_one(semaphore, file_name, temp_path, stream, stream_threshold_bytes, forecast_options)
+        for file_name, temp_path in items
+    ])
+
+    succeeded = sum(1 for entry in files if entry["status"] == "success")
+    failed = len(files) - succeeded
+    return {
+        "status": "success" if not failed else "partial" if succeeded else "error",
+        "files": files,
+        "summary": {
+            "total": len(files),
+            "succeeded": succeeded,
+            "failed": failed,
+            "datasets": sorted({entry["dataset"] for entry in files if entry.get("dataset")}),
+            "elapsed_s": round(time.perf_counter() - start, 3),
+        },
+    }
@@ -0,0 +1,55 @@
+"""
+sklearn estimator.predict vs the compiled NumPy predictor (compact_models) at 1, 100 and 1M rows.
+
+    python benchmarks/bench_compact_models.py [--model-dir ../saved_models] [--rows 1 100 1000000]
+
+Every dataset with a saved model is run through its feature builder; the feature
+rows are tiled up to each size. Predictions from both paths must agree before any
+timing is reported.
+"""
+import argparse
+import os
+
+import numpy as np
+
+from common import BACKEND_DIR, best_of, dataset_paths
+from compact_models import UnsupportedModel, check_equivalence, compile_model
+from dataset_registry import detect_dataset, read_csv_header
+from feature_cache import cached_features
+from model_registry import MODEL_REGISTRY, load_models
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--model-dir", default=os.path.join(os.path.dirname(BACKEND_DIR), "saved_models"))
+    parser.add_argument("--rows", type=int, nargs="+", default=[1, 100, 1_000_000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    load_models(args.model_dir)
+    print(f"{'model':<36}{'rows':>9}{'sklearn ms':>12}{'numpy ms':>10}{'speedup':>9}")
+    for path in dataset_paths():
+        spec = detect_dataset(read_csv_header(path), csv_path=path)
+        if spec is None or spec["model_key"] not in MODEL_REGISTRY:
+            continue
+        model = MODEL_REGISTRY[spec["model_key"]]
+        try:
+            compact = compile_model(model)
+        except UnsupportedModel as e:
+            print(f"{spec['model_key']:<36} skipped: {str(e)}")
+            continue
+
+        X, _, _ = cached_features(path, spec)
+        if len(X) == 0:
+            continue
+        for rows in args.rows:
+            sample = X.iloc[np.arange(rows) % len(X)].reset_index(drop=True)
+            check_equivalence(model, compact, sample)
+            repeat = 1 if rows >= 100_000 else args.repeat
+            sk_s, _ = best_of(lambda: model.predict(sample), repeat)
+            np_s, _ = best_of(lambda: compact.predict(sample), repeat)
+            print(f"{spec['model_key']:<36}{rows:>9}{sk_s * 1000:>12.3f}{np_s * 1000:>10.3f}{sk_s / np_s:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Plain pd.read_csv vs csv_ingest.read_dataset (pyarrow and pandas engines), per dataset.
+
+    python benchmarks/bench_csv_ingest.py [--scale 200]
+
+Each synthetic CSV is tiled `--scale` times into a temp file, with a few ",,,," blank
+lines appended the way spreadsheet exports leave them. Reported per reader: best
+wall time, peak RSS growth of a fresh process while reading (includes pyarrow's
+allocator, which tracemalloc can't see), and the size of the resulting frame.
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+
+import pandas as pd
+
+from common import best_of, dataset_paths, tiled_csv
+from csv_ingest import read_dataset
+from dataset_registry import detect_dataset, read_csv_header
+
+
+def _readers(spec):
+    return {
+        "pd.read_csv": lambda path: pd.read_csv(path),
+        "ingest/pyarrow": lambda path: read_dataset(path, spec, engine="pyarrow")[0],
+        "ingest/pandas": lambda path: read_dataset(path, spec, engine="pandas")[0],
+    }
+
+
+def _peak_rss_mb():
+    """VmHWM of this process. ru_maxrss would report the parent's peak: it survives fork/exec."""
+    try:
+        with open("/proc/self/status", "r", encoding="ascii") as handle:
+            for line in handle:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _measure(reader, spec_name, path):
+    """Child-process side of --measure: prints peak RSS growth, frame size, rows and dtypes."""
+    from dataset_registry import DATASETS_BY_NAME
+
+    read = _readers(DATASETS_BY_NAME[spec_name])[reader]
+    before = _peak_rss_mb()
+    df = read(path)
+    after = _peak_rss_mb()
+    print(json.dumps({
+        "peak_mb": after - before,
+        "frame_mb": df.memory_usage(deep=True).sum() / 2**20,
+        "rows": len(df),
+        "dtypes": sorted({str(t) for t in df.dtypes}),
+    }))
+
+
+def _measure_in_child(reader, spec_name, path):
+    out = subprocess.run([sys.executable, __file__, "--measure", reader, spec_name, path],
+                         check=True, capture_output=True, text=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--scale", type=int, default=200, help="times each dataset is tiled")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--measure", nargs=3, metavar=("READER", "DATASET", "CSV"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.measure:
+        return _measure(*args.measure)
+
+    print(f"{'dataset':<22}{'reader':<16}{'rows':>9}{'ms':>9}{'peak MB':>9}{'frame MB':>10}  dtypes")
+    for source in dataset_paths():
+        spec = detect_dataset(read_csv_header(source), csv_path=source)
+        if spec is None:
+            continue
+        path = tiled_csv(source, args.scale, blank_lines=5)
+        try:
+            for reader, read in _readers(spec).items():
+                seconds, _ = best_of(lambda: read(path), args.repeat)
+                m = _measure_in_child(reader, spec["name"], path)
+                print(f"{spec['name']:<22}{reader:<16}{m['rows']:>9}{seconds * 1000:>9.1f}{m['peak_mb']:>9.1f}"
+                      f"{m['frame_mb']:>10.1f}  {', '.join(m['dtypes'])}")
+        finally:
+            os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
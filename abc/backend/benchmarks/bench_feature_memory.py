@@ -0,0 +1,66 @@
+"""
+Memory profile of feature_builder: legacy vs compact=True, per dataset.
+
+    python benchmarks/bench_feature_memory.py [--scale 50]
+
+Each synthetic CCTNS dataset is tiled `--scale` times. For both modes the script
+reports the peak memory allocated while the builder runs (tracemalloc, input frame
+excluded), the size of the X and df_proc it returns, and the wall time. Features
+from the two modes must agree to float32 precision.
+"""
+import argparse
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from common import dataset_paths
+from dataset_registry import detect_dataset, read_csv_header
+
+
+def _profile(builder, df, compact):
+    tracemalloc.start()
+    start = time.perf_counter()
+    X, _, df_proc = builder(df, compact=compact)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return X, {
+        "peak_mb": peak / 2**20,
+        "x_mb": X.memory_usage(deep=True).sum() / 2**20,
+        "proc_mb": df_proc.memory_usage(deep=True).sum() / 2**20,
+        "cols": len(df_proc.columns),
+        "ms": elapsed * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--scale", type=int, default=50, help="times each dataset is tiled")
+    args = parser.parse_args()
+
+    print(f"{'dataset':<22}{'mode':<9}{'rows':>9}{'peak MB':>9}{'X MB':>8}{'proc MB':>9}{'cols':>6}{'ms':>9}")
+    for path in dataset_paths():
+        spec = detect_dataset(read_csv_header(path), csv_path=path)
+        if spec is None or spec["builder"] is None:
+            continue
+        df = pd.read_csv(path)
+        if len(df) < 2:
+            continue
+        # Give every copy its own district names so carry-over targets stay within a copy.
+        df = pd.concat(
+            [df.assign(district=df["district"] + f"#{i}") for i in range(args.scale)], ignore_index=True
+        )
+
+        X_legacy, legacy = _profile(spec["builder"], df, compact=False)
+        X_compact, compact = _profile(spec["builder"], df, compact=True)
+        np.testing.assert_allclose(X_compact.to_numpy(float), X_legacy.to_numpy(float), rtol=1e-6, atol=1e-6)
+
+        for mode, stats in (("legacy", legacy), ("compact", compact)):
+            print(f"{spec['name']:<22}{mode:<9}{len(df):>9}{stats['peak_mb']:>9.1f}{stats['x_mb']:>8.1f}"
+                  f"{stats['proc_mb']:>9.1f}{stats['cols']:>6}{stats['ms']:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
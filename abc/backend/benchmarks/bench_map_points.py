@@ -0,0 +1,104 @@
+"""
+Benchmark models_engine._build_map_points against the original row-by-row loop.
+
+    python benchmarks/bench_map_points.py [--scale 10] [--repeat 5]
+
+Each synthetic CCTNS dataset is run through its feature builder, tiled `--scale`
+times to emulate longer histories, and scored with random predictions. Both
+implementations must return identical payloads.
+"""
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+from common import best_of, dataset_paths
+from dataset_registry import detect_dataset, read_csv_header
+from geo_mapper import get_geo_location
+from models_engine import _build_map_points, _extract_month, _normalise_predictions
+
+
+def _legacy_band(efficiency):
+    if efficiency >= 85:
+        return "high"
+    if efficiency >= 75:
+        return "moderate"
+    return "watch"
+
+
+def legacy_build_map_points(dataset_label, df_proc, preds):
+    """The pre-vectorisation implementation, kept verbatim as the reference."""
+    if "district" not in df_proc.columns:
+        return []
+
+    normalised = _normalise_predictions(preds)
+    results = {}
+
+    for idx, (district, normalised_score, raw_score) in enumerate(
+        zip(df_proc["district"], normalised, np.array(preds).flatten())
+    ):
+        if pd.isna(district):
+            continue
+
+        location = get_geo_location(str(district))
+        if not location:
+            continue
+
+        month_value = None
+        if "month" in df_proc.columns:
+            month_col_value = df_proc.iloc[idx]["month"]
+            month_value = _extract_month(month_col_value)
+
+        payload = {
+            "district": str(district),
+            "state": location.get("state"),
+            "latitude": float(location["lat"]),
+            "longitude": float(location["lng"]),
+            "efficiency": float(normalised_score),
+            "raw_score": float(raw_score),
+            "dataset": dataset_label,
+            "category": dataset_label.replace("_", " "),
+            "month": month_value,
+            "band": _legacy_band(float(normalised_score)),
+        }
+
+        key = str(district).strip().lower()
+        existing = results.get(key)
+        if existing is None:
+            results[key] = payload
+        else:
+            existing_month = existing.get("month")
+            if month_value and (existing_month is None or month_value > existing_month):
+                results[key] = payload
+
+    return list(results.values())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--scale", type=int, default=1, help="tile each dataset N times")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    print(f"{'dataset':<32}{'rows':>10}{'legacy ms':>12}{'vector ms':>12}{'speed-up':>10}")
+    for path in dataset_paths():
+        spec = detect_dataset(read_csv_header(path), csv_path=path)
+        if spec is None or spec["builder"] is None:
+            continue
+        _, _, df_proc = spec["builder"](pd.read_csv(path))
+        if args.scale > 1:
+            df_proc = pd.concat([df_proc] * args.scale, ignore_index=True)
+        preds = rng.random(len(df_proc))
+
+        legacy_s, expected = best_of(lambda: legacy_build_map_points(spec["label"], df_proc, preds), args.repeat)
+        vector_s, actual = best_of(lambda: _build_map_points(spec["label"], df_proc, preds), args.repeat)
+        assert actual == expected, f"payload mismatch for {os.path.basename(path)}"
+
+        print(f"{os.path.basename(path):<32}{len(df_proc):>10}{legacy_s * 1e3:>12.2f}"
+              f"{vector_s * 1e3:>12.2f}{legacy_s / vector_s:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""
+Startup time and resident memory of the model registry: eager vs lazy vs mmap.
+
+    python benchmarks/bench_model_registry.py [--model-dir ../saved_models]
+
+Each mode runs in a fresh interpreter so RSS numbers aren't polluted by the others.
+"eager" loads every .pkl without mmap (the old behaviour), "lazy" only indexes the
+folder, and "mmap" preloads the dataset models memory-mapped, as warm workers do.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+from common import BACKEND_DIR
+
+_CHILD = r"""
+import json, os, sys, time
+sys.path.insert(0, {backend!r})
+os.environ["MODEL_MMAP_MODE"] = {mmap!r}
+start = time.perf_counter()
+from model_registry import load_models
+from dataset_registry import DATASET_REGISTRY
+mode = {mode!r}
+if mode == "eager":
+    registry = load_models({model_dir!r}, preload=True)
+elif mode == "mmap":
+    registry = load_models({model_dir!r}, preload=[s["model_key"] for s in DATASET_REGISTRY if s["model_key"]])
+else:
+    registry = load_models({model_dir!r})
+elapsed = time.perf_counter() - start
+try:
+    import psutil
+    rss = psutil.Process().memory_info().rss
+except ImportError:
+    import resource
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+print(json.dumps({{"startup_s": elapsed, "rss_mb": rss / 2**20, "loaded": len(registry.loaded())}}))
+"""
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--model-dir", default=os.path.join(os.path.dirname(BACKEND_DIR), "saved_models"))
+    args = parser.parse_args()
+
+    print(f"{'mode':<8}{'startup s':>12}{'RSS MB':>10}{'loaded':>8}")
+    for mode, mmap in (("eager", ""), ("lazy", "r"), ("mmap", "r")):
+        code = _CHILD.format(backend=BACKEND_DIR, mmap=mmap, mode=mode, model_dir=args.model_dir)
+        out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+        stats = json.loads(out.stdout.strip().splitlines()[-1])
+        print(f"{mode:<8}{stats['startup_s']:>12.3f}{stats['rss_mb']:>10.1f}{stats['loaded']:>8}")
+
+
+if __name__ == "__main__":
+    main()
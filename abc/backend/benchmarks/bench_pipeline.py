@@ -0,0 +1,288 @@
+"""
+Per-stage timings and peak memory of the /predict/ pipeline for every dataset.
+
+    python benchmarks/bench_pipeline.py [--scale 10] [--repeat 3] [--output run.json]
+    python benchmarks/bench_pipeline.py --compare baseline.json run.json [--max-slowdown 0.15]
+
+Each synthetic CSV is tiled `--scale` times and taken through the stages run_inference
+runs: read (csv_ingest), features (the spec's builder), predict, graphs, report,
+save and map_points, or read and forecast for CrimePendency. Stages run in-process,
+without the result or feature caches, against stand-ins for the external services:
+the Gemini model returns a canned reply, the database is a throwaway SQLite file
+and graphs go to a temp GRAPHS_DIR.
+
+"graphs" is what a prediction pays for its charts: storing the payloads (LAZY_GRAPHS=1,
+recorded in the metadata) or rendering the PNGs the store doesn't have yet. "render"
+draws every chart with render_chart each time, so a rendering regression shows up
+whatever the graph mode.
+
+Timings are the best of `--repeat` runs. Peak memory comes from one extra traced run
+per stage (tracemalloc, so pyarrow's allocator isn't counted). Results are written as
+JSON. --compare reads two such files and exits with status 1 if a stage got slower
+or hungrier than the thresholds allow.
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import tracemalloc
+from datetime import datetime
+from types import SimpleNamespace
+
+from common import BACKEND_DIR, best_of, dataset_paths, tiled_csv
+
+class _CannedLLM:
+    """Stands in for gemini_model: same call shape, fixed reply, no network."""
+
+    def generate_content(self, prompt):
+        return SimpleNamespace(text="The data indicates steady execution across districts.\n"
+                                    "Supervisors should prioritise the lowest quartile.")
+
+
+def _use_stand_ins(workdir):
+    from sqlalchemy import create_engine, text  # type: ignore
+
+    import db_manager
+    import graph_store
+    import report_generator
+
+    report_generator.gemini_model = _CannedLLM()
+    graph_store.GRAPHS_DIR = os.path.join(workdir, "graphs")
+    db_manager.engine = create_engine(f"sqlite:///{os.path.join(workdir, 'predictions.db')}")
+    with db_manager.engine.begin() as conn:
+        conn.execute(text("""
+            CREATE TABLE ai_predictions (
+                id INTEGER PRIMARY KEY, dataset_name TEXT NOT NULL, timestamp TIMESTAMP, file_name TEXT,
+                predictions TEXT, analysis_report TEXT, graphs_path TEXT, model_version TEXT
+            )
+        """))
+
+
+def _traced_peak_mb(fn):
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1] / 2**20
+    finally:
+        tracemalloc.stop()
+
+
+def _pipeline(spec, path, forecast_engine, render_dir):
+    """(stage, fn) pairs; each fn takes the state dict and stores its outputs in it."""
+    # Imported here so --compare runs without the backend's dependencies.
+    import db_manager
+    import report_generator
+    import visualizer
+    from compact_models import predictor_for
+    from csv_ingest import read_dataset
+    from models_engine import COMPACT_FEATURES, _build_map_points, _forecast_options
+    from pendency_forecast import run_forecast
+
+    def read(state):
+        state["df"], _ = read_dataset(path, spec)
+
+    if spec["pipeline"] == "forecast":
+        options = _forecast_options({"engine": forecast_engine} if forecast_engine else None)
+
+        def forecast(state):
+            state["forecast"] = run_forecast(state["df"], periods=options["periods"], freq=options["freq"],
+                                             engine=options["engine"])
+        return [("read", read), ("forecast", forecast)]
+
+    model = predictor_for(spec["model_key"])
+    if model is None:
+        return None
+
+    def features(state):
+        state["X"], _, state["df_proc"] = spec["builder"](state["df"], compact=COMPACT_FEATURES)
+
+    def predict(state):
+        state["preds"] = model.predict(state["X"])
+
+    def graphs(state):
+        state["graphs"] = visualizer.publish_graphs(spec["graph_label"], state["df_proc"], state["preds"])
+
+    def render(state):
+        tasks = visualizer._chart_tasks(state["df_proc"], state["preds"])
+        state["render_ms"] = {
+            chart: visualizer.render_chart(chart, spec["graph_label"], data,
+                                           os.path.join(render_dir, visualizer.CHARTS[chart][0]))
+            for chart, data in tasks
+        }
+
+    def report(state):
+        state["report"] = report_generator.generate_analysis_report(spec["graph_label"], state["df_proc"],
+                                                                    state["preds"])
+
+    def save(state):
+        db_manager.save_prediction_to_db(spec["db_label"], os.path.basename(path), state["preds"],
+                                         state["report"], state["graphs"]["folder"])
+
+    def map_points(state):
+        state["map_points"] = _build_map_points(spec["label"], state["df_proc"], state["preds"])
+
+    return [("read", read), ("features", features), ("predict", predict), ("graphs", graphs),
+            ("render", render), ("report", report), ("save", save), ("map_points", map_points)]
+
+
+def run_dataset(spec, path, repeat, render_dir, forecast_engine=None):
+    stages = _pipeline(spec, path, forecast_engine, render_dir)
+    if stages is None:
+        return {"skipped": f"model '{spec['model_key']}' is not loaded"}
+
+    state, results = {}, {}
+    for stage, fn in stages:
+        # The stages print progress ("✅ Graphs saved in ..."); keep it out of the report.
+        with contextlib.redirect_stdout(io.StringIO()):
+            seconds, _ = best_of(lambda: fn(state), repeat)
+            peak_mb = _traced_peak_mb(lambda: fn(state))
+        results[stage] = {"ms": seconds * 1000, "peak_mb": peak_mb}
+    return {
+        "rows": len(state["df"]),
+        "stages": results,
+        "total_ms": sum(stage["ms"] for stage in results.values()),
+    }
+
+
+def _metadata(args):
+    import numpy
+    import pandas
+    import sklearn
+    from models_engine import COMPACT_FEATURES
+    from visualizer import LAZY_GRAPHS
+
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR,
+                                capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "versions": {"pandas": pandas.__version__, "numpy": numpy.__version__, "sklearn": sklearn.__version__},
+        "scale": args.scale,
+        "repeat": args.repeat,
+        "compact_features": COMPACT_FEATURES,
+        "lazy_graphs": LAZY_GRAPHS,
+    }
+
+
+def run(args):
+    from dataset_registry import detect_dataset, read_csv_header
+    from model_registry import load_models
+
+    load_models(args.model_dir)
+    datasets = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        _use_stand_ins(workdir)
+        render_dir = os.path.join(workdir, "render")
+        os.makedirs(render_dir)
+        for source in dataset_paths():
+            spec = detect_dataset(read_csv_header(source), csv_path=source)
+            if spec is None or (args.dataset and spec["name"] not in args.dataset):
+                continue
+            path = tiled_csv(source, args.scale)
+            try:
+                datasets[spec["name"]] = result = run_dataset(spec, path, args.repeat, render_dir,
+                                                              args.forecast_engine)
+            finally:
+                os.remove(path)
+            _print_dataset(spec["name"], result)
+
+    output = {"meta": _metadata(args), "datasets": datasets}
+    with open(args.output, "w", encoding="utf-8") as handle:
+        json.dump(output, handle, indent=2)
+    print(f"✅ Results written to {args.output}")
+
+
+def _print_dataset(name, result):
+    if "skipped" in result:
+        print(f"⚠️ {name}: skipped ({result['skipped']})")
+        return
+    print(f"{name} ({result['rows']} rows, {result['total_ms']:.1f} ms)")
+    for stage, stats in result["stages"].items():
+        print(f"    {stage:<12}{stats['ms']:>10.1f} ms{stats['peak_mb']:>10.1f} MB")
+
+
+# ---------------------- COMPARE ----------------------
+
+def compare(baseline, candidate, max_slowdown, max_memory_growth, min_ms, min_mb):
+    """
+    Stage-by-stage diff of two result files. A stage regresses when it is more than
+    `max_slowdown` slower or its peak memory grew by more than `max_memory_growth`;
+    growth under `min_ms` / `min_mb` is treated as noise.
+    """
+    rows, regressions = [], []
+    for name, base in baseline["datasets"].items():
+        new = candidate["datasets"].get(name)
+        if new is None or "stages" not in base or "stages" not in new:
+            continue
+        for stage, before in base["stages"].items():
+            after = new["stages"].get(stage)
+            if after is None:
+                continue
+            time_ratio = after["ms"] / before["ms"] if before["ms"] else 1.0
+            mem_ratio = after["peak_mb"] / before["peak_mb"] if before["peak_mb"] else 1.0
+            flags = []
+            if time_ratio > 1 + max_slowdown and after["ms"] - before["ms"] >= min_ms:
+                flags.append("slower")
+            if mem_ratio > 1 + max_memory_growth and after["peak_mb"] - before["peak_mb"] >= min_mb:
+                flags.append("memory")
+            row = {"dataset": name, "stage": stage, "before_ms": before["ms"], "after_ms": after["ms"],
+                   "time_ratio": time_ratio, "mem_ratio": mem_ratio, "flags": flags}
+            rows.append(row)
+            if flags:
+                regressions.append(row)
+    return rows, regressions
+
+
+def _print_comparison(rows, regressions):
+    print(f"{'dataset':<22}{'stage':<12}{'before ms':>11}{'after ms':>10}{'time':>8}{'memory':>8}")
+    for row in rows:
+        flag = f"  ❌ {', '.join(row['flags'])}" if row["flags"] else ""
+        print(f"{row['dataset']:<22}{row['stage']:<12}{row['before_ms']:>11.1f}{row['after_ms']:>10.1f}"
+              f"{row['time_ratio']:>7.2f}x{row['mem_ratio']:>7.2f}x{flag}")
+    if regressions:
+        print(f"❌ {len(regressions)} stage(s) regressed")
+    else:
+        print("✅ No regressions")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--scale", type=int, default=10, help="times each dataset is tiled")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--dataset", action="append", help="only this dataset name (repeatable)")
+    parser.add_argument("--forecast-engine", help="CrimePendency forecast engine (default: pipeline default)")
+    parser.add_argument("--model-dir", default=os.path.join(os.path.dirname(BACKEND_DIR), "saved_models"))
+    parser.add_argument("--output", default=f"bench_pipeline_{datetime.now():%Y%m%d_%H%M%S}.json")
+    parser.add_argument("--compare", nargs=2, metavar=("BASELINE", "CANDIDATE"))
+    parser.add_argument("--max-slowdown", type=float, default=0.15, help="allowed time growth per stage")
+    parser.add_argument("--max-memory-growth", type=float, default=0.20, help="allowed peak memory growth")
+    parser.add_argument("--min-ms", type=float, default=5.0, help="ignore slowdowns smaller than this")
+    parser.add_argument("--min-mb", type=float, default=1.0, help="ignore memory growth smaller than this")
+    args = parser.parse_args()
+
+    if not args.compare:
+        return run(args)
+
+    with open(args.compare[0], encoding="utf-8") as handle:
+        baseline = json.load(handle)
+    with open(args.compare[1], encoding="utf-8") as handle:
+        candidate = json.load(handle)
+    rows, regressions = compare(baseline, candidate, args.max_slowdown, args.max_memory_growth,
+                                    args.min_ms, args.min_mb)
+    _print_comparison(rows, regressions)
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
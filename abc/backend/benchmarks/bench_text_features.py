@@ -0,0 +1,79 @@
+"""
+Row-wise .apply parsing vs text_features (str.extract on distinct values) at 1M rows.
+
+    python benchmarks/bench_text_features.py [--rows 1000000] [--distinct 5000]
+
+OPG details_of_seizure and Convictions punishment values are resampled from the
+synthetic CSVs, with `--distinct` different cash amounts mixed in so the seizure
+column isn't trivially repetitive. Both paths must produce the same numbers before
+any timing is reported.
+"""
+import argparse
+import os
+import re
+
+import numpy as np
+import pandas as pd
+
+from common import DATASET_DIR, best_of
+from text_features import SENTENCE_PATTERN, cash_value, punishment_features, seizure_features
+
+
+# The per-row parser feature_builder used before text_features.
+def extract_cash_value(text):
+    if pd.isna(text):
+        return 0.0
+    match = re.search(r'Rs\.?\s?([\d,]+)', str(text))
+    return float(match.group(1).replace(",", "")) if match else 0.0
+
+
+def extract_sentence_years(text):
+    if pd.isna(text):
+        return 0.0
+    match = re.search(SENTENCE_PATTERN.pattern, str(text), re.IGNORECASE)
+    if not match or (match.group(3) or "").lower() == "probation":
+        return 0.0
+    value = float(match.group(1))
+    return value / 12 if match.group(2).lower().startswith("m") else value
+
+
+def _sample(rows, distinct, seed=0):
+    rng = np.random.default_rng(seed)
+    punishments = pd.read_csv(os.path.join(DATASET_DIR, "Convictions.csv"))["punishment"].dropna().unique()
+    amounts = rng.integers(1_000, 10_000_000, size=distinct)
+    templates = np.array(["Rs. {:,} mobile phones and cash", "{} mobile phones and Rs. {:,} cash", "Rs.{} cash"])
+    seizure = [
+        templates[i % 3].format(*((a,) if i % 3 != 1 else (i % 40 + 1, a))) for i, a in enumerate(amounts)
+    ]
+    seizure = pd.Series(np.asarray(seizure, dtype=object)[rng.integers(0, distinct, size=rows)])
+    punishment = pd.Series(punishments[rng.integers(0, len(punishments), size=rows)])
+    return seizure, punishment
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--distinct", type=int, default=5_000, help="distinct seizure texts")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    seizure, punishment = _sample(args.rows, args.distinct)
+
+    cases = [
+        ("OPG cash_value", lambda: seizure.apply(extract_cash_value), lambda: cash_value(seizure)),
+        ("OPG seizure_features", lambda: seizure.apply(extract_cash_value),
+         lambda: seizure_features(seizure)["cash_value"]),
+        ("Convictions sentence_years", lambda: punishment.apply(extract_sentence_years),
+         lambda: punishment_features(punishment)["sentence_years"]),
+    ]
+    print(f"{'column':<30}{'rows':>10}{'apply ms':>11}{'vector ms':>11}{'rows/s':>14}{'speedup':>9}")
+    for name, legacy, vectorised in cases:
+        apply_s, expected = best_of(legacy, 1)
+        vector_s, result = best_of(vectorised, args.repeat)
+        np.testing.assert_allclose(result.to_numpy(float), expected.to_numpy(float))
+        print(f"{name:<30}{args.rows:>10}{apply_s * 1000:>11.1f}{vector_s * 1000:>11.1f}"
+              f"{args.rows / vector_s:>14,.0f}{apply_s / vector_s:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
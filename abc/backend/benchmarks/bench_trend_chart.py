@@ -0,0 +1,101 @@
+"""
+Benchmark the per-district trend chart against the original mask-per-district loop.
+
+    python benchmarks/bench_trend_chart.py [--scale 100] [--repeat 3] [--dataset NBW_Drive] [--keep out_dir]
+
+Each dataset is scaled with scale_datasets (more districts and a longer history, like
+a state-wide multi-year export), run through its feature builder and given random
+predictions. Both versions draw the line chart to a PNG: the original boolean-mask
+loop with one plt.plot per district and a full legend, and the current path (one
+groupby into a month x district matrix, quarter/year roll-up, one LineCollection,
+top-N legend). Reported: best wall time of building the data and of drawing it,
+how many points each drew and how many legend entries it laid out.
+"""
+import argparse
+import os
+import tempfile
+import warnings
+
+import matplotlib
+import numpy as np
+import pandas as pd
+
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt  # noqa: E402
+
+from common import best_of, dataset_paths  # noqa: E402
+from csv_ingest import read_dataset  # noqa: E402
+from dataset_registry import detect_dataset, read_csv_header  # noqa: E402
+from scale_datasets import generate, profile_dataset  # noqa: E402
+from visualizer import TREND_TOP_N, _trend_periods, render_chart  # noqa: E402
+from chart_data import trend_matrix  # noqa: E402
+
+
+def legacy_line_trend(dataset_name, df_plot, path):
+    """The pre-refactor line chart from generate_graphs, kept verbatim as the reference."""
+    plt.figure(figsize=(8, 4))
+    for d in df_plot["district"].unique():
+        subset = df_plot[df_plot["district"] == d]
+        plt.plot(subset["month"], subset["predicted_efficiency"], marker="o", label=d)
+    plt.title(f"{dataset_name} — Efficiency Trend Over Time")
+    plt.legend()
+    plt.xticks(rotation=45)
+    plt.tight_layout()
+    plt.savefig(path)
+    plt.close()
+
+
+def _plot_frame(source, scale, workdir):
+    spec = detect_dataset(read_csv_header(source), csv_path=source)
+    path = os.path.join(workdir, os.path.basename(source))
+    generate(profile_dataset(source), scale, path)
+    df, _ = read_dataset(path, spec)
+    _, _, df_proc = spec["builder"](df, compact=True)
+    df_plot = df_proc[["district", "month"]].copy()
+    df_plot["predicted_efficiency"] = np.random.default_rng(0).uniform(40, 100, len(df_plot))
+    if isinstance(df_plot["month"].dtype, pd.PeriodDtype):
+        df_plot["month"] = df_plot["month"].dt.to_timestamp()
+    return spec, df_plot
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--scale", type=float, default=100)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--dataset", action="append", help="source CSV name (default: NBW_Drive, Convictions)")
+    parser.add_argument("--keep", help="write the PNGs here instead of a temp folder")
+    args = parser.parse_args()
+    names = args.dataset or ["NBW_Drive", "Convictions"]
+
+    warnings.simplefilter("ignore")  # seaborn/matplotlib deprecation chatter
+    with tempfile.TemporaryDirectory() as workdir:
+        out_dir = args.keep or workdir
+        os.makedirs(out_dir, exist_ok=True)
+        for source in dataset_paths():
+            if os.path.splitext(os.path.basename(source))[0] not in names:
+                continue
+            spec, df_plot = _plot_frame(source, args.scale, workdir)
+            label = spec["graph_label"]
+
+            legacy_path = os.path.join(out_dir, f"{label}_line_trend_legacy.png")
+            legacy_s, _ = best_of(lambda: legacy_line_trend(label, df_plot, legacy_path), args.repeat)
+
+            new_path = os.path.join(out_dir, f"{label}_line_trend.png")
+            prep_s, matrix = best_of(lambda: trend_matrix(df_plot), args.repeat)
+            draw_s, _ = best_of(lambda: render_chart("line_trend", label, matrix, new_path), args.repeat)
+            drawn, period = _trend_periods(matrix)
+
+            districts = df_plot["district"].nunique()
+            print(f"{label} x{args.scale:g}: {len(df_plot):,} rows, {districts} districts, "
+                  f"{df_plot['month'].nunique()} months")
+            print(f"    legacy      {legacy_s * 1000:>9.1f} ms  {len(df_plot):>9,} points  {districts:>4} legend entries"
+                  f"  {os.path.getsize(legacy_path) / 1024:>6.0f} KB")
+            print(f"    pivot+LC    {(prep_s + draw_s) * 1000:>9.1f} ms  {int(drawn.count().sum()):>9,} points  "
+                  f"{min(districts, TREND_TOP_N) + (districts > TREND_TOP_N):>4} legend entries"
+                  f"  {os.path.getsize(new_path) / 1024:>6.0f} KB  (groupby {prep_s * 1000:.1f} ms, draw "
+                  f"{draw_s * 1000:.1f} ms, by {period.lower()})")
+            print(f"    speedup     {legacy_s / (prep_s + draw_s):>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
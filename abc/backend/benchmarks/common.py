@@ -0,0 +1,47 @@
+import glob
+import os
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+# Bundled synthetic CCTNS exports live next to saved_models/ and generated_graphs/.
+DATASET_DIR = os.getenv(
+    "SYNTHETIC_DATA_DIR",
+    os.path.join(os.path.dirname(BACKEND_DIR), "synthetic_cctns_datasets"),
+)
+
+
+def dataset_paths(dataset_dir=DATASET_DIR):
+    """All CSVs in the synthetic dataset folder, sorted by name."""
+    paths = sorted(glob.glob(os.path.join(dataset_dir, "*.csv")))
+    if not paths:
+        raise SystemExit(f"⚠️ No CSV files found in {dataset_dir} (set SYNTHETIC_DATA_DIR)")
+    return paths
+
+
+def best_of(fn, repeat=5):
+    """Best wall-clock time of `repeat` calls, in seconds, and the last return value."""
+    best, value = float("inf"), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        value = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, value
+
+
+def tiled_csv(path, scale, blank_lines=0):
+    """Temp copy of `path` with its data rows repeated `scale` times (and optional ",,," lines). Caller removes it."""
+    with open(path, "r", encoding="utf-8") as handle:
+        header, *rows = handle.read().splitlines()
+    handle = tempfile.NamedTemporaryFile("w", suffix=".csv", delete=False, encoding="utf-8")
+    with handle:
+        handle.write(header + "\n")
+        body = "\n".join(rows) + "\n"
+        for _ in range(scale):
+            handle.write(body)
+        handle.write(("," * header.count(",") + "\n") * blank_lines)
+    return handle.name
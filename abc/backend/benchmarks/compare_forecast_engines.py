@@ -0,0 +1,79 @@
+"""
+Accuracy and latency comparison of the CrimePendency forecast engines.
+
+    python benchmarks/compare_forecast_engines.py [--csv CrimePendency.csv] [--holdout 6] [--json out.json]
+
+The last `--holdout` months of every district are held out, each engine forecasts
+them from the remaining history, and MAE / sMAPE against the actuals are reported
+together with wall-clock latency. Prophet runs with its fitted-model cache disabled
+so the timing reflects a cold fit.
+"""
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from common import DATASET_DIR
+from pendency_forecast import FORECAST_ENGINES, forecast_prophet, forecast_vectorised
+
+
+def _score(forecast: dict, actuals: pd.DataFrame) -> dict:
+    predicted = pd.DataFrame(
+        [(district, rec["ds"], rec["yhat"]) for district, recs in forecast.items() for rec in recs],
+        columns=["district", "ds", "yhat"],
+    )
+    predicted["ds"] = pd.to_datetime(predicted["ds"])
+    joined = predicted.merge(actuals, on=["district", "ds"], how="inner")
+    if joined.empty:
+        return {"mae": None, "smape": None, "points": 0}
+
+    error = joined["yhat"] - joined["y"]
+    denom = (joined["yhat"].abs() + joined["y"].abs()).replace(0, np.nan)
+    return {
+        "mae": round(float(error.abs().mean()), 4),
+        "smape": round(float((2 * error.abs() / denom).mean() * 100), 4),
+        "points": int(len(joined)),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--csv", default=os.path.join(DATASET_DIR, "CrimePendency.csv"))
+    parser.add_argument("--holdout", type=int, default=6, help="months held out per district")
+    parser.add_argument("--engines", nargs="+", default=list(FORECAST_ENGINES), choices=FORECAST_ENGINES)
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args()
+
+    df = pd.read_csv(args.csv)
+    month = pd.to_datetime(df["month"], format="%Y-%m")
+    cutoff = month.groupby(df["district"]).transform("max") - pd.DateOffset(months=args.holdout)
+    train = df[month <= cutoff]
+    actuals = pd.DataFrame({"district": df["district"], "ds": month, "y": df["pendency_percent"]})[month > cutoff]
+
+    results = []
+    for engine in args.engines:
+        start = time.perf_counter()
+        if engine == "prophet":
+            forecast = forecast_prophet(train, periods=args.holdout, freq="MS", use_cache=False)
+        else:
+            forecast = forecast_vectorised(train, periods=args.holdout, freq="MS", engine=engine)
+        latency = time.perf_counter() - start
+        results.append({"engine": engine, "latency_s": round(latency, 4), "districts": len(forecast),
+                        **_score(forecast, actuals)})
+
+    print(f"{'engine':<16}{'latency s':>12}{'districts':>11}{'MAE':>10}{'sMAPE %':>10}")
+    for row in results:
+        print(f"{row['engine']:<16}{row['latency_s']:>12.3f}{row['districts']:>11}"
+              f"{row['mae'] if row['mae'] is not None else 'n/a':>10}"
+              f"{row['smape'] if row['smape'] is not None else 'n/a':>10}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as handle:
+            json.dump({"csv": args.csv, "holdout_months": args.holdout, "results": results}, handle, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,251 @@
+"""
+Scale the bundled synthetic CCTNS CSVs up to state-wide, multi-year sizes.
+
+    python benchmarks/scale_datasets.py [--scale 10 100 1000] [--out-dir scaled_datasets] [--malformed 0.001]
+    SYNTHETIC_DATA_DIR=scaled_datasets/x100 python benchmarks/bench_pipeline.py --scale 1
+
+Each source CSV is profiled once: its districts, its month range and, per district,
+the rows for each calendar month. A dataset at scale N gets about N times the rows,
+split between a longer history (N ** (1/3) times the months, ending at the source's
+last month) and more districts (the rest). Every synthetic district follows one
+source district. Each (district, month) row is resampled from that district's rows
+for the same calendar month, so the seasonality and the relations between columns
+(totals, pending balances, convictions vs trials) survive. Counts are then scaled by
+a per-district size factor and a little per-row jitter. Percentages are left as
+they are, and dates are moved into the row's month.
+
+Generation is vectorised per block of months and streamed to disk, so 1000x runs
+don't need the whole frame in memory. --malformed injects that fraction of broken
+rows, the kinds csv_ingest rejects: blank, truncated, non-numeric, missing value and
+bad month. Counts per kind go to manifest.json next to the CSVs.
+"""
+import argparse
+import csv
+import io
+import json
+import os
+import re
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa  # type: ignore
+    import pyarrow.compute as pc  # type: ignore
+except ImportError:  # pragma: no cover - optional dependency
+    pa = None
+
+from common import dataset_paths
+from dataset_registry import detect_dataset, read_csv_header
+from geo_mapper import _DISTRICT_GEO_REGISTRY
+
+MALFORMED_KINDS = ("blank", "truncated", "not_a_number", "missing_value", "bad_month")
+_DATE_RE = re.compile(r"^\d{4}-\d{2}-\d{2}$")
+
+
+# ---------------------- PROFILE ----------------------
+
+def profile_dataset(csv_path: str) -> dict:
+    """What the generator keeps from a source CSV: columns, districts, months and row pools."""
+    df = pd.read_csv(csv_path, keep_default_na=False, na_values=[""])
+    months = pd.PeriodIndex(df["month"], freq="M")
+    district_codes, districts = pd.factorize(df["district"])
+
+    numeric = [c for c in df.columns if pd.api.types.is_numeric_dtype(df[c])]
+    decimals = {
+        col: int(df[col].astype(str).str.partition(".")[2].str.len().max()) if df[col].dtype.kind == "f" else 0
+        for col in numeric
+    }
+    # Corruptions target the numeric columns csv_ingest validates for this dataset.
+    spec = detect_dataset(read_csv_header(csv_path), csv_path=csv_path)
+    checked = [col for col, kind in spec["schema"].items() if kind in ("int", "float")] if spec else numeric
+    sample = df.drop(columns=numeric + ["district", "month"]).dropna().head(50)
+    dates = [col for col in sample.columns if len(sample) and sample[col].astype(str).str.match(_DATE_RE).all()]
+
+    # Rows sorted by (district, calendar month); pools[d, m] = (start, count) into that order.
+    # A district with no row for some calendar month samples from all of its rows instead.
+    order = np.lexsort((months.month.to_numpy() - 1, district_codes))
+    key = district_codes[order] * 12 + (months.month.to_numpy()[order] - 1)
+    cells = np.arange(len(districts) * 12)
+    start = np.searchsorted(key, cells, side="left")
+    count = np.searchsorted(key, cells, side="right") - start
+    by_district = np.searchsorted(district_codes[order], np.arange(len(districts) + 1))
+    empty = count == 0
+    start[empty] = by_district[cells[empty] // 12]
+    count[empty] = np.diff(by_district)[cells[empty] // 12]
+
+    return {
+        "name": os.path.splitext(os.path.basename(csv_path))[0],
+        "columns": list(df.columns),
+        "values": {col: df[col].to_numpy()[order] for col in df.columns},
+        "districts": list(districts),
+        "first_month": months.min(),
+        "last_month": months.max(),
+        "pool_start": start.reshape(len(districts), 12),
+        "pool_count": count.reshape(len(districts), 12),
+        "numeric": numeric,
+        "checked": checked,
+        "decimals": decimals,
+        "ratios": [col for col in numeric if "percent" in col],
+        "dates": dates,
+    }
+
+
+def _district_names(source, count):
+    """Source districts first, then the other mapped Odisha districts, then numbered copies."""
+    names = list(source) + [n.title() for n in _DISTRICT_GEO_REGISTRY if n.title() not in set(source)]
+    copies = (count + len(names) - 1) // len(names)
+    names = names + [f"{name}-{i}" for i in range(2, copies + 1) for name in names]
+    return names[:count]
+
+
+def layout(profile: dict, scale: float, history=None):
+    """(district count, months) for a scale factor: history grows by scale ** (1/3), districts by the rest."""
+    source_months = (profile["last_month"] - profile["first_month"]).n + 1
+    history = history or max(1, round(scale ** (1 / 3)))
+    districts = max(1, round(len(profile["districts"]) * scale / history))
+    months = pd.period_range(end=profile["last_month"], periods=source_months * history, freq="M")
+    return districts, months
+
+
+# ---------------------- GENERATE ----------------------
+
+def _block(profile, template, size, months, rng):
+    """Rows for `months` x every synthetic district, month-major like the source exports."""
+    n_districts = len(template)
+    district = np.tile(np.arange(n_districts), len(months))
+    month_str = np.repeat(months.astype(str).to_numpy(), n_districts)
+    src_district = template[district]
+    moy = np.repeat(months.month.to_numpy() - 1, n_districts)
+    start = profile["pool_start"][src_district, moy]
+    rows = start + (rng.random(len(district)) * profile["pool_count"][src_district, moy]).astype(np.int64)
+
+    factor = size[district] * rng.lognormal(0.0, 0.1, size=len(district))
+    out = {}
+    for col in profile["columns"]:
+        if col == "district":
+            out[col] = profile["names"][district]
+            continue
+        if col == "month":
+            out[col] = month_str
+            continue
+        values = profile["values"][col][rows]
+        if col in profile["numeric"] and col not in profile["ratios"]:
+            scaled = np.round(values * factor, profile["decimals"][col])
+            values = scaled.astype(np.int64) if profile["decimals"][col] == 0 else scaled
+        elif col in profile["dates"]:
+            days = pd.Series(values, dtype="str").str.slice(8, 10).clip(upper="28")
+            values = np.where(pd.isna(values), None, pd.Series(month_str) + "-" + days)
+        out[col] = values
+    return pd.DataFrame(out, columns=profile["columns"])
+
+
+def _to_csv(block):
+    """
+    Header-less CSV text for a block, quoted only where needed like the source exports.
+    With pyarrow the lines are joined column-wise in Arrow, several times faster than to_csv.
+    """
+    if pa is None:
+        return block.to_csv(index=False, header=False, lineterminator="\n")
+    columns = []
+    for column in pa.Table.from_pandas(block, preserve_index=False).columns:
+        text = pc.cast(column, pa.string())
+        if pa.types.is_string(column.type) or pa.types.is_large_string(column.type):
+            needs_quotes = pc.match_substring_regex(text, '[",\n]')
+            if pc.any(needs_quotes).as_py():
+                quoted = pc.binary_join_element_wise('"', pc.replace_substring(text, '"', '""'), '"', "")
+                text = pc.if_else(needs_quotes, quoted, text)
+        elif pa.types.is_floating(column.type):
+            # Arrow writes 39.0 as "39"; keep the "39.0" pandas (and the source files) use.
+            whole = pc.invert(pc.match_substring_regex(text, "[.en]"))
+            text = pc.if_else(whole, pc.binary_join_element_wise(text, ".0", ""), text)
+        columns.append(pc.fill_null(text, ""))
+    lines = pc.binary_join_element_wise(*columns, ",")
+    return "\n".join(lines.to_numpy(zero_copy_only=False).tolist()) + "\n"
+
+
+def _break_lines(lines, positions, kinds, profile, rng):
+    """Corrupt the CSV lines at `positions` in place (csv-parsed, so quoted commas survive)."""
+    columns = profile["columns"]
+    numeric = [columns.index(c) for c in profile["checked"]] or [columns.index("month")]
+    for pos, kind in zip(positions, kinds):
+        fields = next(csv.reader([lines[pos]]))
+        if kind == "blank":
+            fields = [""] * len(columns)
+        elif kind == "truncated":
+            # Cut before the last validated column, so either engine has to reject it.
+            fields = fields[: max(1, min(len(fields) // 2, max(numeric)))]
+        elif kind == "not_a_number":
+            fields[numeric[rng.integers(len(numeric))]] = "n/a"
+        elif kind == "missing_value":
+            fields[numeric[rng.integers(len(numeric))]] = ""
+        elif kind == "bad_month":
+            fields[columns.index("month")] = fields[columns.index("month")][:5] + "13"
+        buffer = io.StringIO()
+        csv.writer(buffer, lineterminator="").writerow(fields)
+        lines[pos] = buffer.getvalue()
+
+
+def generate(profile: dict, scale: float, path: str, seed=0, malformed=0.0, history=None, chunk_rows=200_000):
+    """Write a scaled copy of the profiled dataset to `path`. Returns {"rows", "malformed": {kind: n}}."""
+    rng = np.random.default_rng(seed)
+    n_districts, months = layout(profile, scale, history)
+    profile = {**profile, "names": np.asarray(_district_names(profile["districts"], n_districts), dtype=object)}
+    template = np.arange(n_districts) % len(profile["districts"])
+    size = np.where(np.arange(n_districts) < len(profile["districts"]), 1.0,
+                    rng.lognormal(0.0, 0.35, size=n_districts))
+    injected = dict.fromkeys(MALFORMED_KINDS, 0)
+    block_months = max(1, chunk_rows // n_districts)
+
+    rows = 0
+    with open(path, "w", encoding="utf-8", newline="") as handle:
+        handle.write(",".join(profile["columns"]) + "\n")
+        for first in range(0, len(months), block_months):
+            block = _block(profile, template, size, months[first:first + block_months], rng)
+            text = _to_csv(block)
+            broken = rng.binomial(len(block), malformed) if malformed else 0
+            if broken:
+                lines = text.split("\n")
+                positions = rng.choice(len(block), size=broken, replace=False)
+                kinds = rng.choice(MALFORMED_KINDS, size=broken)
+                _break_lines(lines, positions, kinds, profile, rng)
+                text = "\n".join(lines)
+                for kind in kinds:
+                    injected[kind] += 1
+            handle.write(text)
+            rows += len(block)
+    return {"rows": rows, "districts": n_districts, "months": len(months), "malformed": injected}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--scale", type=float, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--out-dir", default="scaled_datasets", help="gets one x<scale>/ folder per scale")
+    parser.add_argument("--dataset", action="append", help="only this source CSV name, e.g. NBW_Drive (repeatable)")
+    parser.add_argument("--history", type=int, help="history multiplier (default: scale ** (1/3))")
+    parser.add_argument("--malformed", type=float, default=0.0, help="fraction of rows to break")
+    parser.add_argument("--chunk-rows", type=int, default=200_000, help="rows generated per block")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    profiles = [profile_dataset(path) for path in dataset_paths()]
+    if args.dataset:
+        profiles = [p for p in profiles if p["name"] in args.dataset]
+
+    for scale in args.scale:
+        out_dir = os.path.join(args.out_dir, f"x{scale:g}")
+        os.makedirs(out_dir, exist_ok=True)
+        manifest = {"scale": scale, "seed": args.seed, "malformed_rate": args.malformed, "datasets": {}}
+        for i, profile in enumerate(profiles):
+            path = os.path.join(out_dir, f"{profile['name']}.csv")
+            stats = generate(profile, scale, path, seed=args.seed + i, malformed=args.malformed,
+                             history=args.history, chunk_rows=args.chunk_rows)
+            manifest["datasets"][profile["name"]] = stats
+            print(f"✅ {path}: {stats['rows']:,} rows ({stats['districts']} districts x {stats['months']} months"
+                  f", {sum(stats['malformed'].values())} malformed)")
+        with open(os.path.join(out_dir, "manifest.json"), "w", encoding="utf-8") as handle:
+            json.dump(manifest, handle, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+"""
+Chart data as compact JSON, for clients that draw the charts themselves.
+
+Built from the chart payloads each prediction puts in the graph store, with
+numpy/pandas only. The payload is bounded however many rows were uploaded:
+
+    bar_chart   mean predicted efficiency per district
+    line_trend  per-district monthly means, downsampled with LTTB to `points` each
+                (fewer when the districts together would pass CHART_DATA_MAX_SERIES_POINTS)
+    scatter     actual vs predicted, an even sample of at most `points` pairs
+    histogram   `bins` bin counts and edges
+    heatmap     the correlation matrix
+"""
+import functools
+import os
+
+import numpy as np  # type: ignore
+import pandas as pd  # type: ignore
+
+import graph_store
+
+# ⚙️ Defaults and upper limits for the points per series and the histogram bins.
+CHART_DATA_POINTS = int(os.getenv("CHART_DATA_POINTS", "200"))
+CHART_DATA_MAX_POINTS = int(os.getenv("CHART_DATA_MAX_POINTS", "2000"))
+CHART_DATA_BINS = int(os.getenv("CHART_DATA_BINS", "20"))
+CHART_DATA_MAX_BINS = int(os.getenv("CHART_DATA_MAX_BINS", "200"))
+# ⚙️ Cap on the line-trend points across all districts; many districts get fewer points each.
+CHART_DATA_MAX_SERIES_POINTS = int(os.getenv("CHART_DATA_MAX_SERIES_POINTS", "10000"))
+
+# Bump when a summariser or the payload shape changes: it is part of the data ETag.
+CHART_DATA_SCHEMA_VERSION = "1"
+
+_DECIMALS = 4
+
+
+def lttb(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """
+    Largest-Triangle-Three-Buckets: indices of `threshold` points that keep the
+    shape of the series (first and last point always kept). x must be sorted.
+    """
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+    every = (n - 2) / (threshold - 2)
+    edges = np.floor(np.arange(threshold - 1) * every).astype(np.int64) + 1
+    edges[-1] = n - 1
+    keep = np.empty(threshold, dtype=np.int64)
+    keep[0], keep[-1] = 0, n - 1
+    a = 0
+    for i in range(threshold - 2):
+        start, end = edges[i], edges[i + 1]
+        # Next bucket's average (just the last point for the final bucket).
+        next_end = edges[i + 2] if i + 2 < len(edges) else n
+        avg_x, avg_y = x[end:next_end].mean(), y[end:next_end].mean()
+        area = np.abs((x[a] - avg_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (avg_y - y[a]))
+        a = start + int(np.argmax(area))
+        keep[i + 1] = a
+    return keep
+
+
+def _floats(values) -> list:
+    """Rounded floats with NaN as None, ready for JSON."""
+    values = np.round(np.asarray(values, dtype=np.float64), _DECIMALS)
+    return [None if np.isnan(v) else float(v) for v in values]
+
+
+def _bar_chart(data: pd.DataFrame, points, bins) -> dict:
+    means = data.groupby("district", sort=True)["predicted_efficiency"].mean()
+    return {"districts": means.index.astype(str).tolist(), "mean_predicted_efficiency": _floats(means)}
+
+
+def trend_matrix(data: pd.DataFrame) -> pd.DataFrame:
+    """
+    Month × district matrix of mean predicted efficiency, from one groupby (the trend
+    charts' payload). Frames that already are one (and the district / month / predicted
+    rows older stores hold) are both accepted.
+    """
+    if "district" not in data.columns:
+        return data
+    month = pd.to_datetime(data["month"]).dt.to_period("M").dt.to_timestamp()
+    return (
+        data.assign(month=month)
+        .groupby(["month", "district"], sort=True)["predicted_efficiency"].mean()
+        .unstack("district")
+    )
+
+
+def _line_trend(data: pd.DataFrame, points, bins) -> dict:
+    matrix = trend_matrix(data)
+    months = pd.DatetimeIndex(matrix.index)
+    codes = (months.year * 12 + months.month - 1).to_numpy(np.float64)
+    values = matrix.to_numpy(np.float64)
+
+    # `points` per district, but never more than CHART_DATA_MAX_SERIES_POINTS in total.
+    points = max(3, min(points, CHART_DATA_MAX_SERIES_POINTS // max(matrix.shape[1], 1)))
+    series = []
+    for i, district in enumerate(matrix.columns):
+        present = ~np.isnan(values[:, i])
+        series_codes, series_values = codes[present], values[present, i]
+        keep = lttb(series_codes, series_values, points)
+        series.append({
+            "district": str(district),
+            "months": [f"{code // 12:04d}-{code % 12 + 1:02d}" for code in series_codes[keep].astype(int).tolist()],
+            "predicted_efficiency": _floats(series_values[keep]),
+            "points": len(series_values),
+        })
+    return {"series": series}
+
+
+def _scatter(data: pd.DataFrame, points, bins) -> dict:
+    keep = np.unique(np.linspace(0, len(data) - 1, min(points, len(data))).astype(np.int64)) if len(data) else []
+    return {
+        "actual": _floats(data["target_efficiency"].to_numpy()[keep]),
+        "predicted": _floats(data["predicted_efficiency"].to_numpy()[keep]),
+        "points": len(data),
+    }
+
+
+def _histogram(data: pd.DataFrame, points, bins) -> dict:
+    values = data["predicted_efficiency"].to_numpy(np.float64)
+    counts, edges = np.histogram(values[np.isfinite(values)], bins=bins)
+    return {"counts": counts.tolist(), "edges": _floats(edges)}
+
+
+def _heatmap(data: pd.DataFrame, points, bins) -> dict:
+    return {"columns": [str(c) for c in data.columns], "values": [_floats(row) for row in data.to_numpy()]}
+
+
+# chart → summariser(payload, points, bins); the charts visualizer.CHARTS draws.
+SUMMARISERS = {
+    "bar_chart": _bar_chart,
+    "line_trend": _line_trend,
+    "scatter": _scatter,
+    "histogram": _histogram,
+    "heatmap": _heatmap,
+}
+
+
+@functools.lru_cache(maxsize=64)
+def _summarise(folder: str, points: int, bins: int):
+    # Folder names are derived from their charts' content, so they are safe cache keys.
+    stored = graph_store.load_payloads(folder)
+    if stored is None:
+        return None
+    return {
+        "title": stored["title"],
+        "charts": {chart: SUMMARISERS[chart](payload, points, bins) for chart, payload in stored["charts"].items()},
+    }
+
+
+def chart_data(folder: str, points: int = CHART_DATA_POINTS, bins: int = CHART_DATA_BINS):
+    """
+    {"folder", "title", "points", "bins", "charts": {chart: data}} for a prediction's
+    graph folder, or None when the folder has no stored chart data.
+    """
+    summary = _summarise(folder, points, bins)
+    if summary is None:
+        return None
+    return {"folder": folder, "title": summary["title"], "points": points, "bins": bins, "charts": summary["charts"]}
@@ -0,0 +1,321 @@
+"""
+Compact, array-backed copies of the saved sklearn models for a pure-NumPy inference path.
+
+    python compact_models.py [--model-dir ../saved_models] [--rows 2000]
+
+compiles every supported model in the registry to saved_models/compact/<name>.npz and
+checks it against model.predict. Serving picks the NumPy path with
+INFERENCE_BACKEND=numpy; models that can't be compiled keep using sklearn.
+"""
+import argparse
+import os
+import threading
+
+import numpy as np  # type: ignore
+
+from model_registry import MODEL_DIR, MODEL_REGISTRY, load_models, model_version
+
+# ⚙️ "sklearn" calls estimator.predict; "numpy" evaluates the compiled arrays.
+INFERENCE_BACKEND = os.getenv("INFERENCE_BACKEND", "sklearn").lower()
+COMPACT_DIRNAME = "compact"
+TREE_ROW_BLOCK = 65536  # rows evaluated at once through a tree ensemble
+# Bump when the exported arrays change; older exports are recompiled on load.
+COMPACT_FORMAT = 2
+
+_compiled = {}  # model name → (model version, CompactModel or None)
+_lock = threading.Lock()
+
+
+class UnsupportedModel(ValueError):
+    pass
+
+
+# ---------------------- COMPILE ----------------------
+
+def _linear_arrays(model, scale=None, offset=None):
+    coef = np.atleast_2d(np.asarray(model.coef_, dtype=np.float64))
+    intercept = np.atleast_1d(np.asarray(model.intercept_, dtype=np.float64))
+    if scale is not None:
+        # Fold a StandardScaler in front of the model: ((x - mean) / std) · w = x · (w / std) - mean · (w / std)
+        coef = coef / scale
+        intercept = intercept - coef @ offset
+    return {"coef": coef, "intercept": intercept}
+
+
+def _flatten_trees(trees, scale=None):
+    """
+    Concatenate sklearn tree_ structures into flat node arrays with per-tree root offsets.
+    missing_left is sklearn's per-node NaN routing (learned, or the majority child when
+    the tree saw no NaN for that split).
+    """
+    left, right, feature, threshold, missing_left, value, roots = [], [], [], [], [], [], []
+    offset = 0
+    for tree in trees:
+        t = tree.tree_
+        is_leaf = t.children_left == -1
+        left.append(np.where(is_leaf, -1, t.children_left + offset))
+        right.append(np.where(is_leaf, -1, t.children_right + offset))
+        feature.append(np.where(is_leaf, 0, t.feature))
+        threshold.append(t.threshold)
+        missing_left.append(t.missing_go_to_left)
+        node_values = t.value.reshape(t.node_count, -1)
+        value.append(node_values * scale if scale is not None else node_values)
+        roots.append(offset)
+        offset += t.node_count
+    return {
+        "left": np.concatenate(left).astype(np.int32),
+        "right": np.concatenate(right).astype(np.int32),
+        "feature": np.concatenate(feature).astype(np.int32),
+        "threshold": np.concatenate(threshold).astype(np.float64),
+        "missing_left": np.concatenate(missing_left).astype(bool),
+        "value": np.concatenate(value).astype(np.float64),
+        "roots": np.asarray(roots, dtype=np.int32),
+    }
+
+
+def compile_model(model) -> "CompactModel":
+    """Compile a fitted estimator into a CompactModel; raises UnsupportedModel otherwise."""
+    from sklearn.pipeline import Pipeline
+    from sklearn.preprocessing import StandardScaler
+    from sklearn.tree import BaseDecisionTree
+    from sklearn.ensemble import (
+        ExtraTreesClassifier, ExtraTreesRegressor, GradientBoostingRegressor,
+        RandomForestClassifier, RandomForestRegressor,
+    )
+    forests = (RandomForestRegressor, RandomForestClassifier, ExtraTreesRegressor, ExtraTreesClassifier)
+
+    names = getattr(model, "feature_names_in_", None)
+    scale = offset = None
+    if isinstance(model, Pipeline):
+        *head, (_, model) = model.steps
+        if len(head) > 1 or (head and not isinstance(head[0][1], StandardScaler)):
+            raise UnsupportedModel("only StandardScaler → estimator pipelines can be compiled")
+        if head:
+            scaler = head[0][1]
+            scale = scaler.scale_ if scaler.with_std else np.ones(scaler.n_features_in_)
+            offset = scaler.mean_ if scaler.with_mean else np.zeros(scaler.n_features_in_)
+    if scale is not None and not hasattr(model, "coef_"):
+        raise UnsupportedModel("a scaler can only be folded into linear models")
+
+    classes = getattr(model, "classes_", None)
+    arrays = {"n_features": np.asarray(model.n_features_in_)}
+    if names is not None:
+        arrays["feature_names"] = np.asarray(names, dtype=str)
+    if classes is not None:
+        arrays["classes"] = np.asarray(classes) if np.asarray(classes).dtype != object else np.asarray(classes, dtype=str)
+
+    if hasattr(model, "coef_") and hasattr(model, "intercept_"):
+        kind = "linear_classifier" if classes is not None else "linear"
+        arrays.update(_linear_arrays(model, scale, offset))
+    elif isinstance(model, BaseDecisionTree):
+        kind = "tree_classifier" if classes is not None else "tree"
+        arrays.update(_flatten_trees([model]))
+    elif isinstance(model, forests):
+        kind = "tree_classifier" if classes is not None else "tree"
+        arrays.update(_flatten_trees(model.estimators_))
+    elif isinstance(model, GradientBoostingRegressor):
+        init = model.init_
+        if init == "zero":
+            baseline = 0.0
+        elif hasattr(init, "constant_"):
+            baseline = float(np.ravel(init.constant_)[0])
+        else:
+            raise UnsupportedModel("gradient boosting with a custom init estimator")
+        kind = "boosted"
+        arrays.update(_flatten_trees(model.estimators_[:, 0], scale=model.learning_rate))
+        arrays["baseline"] = np.asarray(baseline)
+    else:
+        raise UnsupportedModel(f"{type(model).__name__} has no compact form")
+
+    if classes is not None and kind == "tree_classifier" and getattr(model, "n_outputs_", 1) != 1:
+        raise UnsupportedModel("multi-output classifiers")
+    arrays["kind"] = np.asarray(kind)
+    return CompactModel(arrays)
+
+
+# ---------------------- PREDICT ----------------------
+
+class CompactModel:
+    """Pure-NumPy predictor over the arrays produced by compile_model."""
+
+    def __init__(self, arrays: dict):
+        self.arrays = arrays
+        self.kind = str(arrays["kind"])
+        self.n_features = int(arrays["n_features"])
+        self.feature_names = list(arrays["feature_names"]) if "feature_names" in arrays else None
+        self.classes = arrays.get("classes")
+
+    def _matrix(self, X):
+        if hasattr(X, "columns"):
+            if self.feature_names is not None:
+                X = X[self.feature_names]
+            X = X.to_numpy(dtype=np.float64)
+        X = np.asarray(X, dtype=np.float64)
+        if X.ndim != 2 or X.shape[1] != self.n_features:
+            raise ValueError(f"expected {self.n_features} features, got shape {X.shape}")
+        return X
+
+    def _tree_sum(self, X):
+        a = self.arrays
+        left, right, feature, threshold, roots = a["left"], a["right"], a["feature"], a["threshold"], a["roots"]
+        missing_left = a["missing_left"]
+        X = X.astype(np.float32)  # sklearn trees split float32 inputs against float64 thresholds
+        total = np.empty((len(X), a["value"].shape[1]), dtype=np.float64)
+
+        for start in range(0, len(X), TREE_ROW_BLOCK):
+            block = X[start:start + TREE_ROW_BLOCK]
+            rows = np.arange(len(block))[:, None]
+            node = np.broadcast_to(roots, (len(block), len(roots))).copy()
+            while True:
+                child_left = left[node]
+                internal = child_left != -1
+                if not internal.any():
+                    break
+                x = block[rows, feature[node]]
+                go_left = np.where(np.isnan(x), missing_left[node], x <= threshold[node])
+                node = np.where(internal, np.where(go_left, child_left, right[node]), node)
+            total[start:start + len(block)] = a["value"][node].sum(axis=1)
+        return total
+
+    def predict(self, X):
+        X = self._matrix(X)
+        a = self.arrays
+        if self.kind in ("linear", "linear_classifier"):
+            scores = X @ a["coef"].T + a["intercept"]
+            if self.kind == "linear":
+                return scores.ravel() if scores.shape[1] == 1 else scores
+            if scores.shape[1] == 1:
+                return self.classes[(scores.ravel() > 0).astype(int)]
+            return self.classes[scores.argmax(axis=1)]
+
+        totals = self._tree_sum(X)
+        if self.kind == "boosted":
+            return totals.ravel() + float(a["baseline"])
+        if self.kind == "tree_classifier":
+            return self.classes[totals.argmax(axis=1)]
+        return (totals / len(a["roots"])).ravel() if totals.shape[1] == 1 else totals / len(a["roots"])
+
+
+# ---------------------- EXPORT / LOAD ----------------------
+
+def compact_path(model_dir, name):
+    return os.path.join(model_dir, COMPACT_DIRNAME, f"{name}.npz")
+
+
+def export_model(model_dir, name) -> str:
+    """Compile the registry's current version of `name` and write it next to the artifacts."""
+    compact = compile_model(MODEL_REGISTRY[name])
+    path = compact_path(model_dir, name)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp.npz"
+    np.savez(tmp_path, source_version=np.asarray(model_version(name) or ""),
+             format_version=np.asarray(COMPACT_FORMAT), **compact.arrays)
+    os.replace(tmp_path, path)
+    return path
+
+
+def _load_compact(name, version):
+    """Exported arrays for this model version, compiling in-process if the export is stale or missing."""
+    model_dir = MODEL_REGISTRY.model_dir
+    path = compact_path(model_dir, name) if model_dir else None
+    if path and os.path.exists(path):
+        with np.load(path, allow_pickle=False) as data:
+            arrays = {key: data[key] for key in data.files}
+        current = int(arrays.pop("format_version", 0)) == COMPACT_FORMAT
+        if current and str(arrays.pop("source_version")) == (version or ""):
+            return CompactModel(arrays)
+    try:
+        return compile_model(MODEL_REGISTRY[name])
+    except UnsupportedModel as e:
+        print(f"⚠️ {name} stays on sklearn: {str(e)}")
+        return None
+
+
+def predictor_for(name, backend=None):
+    """
+    Object with .predict for a registry model under the selected inference backend.
+    Falls back to the sklearn estimator when the model can't be compiled.
+    Returns None if the model isn't in the registry.
+    """
+    model = MODEL_REGISTRY.get(name) if name else None
+    if model is None or (backend or INFERENCE_BACKEND) != "numpy":
+        return model
+
+    version = model_version(name)
+    cached = _compiled.get(name)
+    if cached is None or cached[0] != version:
+        with _lock:
+            cached = _compiled.get(name)
+            if cached is None or cached[0] != version:
+                cached = (version, _load_compact(name, version))
+                _compiled[name] = cached
+    return cached[1] or model
+
+
+def _max_diff(expected, actual, rtol, atol) -> float:
+    if expected.dtype.kind in "fc":
+        diff = float(np.max(np.abs(np.asarray(expected, dtype=float) - actual))) if len(expected) else 0.0
+        if not np.allclose(expected, actual, rtol=rtol, atol=atol):
+            raise AssertionError(f"compact predictions differ by up to {diff}")
+        return diff
+    if not np.array_equal(expected, actual):
+        raise AssertionError("compact class predictions differ")
+    return 0.0
+
+
+def _with_nan(X):
+    """The first rows of X with one feature set to NaN in each (row i, feature i)."""
+    n = min(len(X), X.shape[1])
+    if hasattr(X, "iloc"):
+        rows = X.iloc[:n].astype(np.float64)
+        for i in range(n):
+            rows.iat[i, i] = np.nan
+        return rows
+    rows = np.array(X[:n], dtype=np.float64)
+    rows[np.arange(n), np.arange(n)] = np.nan
+    return rows
+
+
+def check_equivalence(model, compact, X, rtol=1e-9, atol=1e-9) -> float:
+    """
+    Max absolute difference between sklearn and compact predictions; raises if not close.
+    Rows with a NaN feature are checked as well when the estimator accepts NaN.
+    """
+    diff = _max_diff(model.predict(X), compact.predict(X), rtol, atol)
+    nan_rows = _with_nan(X)
+    try:
+        expected = model.predict(nan_rows)
+    except ValueError:  # estimator (e.g. linear models) rejects NaN input
+        return diff
+    return max(diff, _max_diff(expected, compact.predict(nan_rows), rtol, atol))
+
+
+def main():
+    import pandas as pd  # type: ignore
+
+    parser = argparse.ArgumentParser(description="Compile saved models for INFERENCE_BACKEND=numpy.")
+    parser.add_argument("--model-dir", default=MODEL_DIR)
+    parser.add_argument("--rows", type=int, default=2000, help="random rows used for the equivalence check")
+    args = parser.parse_args()
+
+    load_models(args.model_dir)
+    rng = np.random.default_rng(0)
+    for name in MODEL_REGISTRY:
+        model = MODEL_REGISTRY[name]
+        if not hasattr(model, "predict"):
+            continue
+        try:
+            path = export_model(args.model_dir, name)
+        except UnsupportedModel as e:
+            print(f"⏭️ {name}: {str(e)}")
+            continue
+        compact = _load_compact(name, model_version(name))
+        X = rng.normal(0, 50, size=(args.rows, compact.n_features))
+        if compact.feature_names is not None:
+            X = pd.DataFrame(X, columns=compact.feature_names)
+        diff = check_equivalence(model, compact, X)
+        print(f"✅ {name} → {path} ({compact.kind}, max |Δ| {diff:.2e})")
+
+
+if __name__ == "__main__":
+    main()
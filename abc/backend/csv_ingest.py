@@ -0,0 +1,255 @@
+"""
+Typed CSV ingestion for the drive datasets.
+
+Every registry entry carries a `schema` (column → "int" / "float" / "month" / "str" /
+"text"). Uploads are read with only those columns and explicit types, through the
+pyarrow CSV reader when it is installed and pandas otherwise:
+
+  - blank rows (",,,,," lines from spreadsheet exports) are dropped before any type
+    conversion, so they can't turn int columns into float/NaN;
+  - rows with a missing or unparsable required value, a malformed month or (with
+    pyarrow) the wrong number of fields are rejected and listed in the ingest report;
+  - whatever survives comes out as int64 / float64 / str, exactly what the feature
+    builders expect.
+
+    df, report = read_dataset("upload.csv", spec)
+    report → {"engine", "rows", "blank_rows", "rejected_rows", "errors": [{"row", "column", "value", "error"}]}
+
+"row" is the 1-based data row (the header doesn't count) with either engine.
+"""
+import functools
+import os
+
+import numpy as np  # type: ignore
+import pandas as pd  # type: ignore
+
+from dataset_registry import read_csv_header
+
+try:
+    import pyarrow as pa  # type: ignore
+    import pyarrow.compute as pc  # type: ignore
+    import pyarrow.csv as pa_csv  # type: ignore
+except ImportError:  # pragma: no cover - optional dependency
+    pa = None
+
+# ⚙️ Parser ("pyarrow" when installed, else "pandas") and how many row errors a report lists.
+CSV_ENGINE = os.getenv("CSV_ENGINE", "pyarrow" if pa is not None else "pandas")
+INGEST_ERROR_LIMIT = int(os.getenv("INGEST_ERROR_LIMIT", "20"))
+
+_ARROW_TYPES = {"int": "int64", "float": "float64", "month": "string", "str": "string", "text": "string"}
+
+
+class IngestError(ValueError):
+    """The upload can't be used at all (missing columns, no valid rows). Carries the report."""
+
+    def __init__(self, message, report=None):
+        super().__init__(message)
+        self.report = report or new_report()
+
+
+def new_report(engine=CSV_ENGINE) -> dict:
+    return {"engine": engine, "rows": 0, "blank_rows": 0, "rejected_rows": 0, "errors": []}
+
+
+def _add_error(report, row, column, value, error):
+    if len(report["errors"]) < INGEST_ERROR_LIMIT:
+        report["errors"].append({"row": row, "column": column, "value": value, "error": error})
+
+
+def resolve_columns(csv_path: str, spec: dict) -> dict:
+    """The spec's schema restricted to the upload: optional "text" columns may be absent."""
+    header = set(read_csv_header(csv_path))
+    schema = spec["schema"]
+    missing = [col for col, kind in schema.items() if kind != "text" and col not in header]
+    if missing:
+        raise IngestError(f"❌ {spec['label']} upload is missing columns: {', '.join(missing)}")
+    return {col: kind for col, kind in schema.items() if col in header}
+
+
+# ---------------------- VALIDATION ----------------------
+
+def _present(values: pd.Series) -> np.ndarray:
+    """True where a cell holds something other than null / whitespace."""
+    mask = values.notna().to_numpy(copy=True)
+    if not pd.api.types.is_numeric_dtype(values):
+        text = values.astype("str").str
+        mask &= (text.len().gt(0) & ~text.isspace()).fillna(False).to_numpy(bool)
+    return mask
+
+
+def _check_month(values: pd.Series):
+    """(invalid mask, values) for "YYYY-MM" months, parsed once per distinct value."""
+    codes, uniques = pd.factorize(values)
+    uniques = pd.Series(uniques, dtype="str")
+    stripped = uniques.str.strip()
+    valid = pd.to_datetime(stripped, format="%Y-%m", errors="coerce").notna().to_numpy()
+    if (stripped != uniques).any():
+        values = values.astype("str").str.strip()
+    return (codes < 0) | ~np.append(valid, False)[codes], values
+
+
+def _coerce(raw: pd.DataFrame, schema: dict, report: dict) -> pd.DataFrame:
+    """
+    Drop blank rows, reject invalid ones and cast to the schema types. `raw` holds
+    either already-typed columns (pyarrow / pandas fast path) or strings, indexed by
+    0-based data-row position in the file (error reports use index + 1).
+    """
+    if len(raw) == 0:
+        return pd.DataFrame({col: pd.Series(dtype=_pandas_type(kind)) for col, kind in schema.items()})
+
+    present = {col: _present(raw[col]) for col in schema}
+    blank = ~np.logical_or.reduce(list(present.values()))
+    report["blank_rows"] += int(blank.sum())
+
+    bad = np.zeros(len(raw), dtype=bool)
+    columns = {}
+    for col, kind in schema.items():
+        values = raw[col]
+        if kind in ("int", "float"):
+            if not pd.api.types.is_numeric_dtype(values):
+                values = pd.to_numeric(values.str.strip(), errors="coerce")
+            array = values.to_numpy()
+            invalid = np.isnan(array) if array.dtype.kind == "f" else np.zeros(len(array), dtype=bool)
+            if kind == "int" and array.dtype.kind == "f":
+                invalid |= np.mod(array, 1, where=~invalid, out=np.zeros(len(array))) != 0
+            columns[col] = array
+        elif kind == "month":
+            invalid, values = _check_month(values)
+            columns[col] = values.astype("str").array
+        else:
+            invalid = ~present[col] if kind == "str" else np.zeros(len(raw), dtype=bool)
+            columns[col] = values.astype("str").array
+
+        invalid &= ~blank
+        for i in np.flatnonzero(invalid)[: max(INGEST_ERROR_LIMIT - len(report["errors"]), 0)]:
+            value = raw[col].iloc[i]
+            error = "missing value" if not present[col][i] else f"not a valid {kind}"
+            _add_error(report, int(raw.index[i]) + 1, col, None if pd.isna(value) else str(value), error)
+        bad |= invalid
+
+    keep = ~(blank | bad)
+    report["rejected_rows"] += int(bad.sum())
+    report["errors"].sort(key=lambda e: (e["row"] is None, e["row"] or 0))
+    report["rows"] += int(keep.sum())
+
+    df = pd.DataFrame(columns, index=raw.index, copy=False)
+    if not keep.all():
+        df = df[keep]
+    casts = {col: _pandas_type(kind) for col, kind in schema.items() if str(df[col].dtype) != _pandas_type(kind)}
+    return df.astype(casts) if casts else df
+
+
+def _pandas_type(kind):
+    return {"int": "int64", "float": "float64"}.get(kind, "str")
+
+
+# ---------------------- ENGINES ----------------------
+
+def _file_positions(positions, skipped):
+    """Parser row positions → data-row positions in the file, counting the dropped malformed lines."""
+    skipped = np.sort(np.asarray(skipped, dtype=np.int64))
+    return positions + np.searchsorted(skipped - np.arange(len(skipped)), positions, side="right")
+
+
+def _arrow_read(csv_path, schema, report, typed):
+    skipped = []
+
+    def on_invalid_row(row):
+        # row.number is the 1-based file line, header included.
+        skipped.append(row.number - 2)
+        _add_error(report, row.number - 1, None, row.text,
+                   f"expected {row.expected_columns} fields, got {row.actual_columns}")
+        report["rejected_rows"] += 1
+        return "skip"
+
+    types = {col: getattr(pa, _ARROW_TYPES[kind] if typed else "string")() for col, kind in schema.items()}
+    reader = pa_csv.open_csv(
+        csv_path,
+        parse_options=pa_csv.ParseOptions(invalid_row_handler=on_invalid_row),
+        convert_options=pa_csv.ConvertOptions(
+            include_columns=list(schema), column_types=types, strings_can_be_null=True,
+        ),
+    )
+    # Streamed batch by batch so blank (all-null) rows are dropped while still in Arrow:
+    # int columns reach pandas as int64 and the whole file is never buffered twice.
+    batches, positions, offset = [], [], 0
+    for batch in reader:
+        filled = functools.reduce(pc.or_, [column.is_valid() for column in batch.columns])
+        kept = np.flatnonzero(filled.to_numpy(zero_copy_only=False))
+        report["blank_rows"] += batch.num_rows - len(kept)
+        batches.append(batch if len(kept) == batch.num_rows else batch.filter(filled))
+        positions.append(kept + offset)
+        offset += batch.num_rows
+    table = pa.Table.from_batches(batches, schema=reader.schema)
+    del batches
+    df = table.to_pandas(split_blocks=True, self_destruct=True)
+    positions = np.concatenate(positions) if positions else np.arange(0)
+    df.index = _file_positions(positions, skipped) if skipped else positions
+    return df
+
+
+def _pandas_read(csv_path, schema, chunksize=None, typed=False):
+    """
+    Yields frames of the schema columns, as strings or (typed=True) with numbers
+    parsed as float64: the whole file, or `chunksize` rows at a time.
+    With usecols pandas doesn't see a line's field count: short lines come through
+    with missing values and are rejected as such, extra fields are ignored.
+    """
+    dtype = {col: "float64" if typed and kind in ("int", "float") else "str" for col, kind in schema.items()}
+    reader = pd.read_csv(csv_path, usecols=list(schema), dtype=dtype, encoding="utf-8-sig",
+                         chunksize=chunksize or None, iterator=True)
+    if not chunksize:
+        yield reader.read()
+        return
+    yield from reader
+
+
+def read_dataset(csv_path: str, spec: dict, engine: str = None):
+    """
+    Read an upload with the spec's schema. Returns (df, report).
+    Raises IngestError when required columns are missing or no valid row is left.
+    """
+    engine = engine or CSV_ENGINE
+    schema = resolve_columns(csv_path, spec)
+    report = new_report(engine)
+
+    if engine == "pyarrow" and pa is not None:
+        try:
+            raw = _arrow_read(csv_path, schema, report, typed=True)
+        except pa.ArrowInvalid:
+            # A value didn't convert: re-read as strings and find the offending rows.
+            report = new_report(engine)
+            raw = _arrow_read(csv_path, schema, report, typed=False)
+    else:
+        report["engine"] = "pandas"
+        try:
+            raw = next(_pandas_read(csv_path, schema, typed=True))
+        except ValueError:
+            report = new_report("pandas")
+            raw = next(_pandas_read(csv_path, schema))
+
+    df = _coerce(raw, schema, report).reset_index(drop=True)
+    if len(df) == 0:
+        raise IngestError(f"❌ No valid rows in {spec['label']} upload", report)
+    return df, report
+
+
+def iter_dataset(csv_path: str, spec: dict, chunksize: int, report: dict = None):
+    """
+    Chunked read_dataset for streaming. Chunks keep the running row index of the
+    file (blank and rejected rows leave gaps); `report` is filled in as chunks go by.
+    """
+    schema = resolve_columns(csv_path, spec)
+    report = report if report is not None else new_report("pandas")
+    report["engine"] = "pandas"
+    for raw in _pandas_read(csv_path, schema, chunksize=chunksize):
+        chunk = _coerce(raw, schema, report)
+        if len(chunk):
+            yield chunk
+
+
+def ingest_summary(report: dict) -> dict:
+    """The part of a report worth returning to the client (None when the upload was clean)."""
+    if not report or not (report["blank_rows"] or report["rejected_rows"]):
+        return None
+    return {key: report[key] for key in ("rows", "blank_rows", "rejected_rows", "errors")}
@@ -0,0 +1,278 @@
+import csv
+from typing import Dict, Iterable, List, Optional
+
+import pandas as pd  # type: ignore
+from feature_builder import (
+    create_conviction_features,
+    create_excise_features,
+    create_firearms_features,
+    create_missing_features,
+    create_nbw_features,
+    create_narcotics_features,
+    create_opg_features,
+    create_preventive_features,
+    create_mining_features,
+)
+
+# Declarative description of every supported drive dataset.
+#
+# Each entry carries:
+#   name          – canonical key used internally
+#   label         – dataset name returned to the client and used on map points
+#   graph_label   – folder prefix / title used by visualizer.generate_graphs
+#   db_label      – dataset_name written into ai_predictions
+#   signature     – columns that must all be present; the first one is the anchor
+#                   column the signature index is keyed on
+#   exclude       – columns that must NOT be present
+#   discriminator – optional (column, keyword) check for datasets whose headers
+#                   are identical (Excise vs OPG)
+#   pipeline      – "model" (feature builder + sklearn model) or "forecast"
+#   builder       – feature_builder function returning (X, features, df_proc)
+#   model_key     – MODEL_REGISTRY key
+#   carry_over    – builder derives a next-month target with groupby("district").shift(-1),
+#                   so streaming must carry each district's last row into the next chunk
+#   postprocess   – optional callable(result_dict) -> result_dict
+#   priority      – tie-breaker when more than one signature matches a header
+#   schema        – column → type for csv_ingest: only the columns the pipeline reads.
+#                   "int" / "float" (required numbers), "month" (YYYY-MM), "str"
+#                   (required text) or "text" (optional free text)
+
+
+def _schema(*ints, floats=(), text=()):
+    schema = {"district": "str", "month": "month"}
+    schema.update({col: "int" for col in ints})
+    schema.update({col: "float" for col in floats})
+    schema.update({col: "text" for col in text})
+    return schema
+
+
+DATASET_REGISTRY: List[Dict] = [
+    {
+        "name": "Convictions",
+        "label": "Convictions",
+        "graph_label": "Convictions",
+        "db_label": "Convictions",
+        "signature": ("ipc_trials", "ipc_convictions", "sll_trials"),
+        "exclude": (),
+        "discriminator": None,
+        "pipeline": "model",
+        "builder": create_conviction_features,
+        "model_key": "conviction_model",
+        "carry_over": False,
+        "postprocess": None,
+        "priority": 1,
+        "schema": _schema("ipc_trials", "ipc_convictions", "ipc_acquitted",
+                          "sll_trials", "sll_convictions", "sll_acquitted", text=("punishment",)),
+    },
+    {
+        "name": "CrimePendency",
+        "label": "CrimePendancy",
+        "graph_label": "CrimePendency",
+        "db_label": "CrimePendency",
+        "signature": ("pendency_percent", "target_close"),
+        "exclude": (),
+        "discriminator": None,
+        "pipeline": "forecast",
+        "builder": None,
+        "model_key": None,
+        "carry_over": False,
+        "postprocess": None,
+        "priority": 2,
+        "schema": _schema(floats=("pendency_percent",)),
+    },
+    {
+        "name": "Excise_Act",
+        "label": "Excise_Act",
+        "graph_label": "Fermented_wash",
+        "db_label": "Excise_Act",
+        "signature": ("details_of_seizure", "cases_registered", "persons_arrested"),
+        "exclude": (),
+        "discriminator": ("details_of_seizure", "fermented wash"),
+        "pipeline": "model",
+        "builder": create_excise_features,
+        "model_key": "excise_efficiency_model",
+        "carry_over": True,
+        "postprocess": None,
+        "priority": 3,
+        "schema": _schema("cases_registered", "persons_arrested"),
+    },
+    {
+        "name": "Firearms_Drive",
+        "label": "Firearms_Drive",
+        "graph_label": "Firearms",
+        "db_label": "Firearms",
+        "signature": ("gun_rifle", "pistol", "ammunition"),
+        "exclude": (),
+        "discriminator": None,
+        "pipeline": "model",
+        "builder": create_firearms_features,
+        "model_key": "firearms_efficiency_model",
+        "carry_over": False,
+        "postprocess": None,
+        "priority": 4,
+        "schema": _schema("cases_registered", "persons_arrested", "gun_rifle", "pistol", "revolver", "mouzer",
+                          "ak47", "slr", "others", "ammunition", "cartridge"),
+    },
+    {
+        "name": "MissingPersons_Drive",
+        "label": "MissingPersons_Drive",
+        "graph_label": "MissingPersons",
+        "db_label": "MissingPersons",
+        "signature": ("missing_boys_start", "traced_boys"),
+        "exclude": (),
+        "discriminator": None,
+        "pipeline": "model",
+        "builder": create_missing_features,
+        "model_key": "missing_persons_efficiency_model",
+        "carry_over": True,
+        "postprocess": None,
+        "priority": 5,
+        "schema": _schema("missing_boys_start", "missing_boys_during", "traced_boys",
+                          "missing_girls_start", "missing_girls_during", "traced_girls",
+                          "missing_men_start", "missing_men_during", "traced_men",
+                          "missing_women_start", "missing_women_during", "traced_women"),
+    },
+    {
+        "name": "NBW_Drive",
+        "label": "NBW_Drive",
+        "graph_label": "NBW",
+        "db_label": "NBW",
+        "signature": ("nbw_pending_start", "nbw_received", "nbw_executed_drive"),
+        "exclude": ("ganja_kg",),
+        "discriminator": None,
+        "pipeline": "model",
+        "builder": create_nbw_features,
+        "model_key": "nbw_efficiency_model",
+        "carry_over": True,
+        "postprocess": None,
+        "priority": 6,
+        "schema": _schema("nbw_pending_start", "nbw_received", "nbw_executed_drive",
+                          "nbw_disposed_other", "nbw_total_disposed", "nbw_pending_end"),
+    },
+    {
+        "name": "Narcotics_Drive",
+        "label": "Narcotics_Drive",
+        "graph_label": "Narcotics",
+        "db_label": "Narcotics",
+        "signature": ("ganja_kg", "brownsugar_g", "cough_syrup_bottles"),
+        "exclude": (),
+        "discriminator": None,
+        "pipeline": "model",
+        "builder": create_narcotics_features,
+        "model_key": "narcotics_efficiency_model",
+        "carry_over": True,
+        "postprocess": None,
+        "priority": 7,
+        "schema": _schema("cases_registered", "persons_arrested", "vehicles", "ganja_plants_destroyed", "bhanga",
+                          "cough_syrup_bottles", "cash_recovered", floats=("ganja_kg", "brownsugar_g", "opium")),
+    },
+    {
+        "name": "OPG_Act",
+        "label": "OPG_Act",
+        "graph_label": "OPG_Act",
+        "db_label": "OPG_Act",
+        "signature": ("details_of_seizure",),
+        "exclude": (),
+        "discriminator": ("details_of_seizure", "mobile"),
+        "pipeline": "model",
+        "builder": create_opg_features,
+        "model_key": "opg_efficiency_model",
+        "carry_over": True,
+        "postprocess": None,
+        "priority": 8,
+        "schema": _schema("cases_registered", "persons_arrested", text=("details_of_seizure",)),
+    },
+    {
+        "name": "PreventiveMeasures",
+        "label": "PreventiveMeasures",
+        "graph_label": "PreventiveMeasures",
+        "db_label": "PreventiveMeasures",
+        "signature": ("notice_129_bnss", "bound_126_bnss"),
+        "exclude": (),
+        "discriminator": None,
+        "pipeline": "model",
+        "builder": create_preventive_features,
+        "model_key": "preventive_efficiency_model",
+        "carry_over": True,
+        "postprocess": None,
+        "priority": 9,
+        "schema": _schema("notice_129_bnss", "bound_129_bnss", "notice_126_bnss", "bound_126_bnss",
+                          "nbw_executed", "chanda_cases_registered", "chanda_persons_arrested",
+                          "blockings_border_sealed", "organized_crime_action"),
+    },
+    {
+        "name": "SandMining",
+        "label": "SandMining",
+        "graph_label": "Sand_Mining",
+        "db_label": "Sand_Mining",
+        "signature": ("vehicles_seized", "notices_served"),
+        "exclude": (),
+        "discriminator": None,
+        "pipeline": "model",
+        "builder": create_mining_features,
+        "model_key": "sand_mining_efficiency_model",
+        "carry_over": True,
+        "postprocess": None,
+        "priority": 10,
+        "schema": _schema("cases_registered", "vehicles_seized", "persons_arrested", "notices_served"),
+    },
+]
+
+DATASETS_BY_NAME: Dict[str, Dict] = {spec["name"]: spec for spec in DATASET_REGISTRY}
+
+# Anchor column → candidate specs, sorted by priority. Built once at import so
+# detection only walks the uploaded header, never the whole registry.
+_SIGNATURE_INDEX: Dict[str, List[Dict]] = {}
+for _spec in DATASET_REGISTRY:
+    _SIGNATURE_INDEX.setdefault(_spec["signature"][0], []).append(_spec)
+for _candidates in _SIGNATURE_INDEX.values():
+    _candidates.sort(key=lambda s: s["priority"])
+
+
+def read_csv_header(csv_path: str) -> List[str]:
+    """Return the column names of a CSV without parsing its body."""
+    with open(csv_path, newline="", encoding="utf-8-sig") as handle:
+        header = next(csv.reader(handle), [])
+    return [col.strip() for col in header]
+
+
+def _leading_values(csv_path: Optional[str], df: Optional[pd.DataFrame], column: str, max_rows: int = 50):
+    """Lower-cased non-blank values of a column among the first rows of a frame or CSV."""
+    if df is None:
+        df = pd.read_csv(csv_path, usecols=[column], nrows=max_rows)
+    values = df[column].head(max_rows).dropna().astype(str).str.strip().str.lower()
+    return values[values != ""].tolist()
+
+
+def _signature_matches(spec: Dict, cols: set) -> bool:
+    if not set(spec["signature"]).issubset(cols):
+        return False
+    return not any(col in cols for col in spec["exclude"])
+
+
+def detect_dataset(columns: Iterable[str], csv_path: Optional[str] = None,
+                   df: Optional[pd.DataFrame] = None) -> Optional[Dict]:
+    """
+    Resolve the registry entry for an upload from its header.
+    Only datasets with an identical header (Excise/OPG) peek at row data.
+    Returns None when no entry matches.
+    """
+    cols = set(columns)
+    candidates = []
+    for col in cols:
+        candidates.extend(_SIGNATURE_INDEX.get(col, ()))
+    candidates.sort(key=lambda s: s["priority"])
+
+    for spec in candidates:
+        if not _signature_matches(spec, cols):
+            continue
+        discriminator = spec["discriminator"]
+        if discriminator is None:
+            return spec
+        # Exports mix seizure kinds (only some Excise rows mention fermented wash), so
+        # any of the leading values may carry the keyword.
+        column, keyword = discriminator
+        if any(keyword in value for value in _leading_values(csv_path, df, column)):
+            return spec
+
+    return None
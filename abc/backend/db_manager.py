@@ -38,6 +38,7 @@ def init_db():
                     graphs_path TEXT
                 );
             """))
+            conn.execute(text("ALTER TABLE ai_predictions ADD COLUMN IF NOT EXISTS model_version TEXT;"))
 
             # ✅ Users Table
             conn.execute(text("""
@@ -196,16 +197,16 @@ def validate_login(police_id: str, password: str):
 
 # ---------------------- AI PREDICTIONS ----------------------
 
-def save_prediction_to_db(dataset_name, file_name, preds, report, graphs_path):
-    """Saves AI prediction results."""
+def save_prediction_to_db(dataset_name, file_name, preds, report, graphs_path, model_version=None):
+    """Saves AI prediction results, tagged with the model version that produced them."""
     try:
         preds_json = json.dumps(preds.tolist() if not isinstance(preds, list) else preds, ensure_ascii=False)
         report_json = json.dumps(report, ensure_ascii=False) if isinstance(report, dict) else report
         timestamp = datetime.now()
 
         query = text("""
-            INSERT INTO ai_predictions (dataset_name, timestamp, file_name, predictions, analysis_report, graphs_path)
-            VALUES (:dataset_name, :timestamp, :file_name, :predictions, :analysis_report, :graphs_path)
+            INSERT INTO ai_predictions (dataset_name, timestamp, file_name, predictions, analysis_report, graphs_path, model_version)
+            VALUES (:dataset_name, :timestamp, :file_name, :predictions, :analysis_report, :graphs_path, :model_version)
         """)
 
         with engine.begin() as conn:
@@ -215,7 +216,8 @@ def save_prediction_to_db(dataset_name, file_name, preds, report, graphs_path):
                 "file_name": file_name,
                 "predictions": preds_json,
                 "analysis_report": report_json,
-                "graphs_path": graphs_path
+                "graphs_path": graphs_path,
+                "model_version": model_version
             })
 
         print(f"✅ Saved {dataset_name} results into PostgreSQL.")
@@ -231,7 +233,7 @@ def fetch_all_predictions(limit=10):
     try:
         query = text("""
             SELECT id, dataset_name, timestamp, file_name,
-                   predictions, analysis_report, graphs_path
+                   predictions, analysis_report, graphs_path, model_version
             FROM ai_predictions
             ORDER BY timestamp DESC
             LIMIT :limit
@@ -258,6 +260,18 @@ def fetch_all_predictions(limit=10):
         return []
 
 
+def fetch_graph_paths():
+    """Distinct graphs_path values of ai_predictions, or None when the query fails."""
+    try:
+        query = text("SELECT DISTINCT graphs_path FROM ai_predictions WHERE graphs_path IS NOT NULL")
+        with engine.begin() as conn:
+            return {row[0] for row in conn.execute(query).all()}
+
+    except Exception as e:
+        print(f"⚠️ Graph path fetch failed: {str(e)}")
+        return None
+
+
 def fetch_summary_reports():
     """Fetches dataset names and summaries for dashboard."""
     try:
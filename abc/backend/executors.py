@@ -0,0 +1,97 @@
+import asyncio
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+
+from model_registry import MODEL_DIR, load_models
+from pendency_forecast import shutdown_forecast_pool, use_worker_threads
+from visualizer import shutdown_chart_pool, start_chart_pool
+
+# ⚙️ Pool sizes. INFERENCE_POOL_WORKERS=0 runs CPU stages on the I/O thread pool
+# instead of separate processes (useful for local debugging).
+INFERENCE_POOL_WORKERS = int(os.getenv("INFERENCE_POOL_WORKERS", str(max(1, (os.cpu_count() or 2) - 1))))
+IO_POOL_WORKERS = int(os.getenv("IO_POOL_WORKERS", "8"))
+
+_process_pool = None
+_io_pool = None
+_start_lock = threading.Lock()
+
+
+# ---------------------- WORKER WARM-UP ----------------------
+
+def _warm_worker(model_dir: str):
+    """
+    Runs once in every inference worker: preloads the models the dataset registry
+    uses (memory-mapped, so workers share their arrays) and the heavy
+    plotting/forecasting imports so the first request doesn't pay for them.
+    Prophet fits run on threads here; the forecast pool belongs to the API process.
+    """
+    from dataset_registry import DATASET_REGISTRY
+
+    use_worker_threads()
+
+    load_models(model_dir, preload=[spec["model_key"] for spec in DATASET_REGISTRY if spec["model_key"]])
+    import models_engine  # noqa: F401  (pulls in prophet, matplotlib, feature builders)
+
+
+def _ping():
+    return os.getpid()
+
+
+# ---------------------- LIFECYCLE ----------------------
+
+def start_pools(model_dir: str = MODEL_DIR):
+    """Create the inference, chart and I/O pools, and warm every worker."""
+    global _process_pool, _io_pool
+    with _start_lock:
+        if _io_pool is not None:
+            return
+        if _process_pool is None and INFERENCE_POOL_WORKERS > 0:
+            process_pool = ProcessPoolExecutor(
+                max_workers=INFERENCE_POOL_WORKERS,
+                initializer=_warm_worker,
+                initargs=(model_dir,),
+            )
+            # Workers are spawned lazily; push one task per worker so they all start now.
+            pids = {f.result() for f in [process_pool.submit(_ping) for _ in range(INFERENCE_POOL_WORKERS)]}
+            _process_pool = process_pool
+            print(f"✅ Inference pool ready with {len(pids)} warm worker(s).")
+        start_chart_pool()
+        # Last, so _io_pool being set means every pool is up.
+        _io_pool = ThreadPoolExecutor(max_workers=IO_POOL_WORKERS, thread_name_prefix="io")
+
+
+def shutdown_pools():
+    global _process_pool, _io_pool
+    shutdown_chart_pool()
+    shutdown_forecast_pool()
+    if _process_pool is not None:
+        _process_pool.shutdown(wait=False, cancel_futures=True)
+        _process_pool = None
+    if _io_pool is not None:
+        _io_pool.shutdown(wait=False, cancel_futures=True)
+        _io_pool = None
+
+
+# ---------------------- DISPATCH ----------------------
+
+async def _ensure_pools():
+    """Start the pools if the startup hook hasn't, without blocking the event loop."""
+    if _io_pool is None:
+        await asyncio.to_thread(start_pools)
+
+
+async def run_cpu(fn, *args, **kwargs):
+    """Run a CPU-bound stage in the inference process pool. `fn` must be picklable."""
+    await _ensure_pools()
+    pool = _process_pool or _io_pool
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(pool, partial(fn, *args, **kwargs))
+
+
+async def run_io(fn, *args, **kwargs):
+    """Run a blocking I/O stage (Gemini, Postgres, disk) in the thread pool."""
+    await _ensure_pools()
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_io_pool, partial(fn, *args, **kwargs))
@@ -1,103 +1,179 @@
 import pandas as pd
 import numpy as np
-import re
+
+from text_features import PUNISHMENT_COLUMNS, cash_value, punishment_features, seizure_features
+
+
+# ---------------------- SHARED HELPERS ----------------------
+#
+# Every builder takes compact=False. The default returns exactly what it always did
+# (a full float64 copy of the upload with every intermediate column). compact=True
+# parses only the columns the builder reads, once, into int32/float32 with a
+# categorical district and a period month, computes ratios straight into float32
+# outputs, and returns a df_proc holding just the columns downstream stages use.
+
+# Columns map points, graphs, the report and streaming read besides the features.
+DOWNSTREAM_COLUMNS = ("district", "month", "target_efficiency")
+
+_INT32 = np.iinfo(np.int32)
+
+
+def _compact_column(series):
+    if pd.api.types.is_bool_dtype(series):
+        return series
+    if pd.api.types.is_integer_dtype(series):
+        if len(series) == 0 or (series.min() >= _INT32.min and series.max() <= _INT32.max):
+            return series.astype(np.int32)
+        return series
+    if pd.api.types.is_float_dtype(series):
+        return series.astype(np.float32)
+    return series
+
+
+def _prepare(df, columns, compact=False, parse_month=True):
+    """
+    Working frame for a builder.
+    Legacy: a copy of the whole upload with `month` parsed to datetime.
+    Compact: a new frame of just `columns` (plus district/month when present), downcast.
+    """
+    if not compact:
+        df = df.copy()
+        if parse_month:
+            df["month"] = pd.to_datetime(df["month"], format="%Y-%m")
+        return df
+
+    data = {}
+    if "district" in df.columns:
+        data["district"] = df["district"].astype("category")
+    if "month" in df.columns and parse_month:
+        data["month"] = pd.to_datetime(df["month"], format="%Y-%m").dt.to_period("M")
+    elif "month" in df.columns:
+        data["month"] = df["month"]
+    for col in columns:
+        if col not in data:
+            data[col] = _compact_column(df[col])
+    return pd.DataFrame(data, index=df.index)
+
+
+def _float(compact):
+    return np.float32 if compact else np.float64
+
+
+def _ratio(num, den, compact=False, where=None):
+    """num / den where `where` (default den > 0), else 0, written into one output array."""
+    num, den = np.asarray(num), np.asarray(den)
+    out = np.zeros(len(num), dtype=_float(compact))
+    np.divide(num, den, out=out, where=(den > 0) if where is None else np.asarray(where), casting="unsafe")
+    return out
+
+
+def _next_month(df, column):
+    """Next row's value of `column` within each district (the training target)."""
+    return df.groupby("district", observed=True, sort=False)[column].shift(-1)
+
+
+def _finish(df, features, compact=False, fillna=False):
+    X = df[features]
+    if fillna:
+        X = X.fillna(0)
+    if compact:
+        keep = list(features) + [c for c in DOWNSTREAM_COLUMNS if c in df.columns]
+        df = df[list(dict.fromkeys(keep))]
+    return X, features, df
 
 
 # 1️⃣ Convictions
-def create_conviction_features(df):
+def create_conviction_features(df, compact=False):
     """
     Features for Convictions dataset to predict conviction trends.
     """
-    df = df.copy()
-    df["month"] = pd.to_datetime(df["month"], format="%Y-%m")
+    features = [
+        "ipc_trials", "ipc_convictions", "ipc_acquitted",
+        "sll_trials", "sll_convictions", "sll_acquitted",
+        "ipc_conviction_rate", "sll_conviction_rate", "overall_conviction_rate"
+    ]
+    df = _prepare(df, features[:6], compact)
 
     # Conviction rates
-    df["ipc_conviction_rate"] = np.where(df["ipc_trials"] > 0,
-                                         df["ipc_convictions"] / df["ipc_trials"], 0)
-    df["sll_conviction_rate"] = np.where(df["sll_trials"] > 0,
-                                         df["sll_convictions"] / df["sll_trials"], 0)
+    df["ipc_conviction_rate"] = _ratio(df["ipc_convictions"], df["ipc_trials"], compact)
+    df["sll_conviction_rate"] = _ratio(df["sll_convictions"], df["sll_trials"], compact)
 
     df["overall_conviction_rate"] = (
         (df["ipc_convictions"] + df["sll_convictions"]) /
         (df["ipc_trials"] + df["sll_trials"] + 1e-6)
-    )
+    ).astype(_float(compact), copy=False)
 
-    features = [
-        "ipc_trials", "ipc_convictions", "ipc_acquitted",
-        "sll_trials", "sll_convictions", "sll_acquitted",
-        "ipc_conviction_rate", "sll_conviction_rate", "overall_conviction_rate"
-    ]
-    X = df[features]
-    return X, features, df
+    # Sentence / fine / acquittal parsed out of the free-text punishment column
+    if not compact and "punishment" in df.columns:
+        df[PUNISHMENT_COLUMNS] = punishment_features(df["punishment"])
+
+    return _finish(df, features, compact)
 
 
 # 2️⃣ Crime Pendency
-def create_pendency_features(df):
+def create_pendency_features(df, compact=False):
     """
     Feature builder for pendency trend classification.
     """
-    df = df.copy()
-    df["month"] = pd.to_datetime(df["month"], format="%Y-%m")
+    features = ["cases_reported_year", "total_pendency_30days",
+                "target_close", "closed_during_drive", "pendency_percent"]
+    df = _prepare(df, features, compact)
 
-    df["pendency_change"] = df.groupby("district")["pendency_percent"].diff()
+    df["pendency_change"] = df.groupby("district", observed=True, sort=False)["pendency_percent"].diff()
     df["trend_label"] = pd.cut(df["pendency_change"],
                                bins=[-np.inf, -1, 1, np.inf],
                                labels=["Improving", "Stable", "Worsening"])
 
-    features = ["cases_reported_year", "total_pendency_30days",
-                "target_close", "closed_during_drive", "pendency_percent"]
-    X = df[features].fillna(0)
-    return X, features, df
+    return _finish(df, features, compact, fillna=True)
 
 
 # 3️⃣ Excise Act
-def create_excise_features(df):
+def create_excise_features(df, compact=False):
     """
     Efficiency features for Excise Act enforcement.
     """
-    df = df.copy()
-    df["month"] = pd.to_datetime(df["month"], format="%Y-%m")
+    features = ["cases_registered", "persons_arrested", "arrest_per_case"]
+    df = _prepare(df, features[:2], compact)
 
     # Arrests per case (core efficiency metric)
-    df["arrest_per_case"] = np.where(
-        df["cases_registered"] > 0,
-        df["persons_arrested"] / df["cases_registered"],
-        0
-    )
+    df["arrest_per_case"] = _ratio(df["persons_arrested"], df["cases_registered"], compact)
 
     # Shift for next-month prediction
-    df["target_efficiency"] = df.groupby("district")["arrest_per_case"].shift(-1)
+    df["target_efficiency"] = _next_month(df, "arrest_per_case")
 
     df_final = df.dropna(subset=["target_efficiency"])
-    features = ["cases_registered", "persons_arrested", "arrest_per_case"]
-
-    X = df_final[features]
-    return X, features, df_final
+    return _finish(df_final, features, compact)
 
 
 # 4️⃣ Firearms Drive
-def create_firearms_features(df):
+def create_firearms_features(df, compact=False):
     """
     Firearms seizure efficiency features.
     """
-    df = df.copy()
-    df["total_firearms"] = df[["gun_rifle", "pistol", "revolver",
-                               "mouzer", "ak47", "slr", "others"]].sum(axis=1)
+    weapons = ["gun_rifle", "pistol", "revolver", "mouzer", "ak47", "slr", "others"]
+    df = _prepare(df, ["cases_registered", "persons_arrested", "ammunition", "cartridge"] + weapons,
+                  compact, parse_month=False)
+
+    df["total_firearms"] = df[weapons].sum(axis=1)
+    if compact:
+        df["total_firearms"] = _compact_column(df["total_firearms"])
     df["total_ammo"] = df["ammunition"] + df["cartridge"]
-    df["arrest_per_case"] = np.where(df["cases_registered"] > 0,
-                                     df["persons_arrested"] / df["cases_registered"], 0)
+    df["arrest_per_case"] = _ratio(df["persons_arrested"], df["cases_registered"], compact)
     features = ["cases_registered", "total_firearms", "total_ammo", "arrest_per_case"]
-    X = df[features].fillna(0)
-    return X, features, df
+    return _finish(df, features, compact, fillna=True)
 
 
 # 5️⃣ Missing Persons Drive
-def create_missing_features(df):
+def create_missing_features(df, compact=False):
     """
     Recovery efficiency from Missing Persons Drive.
     """
-    df = df.copy()
-    df["month"] = pd.to_datetime(df["month"], format="%Y-%m")
+    missing = [
+        "missing_boys_start", "missing_boys_during", "missing_girls_start", "missing_girls_during",
+        "missing_men_start", "missing_men_during", "missing_women_start", "missing_women_during",
+    ]
+    traced = ["traced_boys", "traced_girls", "traced_men", "traced_women"]
+    df = _prepare(df, missing + traced, compact)
 
     # --- 1️⃣ Aggregate totals ---
     df["missing_total"] = (
@@ -113,84 +189,59 @@ def create_missing_features(df):
     )
 
     # --- 2️⃣ Compute tracing efficiency ---
-    df["tracing_efficiency"] = np.where(
-        df["missing_total"] > 0,
-        df["traced_total"] / df["missing_total"],
-        0
-    )
+    df["tracing_efficiency"] = _ratio(df["traced_total"], df["missing_total"], compact)
 
     # --- 3️⃣ Predict next-month tracing efficiency ---
-    df["target_efficiency"] = df.groupby("district")["tracing_efficiency"].shift(-1)
+    df["target_efficiency"] = _next_month(df, "tracing_efficiency")
     df_final = df.dropna(subset=["target_efficiency"])
 
     # --- 4️⃣ Select input features ---
-    features = [
-        "missing_boys_start", "missing_boys_during", "missing_girls_start", "missing_girls_during",
-        "missing_men_start", "missing_men_during", "missing_women_start", "missing_women_during",
-        "traced_boys", "traced_girls", "traced_men", "traced_women", "missing_total", "traced_total", "tracing_efficiency"
-    ]
-
-    X = df_final[features]
-    return X, features, df_final
+    features = missing + traced + ["missing_total", "traced_total", "tracing_efficiency"]
+    return _finish(df_final, features, compact)
 
 
 # 6️⃣ NBW Drive
-def create_nbw_features(df):
+def create_nbw_features(df, compact=False):
     """
     NBW (Non-Bailable Warrants) execution efficiency.
     """
-    df = df.copy()
-    df["month"] = pd.to_datetime(df["month"], format="%Y-%m")
+    features = [
+        "nbw_pending_start", "nbw_received", "nbw_executed_drive",
+        "nbw_disposed_other", "nbw_total_disposed", "nbw_pending_end",
+        "nbw_execution_rate", "nbw_disposal_rate", "nbw_pending_change_rate"
+    ]
+    df = _prepare(df, features[:6], compact)
 
     # --- 1️⃣ Compute key ratios ---
-    df["nbw_execution_rate"] = np.where(
-        df["nbw_received"] > 0,
-        df["nbw_executed_drive"] / df["nbw_received"],
-        0
-    )
-
-    df["nbw_disposal_rate"] = np.where(
-        df["nbw_total_disposed"] > 0,
-        df["nbw_executed_drive"] / df["nbw_total_disposed"],
-        0
-    )
+    df["nbw_execution_rate"] = _ratio(df["nbw_executed_drive"], df["nbw_received"], compact)
+    df["nbw_disposal_rate"] = _ratio(df["nbw_executed_drive"], df["nbw_total_disposed"], compact)
 
     # Pending reduction ratio: how much pending reduced vs start
-    df["nbw_pending_change_rate"] = np.where(
-        df["nbw_pending_start"] > 0,
-        (df["nbw_pending_start"] - df["nbw_pending_end"]) / df["nbw_pending_start"],
-        0
+    df["nbw_pending_change_rate"] = _ratio(
+        df["nbw_pending_start"] - df["nbw_pending_end"], df["nbw_pending_start"], compact
     )
 
     # --- 2️⃣ Create target variable (next month's execution rate) ---
-    df["target_efficiency"] = df.groupby("district")["nbw_execution_rate"].shift(-1)
+    df["target_efficiency"] = _next_month(df, "nbw_execution_rate")
     df_final = df.dropna(subset=["target_efficiency"])
 
-    # --- 3️⃣ Select features ---
-    features = [
-        "nbw_pending_start", "nbw_received", "nbw_executed_drive",
-        "nbw_disposed_other", "nbw_total_disposed", "nbw_pending_end",
-        "nbw_execution_rate", "nbw_disposal_rate", "nbw_pending_change_rate"
-    ]
-
-    X = df_final[features].fillna(0)
-    return X, features, df_final
+    return _finish(df_final, features, compact, fillna=True)
 
 
 # 7️⃣ Narcotics Drive
-def create_narcotics_features(df):
+def create_narcotics_features(df, compact=False):
     """
     Narcotics disposal and seizure efficiency.
     """
-    df = df.copy()
-    df["month"] = pd.to_datetime(df["month"], format="%Y-%m")
+    features = [
+        "cases_registered", "persons_arrested", "ganja_kg", "brownsugar_g",
+        "vehicles", "ganja_plants_destroyed", "bhanga", "opium",
+        "cough_syrup_bottles", "cash_recovered", "arrest_efficiency", "seizure_intensity"
+    ]
+    df = _prepare(df, features[:10], compact)
 
     # --- 1️⃣ Compute operational efficiency ---
-    df["arrest_efficiency"] = np.where(
-        df["cases_registered"] > 0,
-        df["persons_arrested"] / df["cases_registered"],
-        0
-    )
+    df["arrest_efficiency"] = _ratio(df["persons_arrested"], df["cases_registered"], compact)
 
     df["seizure_intensity"] = (
         df["ganja_kg"] +
@@ -198,115 +249,71 @@ def create_narcotics_features(df):
         df["opium"] +
         df["bhanga"] +
         (df["cough_syrup_bottles"] / 1000)  # scale down bottle counts
-    )
+    ).astype(_float(compact), copy=False)
 
     # --- 2️⃣ Combined efficiency metric ---
     df["operation_efficiency"] = (df["arrest_efficiency"] + np.log1p(df["seizure_intensity"])) / 2
 
     # --- 3️⃣ Target variable — next month efficiency ---
-    df["target_efficiency"] = df.groupby("district")["operation_efficiency"].shift(-1)
+    df["target_efficiency"] = _next_month(df, "operation_efficiency")
     df_final = df.dropna(subset=["target_efficiency"])
 
-    # --- 4️⃣ Select meaningful features ---
-    features = [
-        "cases_registered", "persons_arrested", "ganja_kg", "brownsugar_g",
-        "vehicles", "ganja_plants_destroyed", "bhanga", "opium",
-        "cough_syrup_bottles", "cash_recovered", "arrest_efficiency", "seizure_intensity"
-    ]
-
-    X = df_final[features].fillna(0)
-    return X, features, df_final
+    return _finish(df_final, features, compact, fillna=True)
 
 # 8️⃣ OPG Act
-def extract_cash_value(text):
-    """Extract numeric cash value from text like 'Rs. 4983 mobile phones and cash'."""
-    if pd.isna(text):
-        return 0.0
-    match = re.search(r'Rs\.?\s?([\d,]+)', str(text))
-    return float(match.group(1).replace(",", "")) if match else 0.0
-
-
-def extract_cash_value(text):
-    """
-    Extracts numerical cash value from text like 'Rs. 4983 mobile phones and cash'
-    Returns float in rupees.
-    """
-    if pd.isna(text):
-        return 0.0
-    match = re.search(r'Rs\.?\s?([\d,]+)', str(text))
-    if match:
-        return float(match.group(1).replace(",", ""))
-    return 0.0
-
-
-def create_opg_features(df):
+def create_opg_features(df, compact=False):
     """
     Creates efficiency features for OPG Act operations.
     """
-    df = df.copy()
-    df["month"] = pd.to_datetime(df["month"], format="%Y-%m")
+    df = _prepare(df, ["cases_registered", "persons_arrested", "details_of_seizure"], compact)
 
-    # --- 1️⃣ Extract numeric cash seized ---
-    df["cash_value"] = df["details_of_seizure"].apply(extract_cash_value)
+    # --- 1️⃣ Extract numeric cash seized (and, for the full frame, seized phones) ---
+    if compact:
+        df["cash_value"] = cash_value(df["details_of_seizure"]).astype(np.float32, copy=False)
+    else:
+        seizure = seizure_features(df["details_of_seizure"])
+        df[["cash_value", "phone_count", "phones_seized"]] = seizure[["cash_value", "phone_count", "phones_seized"]]
 
     # --- 2️⃣ Create efficiency indicators ---
-    df["arrest_efficiency"] = np.where(
-        df["cases_registered"] > 0,
-        df["persons_arrested"] / df["cases_registered"],
-        0
-    )
-
-    df["cash_per_case"] = np.where(
-        df["cases_registered"] > 0,
-        df["cash_value"] / df["cases_registered"],
-        0
-    )
+    df["arrest_efficiency"] = _ratio(df["persons_arrested"], df["cases_registered"], compact)
+    df["cash_per_case"] = _ratio(df["cash_value"], df["cases_registered"], compact)
 
     # --- 3️⃣ Combined performance score ---
     df["operation_efficiency"] = (df["arrest_efficiency"] + np.log1p(df["cash_per_case"])) / 2
 
     # --- 4️⃣ Target: Predict next month's efficiency ---
-    df["target_efficiency"] = df.groupby("district")["operation_efficiency"].shift(-1)
+    df["target_efficiency"] = _next_month(df, "operation_efficiency")
     df_final = df.dropna(subset=["target_efficiency"])
 
     # --- 5️⃣ Features for model ---
     features = ["cases_registered", "persons_arrested", "cash_value", "arrest_efficiency", "cash_per_case"]
-    X = df_final[features]
-
-    return X, features, df_final
+    return _finish(df_final, features, compact)
 
 # 9️⃣ Preventive Measures
-def create_preventive_features(df):
+def create_preventive_features(df, compact=False):
     """
     Preventive action efficiency.
     """
-    df = df.copy()
-    df["month"] = pd.to_datetime(df["month"], format="%Y-%m")
+    features = [
+        "notice_129_bnss", "bound_129_bnss",
+        "notice_126_bnss", "bound_126_bnss",
+        "nbw_executed", "chanda_cases_registered",
+        "chanda_persons_arrested", "blockings_border_sealed",
+        "organized_crime_action", "bnss_129_efficiency",
+        "bnss_126_efficiency", "nbw_execution_ratio", "organized_action_rate"
+    ]
+    df = _prepare(df, features[:9], compact)
 
     # --- 1️⃣ Calculate key efficiency ratios ---
-    df["bnss_129_efficiency"] = np.where(
-        df["notice_129_bnss"] > 0,
-        df["bound_129_bnss"] / df["notice_129_bnss"],
-        0
-    )
+    df["bnss_129_efficiency"] = _ratio(df["bound_129_bnss"], df["notice_129_bnss"], compact)
+    df["bnss_126_efficiency"] = _ratio(df["bound_126_bnss"], df["notice_126_bnss"], compact)
 
-    df["bnss_126_efficiency"] = np.where(
-        df["notice_126_bnss"] > 0,
-        df["bound_126_bnss"] / df["notice_126_bnss"],
-        0
+    df["nbw_execution_ratio"] = _ratio(
+        df["nbw_executed"], df["notice_129_bnss"] + df["notice_126_bnss"], compact,
+        where=df["nbw_executed"] > 0,
     )
 
-    df["nbw_execution_ratio"] = np.where(
-        df["nbw_executed"] > 0,
-        df["nbw_executed"] / (df["notice_129_bnss"] + df["notice_126_bnss"]),
-        0
-    )
-
-    df["organized_action_rate"] = np.where(
-        df["chanda_cases_registered"] > 0,
-        df["organized_crime_action"] / df["chanda_cases_registered"],
-        0
-    )
+    df["organized_action_rate"] = _ratio(df["organized_crime_action"], df["chanda_cases_registered"], compact)
 
     # --- 2️⃣ Combine them into one efficiency score ---
     df["preventive_efficiency"] = (
@@ -317,49 +324,32 @@ def create_preventive_features(df):
     )
 
     # --- 3️⃣ Target variable: next month's efficiency ---
-    df["target_efficiency"] = df.groupby("district")["preventive_efficiency"].shift(-1)
+    df["target_efficiency"] = _next_month(df, "preventive_efficiency")
     df_final = df.dropna(subset=["target_efficiency"])
 
-    # --- 4️⃣ Define features for model ---
-    features = [
-        "notice_129_bnss", "bound_129_bnss",
-        "notice_126_bnss", "bound_126_bnss",
-        "nbw_executed", "chanda_cases_registered",
-        "chanda_persons_arrested", "blockings_border_sealed",
-        "organized_crime_action", "bnss_129_efficiency",
-        "bnss_126_efficiency", "nbw_execution_ratio", "organized_action_rate"
-    ]
-
-    X = df_final[features].fillna(0)
-    return X, features, df_final
+    return _finish(df_final, features, compact, fillna=True)
 
 
 # 🔟 Sand Mining
-def create_mining_features(df):
+def create_mining_features(df, compact=False):
     """
     Sand mining efficiency indicators.
     """
-    df = df.copy()
-    df["month"] = pd.to_datetime(df["month"], format="%Y-%m")
+    features = [
+        "cases_registered",
+        "vehicles_seized",
+        "persons_arrested",
+        "notices_served",
+        "arrest_efficiency",
+        "vehicle_per_case",
+        "notices_per_case"
+    ]
+    df = _prepare(df, features[:4], compact)
 
     # --- 1️⃣ Compute core operational efficiency metrics ---
-    df["arrest_efficiency"] = np.where(
-        df["cases_registered"] > 0,
-        df["persons_arrested"] / df["cases_registered"],
-        0
-    )
-
-    df["vehicle_per_case"] = np.where(
-        df["cases_registered"] > 0,
-        df["vehicles_seized"] / df["cases_registered"],
-        0
-    )
-
-    df["notices_per_case"] = np.where(
-        df["cases_registered"] > 0,
-        df["notices_served"] / df["cases_registered"],
-        0
-    )
+    df["arrest_efficiency"] = _ratio(df["persons_arrested"], df["cases_registered"], compact)
+    df["vehicle_per_case"] = _ratio(df["vehicles_seized"], df["cases_registered"], compact)
+    df["notices_per_case"] = _ratio(df["notices_served"], df["cases_registered"], compact)
 
     # --- 2️⃣ Combine into an overall enforcement efficiency score ---
     df["mining_efficiency"] = (
@@ -369,19 +359,7 @@ def create_mining_features(df):
     )
 
     # --- 3️⃣ Target: predict next month’s efficiency ---
-    df["target_efficiency"] = df.groupby("district")["mining_efficiency"].shift(-1)
+    df["target_efficiency"] = _next_month(df, "mining_efficiency")
     df_final = df.dropna(subset=["target_efficiency"])
 
-    # --- 4️⃣ Features used for regression ---
-    features = [
-        "cases_registered",
-        "vehicles_seized",
-        "persons_arrested",
-        "notices_served",
-        "arrest_efficiency",
-        "vehicle_per_case",
-        "notices_per_case"
-    ]
-
-    X = df_final[features].fillna(0)
-    return X, features, df_final
\ No newline at end of file
+    return _finish(df_final, features, compact, fillna=True)
@@ -0,0 +1,221 @@
+"""
+Columnar cache of built features (Arrow IPC), keyed by source content and feature_builder version.
+
+    feature_cache/<key>.proc.arrow   ← df_proc returned by the builder
+    feature_cache/<key>.X.arrow      ← model matrix X (features, after any fillna)
+
+Entries are read through a memory map, so null-free numeric columns reach pandas
+without a copy. Warm the synthetic datasets with:
+
+    python feature_cache.py warm [--dataset-dir ../synthetic_cctns_datasets] [--compact]
+"""
+import argparse
+import glob
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+
+import pandas as pd  # type: ignore
+
+import csv_ingest
+import dataset_registry
+import feature_builder
+import text_features
+from csv_ingest import read_dataset
+from dataset_registry import detect_dataset, read_csv_header
+from result_cache import content_digest
+
+try:
+    import pyarrow as pa  # type: ignore
+    import pyarrow.ipc  # type: ignore  # noqa: F401
+except ImportError:  # pragma: no cover - optional dependency
+    pa = None
+
+# ⚙️ Feature cache location and size cap (least recently read entries go first).
+FEATURE_CACHE_DIR = os.getenv("FEATURE_CACHE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "feature_cache"))
+FEATURE_CACHE_MAX_BYTES = int(os.getenv("FEATURE_CACHE_MAX_BYTES", str(2 * 1024 * 1024 * 1024)))
+FEATURE_CACHE_ENABLED = os.getenv("FEATURE_CACHE_ENABLED", "1") != "0" and pa is not None
+
+_lock = threading.Lock()
+_digests = OrderedDict()  # csv path → ((mtime_ns, size), content digest), least recent first
+_DIGEST_MEMO_SIZE = 256
+_counters = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0}
+
+
+def _builder_version() -> str:
+    """
+    Hash of feature_builder.py, text_features.py (its parsers), csv_ingest.py and
+    dataset_registry.py (schemas): any change to a builder or to how uploads are
+    read invalidates every entry.
+    """
+    digest = hashlib.sha256()
+    for module in (feature_builder, text_features, csv_ingest, dataset_registry):
+        with open(module.__file__, "rb") as handle:
+            digest.update(handle.read())
+    return digest.hexdigest()[:16]
+
+
+FEATURE_BUILDER_VERSION = _builder_version()
+
+
+# ---------------------- KEYING ----------------------
+
+def source_digest(csv_path: str) -> str:
+    """
+    content_digest of a CSV, memoised per (path, mtime, size) for repeated runs. Every
+    upload has its own temp path, so only the last _DIGEST_MEMO_SIZE paths are kept.
+    """
+    stat = os.stat(csv_path)
+    signature = (stat.st_mtime_ns, stat.st_size)
+    with _lock:
+        cached = _digests.get(csv_path)
+        if cached and cached[0] == signature:
+            _digests.move_to_end(csv_path)
+            return cached[1]
+    digest = content_digest(csv_path)
+    with _lock:
+        _digests[csv_path] = (signature, digest)
+        _digests.move_to_end(csv_path)
+        while len(_digests) > _DIGEST_MEMO_SIZE:
+            _digests.popitem(last=False)
+    return digest
+
+
+def feature_key(csv_path: str, spec: dict, compact: bool = False) -> str:
+    # The CSV engine is part of the key: pandas keeps over-long lines that pyarrow rejects.
+    parts = [spec["name"], spec["builder"].__name__, FEATURE_BUILDER_VERSION, csv_ingest.CSV_ENGINE,
+             str(bool(compact)), source_digest(csv_path)]
+    return hashlib.sha256("|".join(parts).encode("utf-8")).hexdigest()
+
+
+def _entry_paths(key: str):
+    base = os.path.join(FEATURE_CACHE_DIR, key)
+    return f"{base}.proc.arrow", f"{base}.X.arrow"
+
+
+# ---------------------- READ / WRITE ----------------------
+
+def _write_table(df: pd.DataFrame, path: str, metadata=None):
+    table = pa.Table.from_pandas(df, preserve_index=True)
+    if metadata:
+        table = table.replace_schema_metadata({**(table.schema.metadata or {}), **metadata})
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with pa.OSFile(tmp_path, "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+        writer.write_table(table)
+    os.replace(tmp_path, path)
+
+
+def _read_table(path: str):
+    source = pa.memory_map(path, "r")
+    table = pa.ipc.open_file(source).read_all()
+    return table.to_pandas(split_blocks=True), table.schema.metadata or {}
+
+
+def load_features(csv_path: str, spec: dict, compact: bool = False):
+    """(X, features, df_proc) from the cache, or None on a miss. df_proc.attrs["ingest"] holds the ingest report."""
+    if not FEATURE_CACHE_ENABLED or spec.get("builder") is None:
+        return None
+    proc_path, x_path = _entry_paths(feature_key(csv_path, spec, compact))
+    try:
+        df_proc, metadata = _read_table(proc_path)
+        X, _ = _read_table(x_path)
+    except (OSError, pa.ArrowInvalid):
+        with _lock:
+            _counters["misses"] += 1
+        return None
+
+    os.utime(proc_path, None)
+    with _lock:
+        _counters["hits"] += 1
+    features = json.loads(metadata.get(b"features", b"[]"))
+    if b"ingest" in metadata:
+        df_proc.attrs["ingest"] = json.loads(metadata[b"ingest"])
+    return X, features, df_proc
+
+
+def store_features(csv_path: str, spec: dict, X, features, df_proc, compact: bool = False):
+    if not FEATURE_CACHE_ENABLED:
+        return
+    os.makedirs(FEATURE_CACHE_DIR, exist_ok=True)
+    proc_path, x_path = _entry_paths(feature_key(csv_path, spec, compact))
+    try:
+        _write_table(X, x_path)
+        metadata = {b"features": json.dumps(list(features)).encode("utf-8")}
+        if "ingest" in df_proc.attrs:
+            metadata[b"ingest"] = json.dumps(df_proc.attrs["ingest"]).encode("utf-8")
+        _write_table(df_proc, proc_path, metadata)
+    except (OSError, pa.ArrowException) as e:
+        print(f"⚠️ Feature cache write failed: {str(e)}")
+        return
+    with _lock:
+        _counters["stores"] += 1
+    _evict()
+
+
+def cached_features(csv_path: str, spec: dict, compact: bool = False):
+    """
+    (X, features, df_proc) for a CSV: straight from the Arrow cache when the file and
+    feature_builder are unchanged, otherwise read with csv_ingest, built and stored.
+    The ingest report rides along in df_proc.attrs["ingest"].
+    """
+    hit = load_features(csv_path, spec, compact)
+    if hit is not None:
+        return hit
+    df, report = read_dataset(csv_path, spec)
+    X, features, df_proc = spec["builder"](df, compact=compact)
+    df_proc.attrs["ingest"] = report
+    store_features(csv_path, spec, X, features, df_proc, compact)
+    return X, features, df_proc
+
+
+def _evict():
+    entries = []
+    for path in glob.glob(os.path.join(FEATURE_CACHE_DIR, "*.proc.arrow")):
+        x_path = path[: -len(".proc.arrow")] + ".X.arrow"
+        try:
+            size = os.path.getsize(path) + (os.path.getsize(x_path) if os.path.exists(x_path) else 0)
+            entries.append((os.path.getmtime(path), size, path, x_path))
+        except OSError:
+            continue
+    total = sum(size for _, size, _, _ in entries)
+    for _, size, path, x_path in sorted(entries):
+        if total <= FEATURE_CACHE_MAX_BYTES:
+            break
+        for p in (path, x_path):
+            if os.path.exists(p):
+                os.remove(p)
+        total -= size
+        with _lock:
+            _counters["evictions"] += 1
+
+
+def feature_cache_stats() -> dict:
+    with _lock:
+        stats = dict(_counters)
+    stats.update({"enabled": FEATURE_CACHE_ENABLED, "builder_version": FEATURE_BUILDER_VERSION})
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the Arrow feature cache for the synthetic datasets.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    warm = sub.add_parser("warm")
+    warm.add_argument("--dataset-dir", default=os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                                             "synthetic_cctns_datasets"))
+    warm.add_argument("--compact", action="store_true")
+    args = parser.parse_args()
+
+    if not FEATURE_CACHE_ENABLED:
+        raise SystemExit("⚠️ Feature cache disabled (pyarrow missing or FEATURE_CACHE_ENABLED=0)")
+    for path in sorted(glob.glob(os.path.join(args.dataset_dir, "*.csv"))):
+        spec = detect_dataset(read_csv_header(path), csv_path=path)
+        if spec is None or spec["builder"] is None:
+            continue
+        X, _, _ = cached_features(path, spec, compact=args.compact)
+        print(f"✅ {spec['name']}: {len(X)} rows cached")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,241 @@
+"""
+Incremental per-district feature state for month-over-month appends.
+
+    feature_store/<dataset>/
+        history.csv   ← district, month, features, target_efficiency (append-only)
+        pending.csv   ← raw last row per district, still waiting for next month's target
+        meta.json     ← last month per district, history byte size, builder name
+
+Appending a month runs the dataset's feature builder on (pending rows + new rows)
+only: the pending rows come back out with their target filled in, and the new rows
+become the next pending set. Monthly updates cost O(districts), not O(history).
+
+CLI:
+    python feature_store.py rebuild NBW_Drive path/to/full_history.csv
+    python feature_store.py append path/to/new_month.csv
+    python feature_store.py status
+"""
+import argparse
+import json
+import os
+import threading
+
+import pandas as pd  # type: ignore
+
+from csv_ingest import read_dataset
+from dataset_registry import DATASETS_BY_NAME, detect_dataset, read_csv_header
+
+FEATURE_STORE_DIR = os.getenv("FEATURE_STORE_DIR", os.path.join(os.path.dirname(__file__), "feature_store"))
+
+_locks = {}
+_locks_guard = threading.Lock()
+
+
+def _lock(name):
+    with _locks_guard:
+        return _locks.setdefault(name, threading.Lock())
+
+
+def _paths(name, store_dir):
+    base = os.path.join(store_dir, name)
+    return base, os.path.join(base, "history.csv"), os.path.join(base, "pending.csv"), os.path.join(base, "meta.json")
+
+
+def _read_meta(meta_path):
+    if not os.path.exists(meta_path):
+        return None
+    with open(meta_path, "r", encoding="utf-8") as handle:
+        return json.load(handle)
+
+
+def _write_atomic(path, write):
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    write(tmp_path)
+    os.replace(tmp_path, path)
+
+
+def _month_keys(month: pd.Series) -> pd.Series:
+    """"YYYY-MM" strings for raw, datetime or period months."""
+    if pd.api.types.is_datetime64_any_dtype(month) or isinstance(month.dtype, pd.PeriodDtype):
+        return month.dt.strftime("%Y-%m")
+    return pd.to_datetime(month.astype(str), format="%Y-%m").dt.strftime("%Y-%m")
+
+
+def _spec_for(name):
+    spec = DATASETS_BY_NAME.get(name)
+    if spec is None:
+        raise ValueError(f"Unknown dataset '{name}'")
+    if spec["pipeline"] != "model":
+        raise ValueError(f"{spec['label']} has no feature builder")
+    return spec
+
+
+def _process(spec, pending: pd.DataFrame, new_rows: pd.DataFrame):
+    """Run the builder on carry + new rows. Returns (emitted feature rows, next pending raw rows)."""
+    frame = pd.concat([pending, new_rows], ignore_index=True) if len(pending) else new_rows.reset_index(drop=True)
+    frame = frame.assign(_order=_month_keys(frame["month"])).sort_values("_order", kind="stable")
+    frame = frame.drop(columns="_order").reset_index(drop=True)
+
+    X, features, df_proc = spec["builder"](frame)
+    keep = [c for c in ("district", "month") if c in df_proc.columns] + list(features)
+    if "target_efficiency" in df_proc.columns:
+        keep.append("target_efficiency")
+    emitted = df_proc[list(dict.fromkeys(keep))].copy()
+    emitted[features] = X
+    if "month" in emitted.columns:
+        emitted["month"] = _month_keys(emitted["month"])
+
+    if spec["carry_over"]:
+        next_pending = frame.groupby("district", sort=False).tail(1)
+    else:
+        next_pending = frame.iloc[0:0]
+    return emitted, next_pending
+
+
+def _commit(name, store_dir, emitted, next_pending, last_months, meta, reset=False):
+    base, history_path, pending_path, meta_path = _paths(name, store_dir)
+    os.makedirs(base, exist_ok=True)
+
+    if reset:
+        _write_atomic(history_path, lambda p: emitted.to_csv(p, index=False))
+    else:
+        write_header = not os.path.exists(history_path) or os.path.getsize(history_path) == 0
+        emitted.to_csv(history_path, mode="a", header=write_header, index=False)
+
+    _write_atomic(pending_path, lambda p: next_pending.to_csv(p, index=False))
+    meta = {
+        "dataset": name,
+        "builder": DATASETS_BY_NAME[name]["builder"].__name__,
+        "columns": list(emitted.columns) if len(emitted.columns) else meta.get("columns", []),
+        "history_rows": (0 if reset else meta.get("history_rows", 0)) + len(emitted),
+        "history_bytes": os.path.getsize(history_path),
+        "last_month": last_months,
+    }
+
+    def write(p):
+        with open(p, "w", encoding="utf-8") as handle:
+            json.dump(meta, handle, indent=2, sort_keys=True)
+
+    _write_atomic(meta_path, write)
+    return meta
+
+
+def rebuild(name, df: pd.DataFrame, store_dir=FEATURE_STORE_DIR) -> dict:
+    """Initialise (or replace) a dataset's store from its full history. O(history), run once."""
+    spec = _spec_for(name)
+    with _lock(name):
+        emitted, pending = _process(spec, df.iloc[0:0], df)
+        months = _month_keys(df["month"])
+        last_months = months.groupby(df["district"].astype(str)).max().to_dict()
+        meta = _commit(name, store_dir, emitted, pending, last_months, {}, reset=True)
+    return {"dataset": name, "rows_written": len(emitted), "pending": len(pending), "history_rows": meta["history_rows"]}
+
+
+def append_month(name, new_rows: pd.DataFrame, store_dir=FEATURE_STORE_DIR) -> dict:
+    """
+    Add new months for some or all districts. Only the stored pending row of each
+    district and the new rows go through the feature builder.
+    Raises ValueError for rows that aren't newer than the district's stored month.
+    """
+    spec = _spec_for(name)
+    base, history_path, pending_path, meta_path = _paths(name, store_dir)
+    with _lock(name):
+        meta = _read_meta(meta_path)
+        if meta is None:
+            raise ValueError(f"No feature store for {name}; run rebuild first")
+
+        # Roll back a history append that was interrupted before meta.json was updated.
+        if os.path.exists(history_path) and os.path.getsize(history_path) > meta["history_bytes"]:
+            with open(history_path, "r+b") as handle:
+                handle.truncate(meta["history_bytes"])
+
+        months = _month_keys(new_rows["month"])
+        districts = new_rows["district"].astype(str)
+        previous = districts.map(meta["last_month"])
+        stale = previous.notna() & (months <= previous)
+        if stale.any():
+            sample = ", ".join(f"{d} {m}" for d, m in zip(districts[stale][:5], months[stale][:5]))
+            raise ValueError(f"{int(stale.sum())} row(s) are not newer than the stored month: {sample}")
+
+        pending = pd.read_csv(pending_path) if os.path.exists(pending_path) else new_rows.iloc[0:0]
+        touched = pending["district"].astype(str).isin(set(districts))
+        emitted, next_pending = _process(spec, pending[touched], new_rows)
+
+        # Districts that got no new rows keep their pending row untouched.
+        if len(pending) and not touched.all():
+            next_pending = pd.concat([pending[~touched], next_pending], ignore_index=True)
+
+        last_months = dict(meta["last_month"])
+        last_months.update(months.groupby(districts).max().to_dict())
+        meta = _commit(name, store_dir, emitted, next_pending, last_months, meta)
+
+    return {
+        "dataset": name,
+        "rows_appended": int(len(new_rows)),
+        "rows_written": int(len(emitted)),
+        "targets_filled": int(touched.sum()),
+        "pending": int(len(next_pending)),
+        "history_rows": meta["history_rows"],
+    }
+
+
+def load_history(name, store_dir=FEATURE_STORE_DIR) -> pd.DataFrame:
+    """Every feature row emitted so far (district, month, features, target_efficiency)."""
+    _, history_path, _, meta_path = _paths(name, store_dir)
+    meta = _read_meta(meta_path)
+    if meta is None or not os.path.exists(history_path):
+        return pd.DataFrame()
+    df = pd.read_csv(history_path, nrows=meta["history_rows"])
+    if "month" in df.columns:
+        df["month"] = pd.to_datetime(df["month"], format="%Y-%m")
+    return df
+
+
+def store_status(store_dir=FEATURE_STORE_DIR) -> list:
+    if not os.path.isdir(store_dir):
+        return []
+    status = []
+    for name in sorted(os.listdir(store_dir)):
+        meta = _read_meta(_paths(name, store_dir)[3])
+        if meta:
+            status.append({
+                "dataset": name,
+                "history_rows": meta["history_rows"],
+                "districts": len(meta["last_month"]),
+                "latest_month": max(meta["last_month"].values(), default=None),
+            })
+    return status
+
+
+def append_csv(csv_path, store_dir=FEATURE_STORE_DIR) -> dict:
+    """Detect the dataset of a monthly CSV and append it to that dataset's store."""
+    spec = detect_dataset(read_csv_header(csv_path), csv_path=csv_path)
+    if spec is None:
+        raise ValueError("❌ Unknown dataset structure")
+    df, _ = read_dataset(csv_path, spec)
+    return append_month(spec["name"], df, store_dir)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Maintain the incremental feature store.")
+    parser.add_argument("--store-dir", default=FEATURE_STORE_DIR)
+    sub = parser.add_subparsers(dest="command", required=True)
+    reb = sub.add_parser("rebuild")
+    reb.add_argument("dataset")
+    reb.add_argument("csv")
+    app = sub.add_parser("append")
+    app.add_argument("csv")
+    sub.add_parser("status")
+    args = parser.parse_args()
+
+    if args.command == "rebuild":
+        df, _ = read_dataset(args.csv, _spec_for(args.dataset))
+        print(f"✅ {rebuild(args.dataset, df, args.store_dir)}")
+    elif args.command == "append":
+        print(f"✅ {append_csv(args.csv, args.store_dir)}")
+    else:
+        print(json.dumps(store_status(args.store_dir), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -96,3 +96,35 @@ def get_geo_location(district_name: str) -> Optional[Dict[str, float | str]]:
         return spaced_match
 
     return None
+
+
+_GEO_TABLE = None
+
+
+def _geo_table():
+    """Registry as a DataFrame indexed by normalised key (built once, on first use)."""
+    global _GEO_TABLE
+    if _GEO_TABLE is None:
+        import pandas as pd  # type: ignore
+
+        _GEO_TABLE = pd.DataFrame.from_dict(_DISTRICT_GEO_REGISTRY, orient="index")[["lat", "lng", "state"]]
+    return _GEO_TABLE
+
+
+def locate_districts(districts):
+    """
+    Vectorised get_geo_location for a pandas Series of district names.
+    Returns a DataFrame aligned to the input index with lat, lng and state columns;
+    rows without a match (or with a missing name) are NaN.
+    """
+    table = _geo_table()
+    spaced = districts.astype(str).str.strip().str.lower()
+    compact = spaced.str.replace(" ", "", regex=False)
+
+    located = table.reindex(compact.to_numpy())
+    fallback = table.reindex(spaced.to_numpy())
+    located.index = districts.index
+    fallback.index = districts.index
+    located = located.fillna(fallback)
+    located.loc[districts.isna().to_numpy()] = None
+    return located
@@ -0,0 +1,345 @@
+"""
+Managed on-disk store behind /graphs.
+
+    GRAPHS_DIR/
+      .objects/ab/<key>.pkl          a chart's payload (what it is drawn from)
+      .objects/ab/<key>.png          the chart, rendered on first request
+      <title>_<digest>/manifest.json {"title", "charts": {chart: key}}, one per prediction
+
+A chart's key hashes its name, title and payload, so identical charts are stored and
+rendered once however many predictions show them. A prediction folder is named after
+its keys: re-running the same upload lands in the same folder, and two uploads in the
+same second can't collide. Folders from before the store (PNGs, no manifest) are
+still served and swept.
+
+sweep() keeps the store bounded: folders unused for GRAPH_STORE_MAX_AGE_DAYS are
+removed, folders no ai_predictions.graphs_path points to are removed after a grace
+period, then the least recently used folders go until everything fits in
+GRAPH_STORE_MAX_BYTES. Objects no remaining folder uses are deleted with them.
+start_sweeper() runs it in the background every GRAPH_STORE_SWEEP_SECONDS.
+"""
+import asyncio
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+from collections import Counter
+
+import pandas as pd  # type: ignore
+
+# ⚙️ Where the store lives (served at /graphs) and how large / old it may grow.
+GRAPHS_DIR = os.getenv(
+    "GRAPHS_DIR",
+    r"C:\Users\SAPTARSHI MONDAL\Copsight\copsight-police-app\abc\generated_graphs",
+)
+GRAPH_STORE_MAX_BYTES = int(os.getenv("GRAPH_STORE_MAX_BYTES", str(512 * 1024 * 1024)))
+GRAPH_STORE_MAX_AGE_DAYS = float(os.getenv("GRAPH_STORE_MAX_AGE_DAYS", "30"))
+GRAPH_STORE_SWEEP_SECONDS = int(os.getenv("GRAPH_STORE_SWEEP_SECONDS", "600"))
+# Folders are written before their ai_predictions row; unreferenced ones get this long.
+GRAPH_ORPHAN_GRACE_SECONDS = int(os.getenv("GRAPH_ORPHAN_GRACE_SECONDS", "3600"))
+
+# Bump when the charts' look changes so new predictions don't reuse old renders.
+CHART_STYLE_VERSION = "1"
+
+OBJECTS_DIR = ".objects"
+MANIFEST_FILE = "manifest.json"
+# Objects touched this recently may belong to a folder still being written; never sweep them.
+_IN_FLIGHT_SECONDS = 300
+# Last-used times are refreshed at most this often per folder.
+_TOUCH_SECONDS = 60
+
+_lock = threading.Lock()
+_counters = {"sweeps": 0, "folders_removed": 0, "objects_removed": 0, "bytes_removed": 0, "dedup_hits": 0}
+_last_sweep = {}
+_sweeper = None
+
+
+def _bump(counter: str, amount: int = 1):
+    with _lock:
+        _counters[counter] += amount
+
+
+# ---------------------- LAYOUT ----------------------
+
+def chart_key(chart: str, title: str, payload: pd.DataFrame) -> str:
+    digest = hashlib.sha256("|".join([CHART_STYLE_VERSION, chart, title]).encode("utf-8"))
+    digest.update(json.dumps([str(c) for c in payload.columns]).encode("utf-8"))
+    digest.update(pd.util.hash_pandas_object(payload, index=True).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+def object_path(key: str, ext: str) -> str:
+    return os.path.join(GRAPHS_DIR, OBJECTS_DIR, key[:2], f"{key}.{ext}")
+
+
+def folder_path(folder: str):
+    """A prediction folder under GRAPHS_DIR, or None for names that could escape it."""
+    if not folder or folder.startswith(".") or folder != os.path.basename(folder):
+        return None
+    return os.path.join(GRAPHS_DIR, folder)
+
+
+def _write_atomic(path: str, write):
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    write(tmp_path)
+    os.replace(tmp_path, path)
+
+
+def _write_json(data):
+    def write(path):
+        with open(path, "w", encoding="utf-8") as handle:
+            json.dump(data, handle)
+    return write
+
+
+# ---------------------- READ / WRITE ----------------------
+
+def store_prediction(title: str, payloads: dict):
+    """
+    Store a prediction's chart payloads ({chart: frame}). Returns (folder, {chart: key});
+    payloads already in the store are reused, not rewritten.
+    """
+    keys = {chart: chart_key(chart, title, payload) for chart, payload in payloads.items()}
+    for chart, payload in payloads.items():
+        path = object_path(keys[chart], "pkl")
+        if os.path.exists(path):
+            os.utime(path)  # marks it in use for the sweeper
+            _bump("dedup_hits")
+            continue
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        _write_atomic(path, lambda tmp, payload=payload: pd.to_pickle(payload, tmp, compression=None))
+
+    digest = hashlib.sha256("|".join(f"{chart}={key}" for chart, key in keys.items()).encode("utf-8"))
+    folder = f"{title}_{digest.hexdigest()[:16]}"
+    path = folder_path(folder)
+    os.makedirs(path, exist_ok=True)
+    manifest_path = os.path.join(path, MANIFEST_FILE)
+    if not os.path.exists(manifest_path):
+        _write_atomic(manifest_path, _write_json({"title": title, "charts": keys}))
+    os.utime(path)
+    return folder, keys
+
+
+def manifest_path(folder: str):
+    """The folder's manifest, or None (unknown folder, or one from before the store)."""
+    path = folder_path(folder)
+    if path is None:
+        return None
+    path = os.path.join(path, MANIFEST_FILE)
+    return path if os.path.exists(path) else None
+
+
+def read_manifest(folder: str):
+    path = manifest_path(folder)
+    if path is None:
+        return None
+    try:
+        with open(path, "r", encoding="utf-8") as handle:
+            return json.load(handle)
+    except (OSError, ValueError):
+        return None
+
+
+def load_payloads(folder: str):
+    """{"title", "charts": {chart: frame}} for a stored prediction, or None."""
+    manifest = read_manifest(folder)
+    if manifest is None:
+        return None
+    try:
+        charts = {chart: pd.read_pickle(object_path(key, "pkl"), compression=None)
+                  for chart, key in manifest["charts"].items()}
+    except OSError:
+        return None
+    return {"title": manifest["title"], "charts": charts}
+
+
+def touch_folder(folder: str) -> bool:
+    """Mark a folder as just used (for age / LRU eviction). False when it no longer exists."""
+    path = folder_path(folder)
+    try:
+        if time.time() - os.stat(path).st_mtime > _TOUCH_SECONDS:
+            os.utime(path)
+        return True
+    except (OSError, TypeError):
+        return False
+
+
+# ---------------------- EVICTION ----------------------
+
+def _tree_bytes(path: str) -> int:
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.stat(os.path.join(root, name)).st_size
+            except OSError:
+                continue
+    return total
+
+
+def _scan_objects() -> dict:
+    """key → {"bytes", "mtime"} (mtime of the payload, which store_prediction refreshes)."""
+    objects = {}
+    root = os.path.join(GRAPHS_DIR, OBJECTS_DIR)
+    if not os.path.isdir(root):
+        return objects
+    for shard in os.scandir(root):
+        if not shard.is_dir():
+            continue
+        for entry in os.scandir(shard.path):
+            key, ext = os.path.splitext(entry.name)
+            if ext not in (".pkl", ".png"):
+                continue
+            try:
+                stat = entry.stat()
+            except OSError:
+                continue
+            info = objects.setdefault(key, {"bytes": 0, "mtime": 0.0})
+            info["bytes"] += stat.st_size
+            info["mtime"] = max(info["mtime"], stat.st_mtime)
+    return objects
+
+
+def _scan_folders() -> list:
+    folders = []
+    for entry in os.scandir(GRAPHS_DIR):
+        if entry.name == OBJECTS_DIR or not entry.is_dir():
+            continue
+        manifest = read_manifest(entry.name)
+        folders.append({
+            "name": entry.name,
+            "last_used": entry.stat().st_mtime,
+            "keys": set(manifest["charts"].values()) if manifest else set(),
+            "bytes": _tree_bytes(entry.path),
+        })
+    return folders
+
+
+def sweep(referenced=None, now=None) -> dict:
+    """
+    One eviction pass. `referenced` is the set of graphs_path values in ai_predictions;
+    None skips the orphan check. Returns what was removed and what is left.
+    """
+    if not os.path.isdir(GRAPHS_DIR):
+        return {}
+    now = now or time.time()
+    folders = _scan_folders()
+    objects = _scan_objects()
+    refs = Counter(key for folder in folders for key in folder["keys"])
+    max_age = GRAPH_STORE_MAX_AGE_DAYS * 86400
+
+    removed = {"expired": [], "orphan": [], "size": []}
+    kept = []
+    for folder in folders:
+        age = now - folder["last_used"]
+        if max_age and age > max_age:
+            removed["expired"].append(folder)
+        elif referenced is not None and folder["name"] not in referenced and age > GRAPH_ORPHAN_GRACE_SECONDS:
+            removed["orphan"].append(folder)
+        else:
+            kept.append(folder)
+    for folder in removed["expired"] + removed["orphan"]:
+        refs.subtract(folder["keys"])
+
+    # Least recently used folders go first until folders + the objects they use fit.
+    kept.sort(key=lambda f: f["last_used"])
+    total = sum(f["bytes"] for f in kept) + sum(o["bytes"] for k, o in objects.items() if refs[k] > 0)
+    while kept and total > GRAPH_STORE_MAX_BYTES:
+        folder = kept.pop(0)
+        removed["size"].append(folder)
+        total -= folder["bytes"]
+        for key in folder["keys"]:
+            refs[key] -= 1
+            if refs[key] == 0 and key in objects:
+                total -= objects[key]["bytes"]
+
+    freed = 0
+    for folder in removed["expired"] + removed["orphan"] + removed["size"]:
+        shutil.rmtree(os.path.join(GRAPHS_DIR, folder["name"]), ignore_errors=True)
+        freed += folder["bytes"]
+    dropped = 0
+    for key, info in objects.items():
+        if refs[key] > 0 or now - info["mtime"] < _IN_FLIGHT_SECONDS:
+            continue
+        for ext in ("pkl", "png"):
+            try:
+                os.remove(object_path(key, ext))
+            except OSError:
+                continue
+        freed += info["bytes"]
+        dropped += 1
+
+    folders_removed = sum(len(group) for group in removed.values())
+    _bump("sweeps")
+    _bump("folders_removed", folders_removed)
+    _bump("objects_removed", dropped)
+    _bump("bytes_removed", freed)
+    summary = {
+        "at": now,
+        "removed": {reason: len(group) for reason, group in removed.items()},
+        "objects_removed": dropped,
+        "bytes_removed": freed,
+        "folders": len(kept),
+        "objects": sum(1 for key in objects if refs[key] > 0),
+        "bytes": total,
+        "orphan_check": referenced is not None,
+    }
+    with _lock:
+        _last_sweep.clear()
+        _last_sweep.update(summary)
+    if folders_removed or dropped:
+        print(f"✅ Graph store sweep: removed {folders_removed} folder(s), {dropped} object(s), "
+              f"{freed / 2**20:.1f} MB")
+    return summary
+
+
+def referenced_folders():
+    """Folder names ai_predictions.graphs_path points to, or None when the database can't be read."""
+    # Imported here: chart workers import this module and must not open database engines.
+    from db_manager import fetch_graph_paths
+
+    paths = fetch_graph_paths()
+    if paths is None:
+        return None
+    # Rows normally hold the folder name; older ones may hold a full (possibly Windows) path.
+    return {path.replace("\\", "/").rstrip("/").rsplit("/", 1)[-1] for path in paths if path}
+
+
+def sweep_store() -> dict:
+    """sweep() with the orphan check against ai_predictions."""
+    return sweep(referenced_folders())
+
+
+async def _sweep_forever():
+    while True:
+        try:
+            await asyncio.to_thread(sweep_store)
+        except Exception as e:
+            print(f"⚠️ Graph store sweep failed: {e}")
+        await asyncio.sleep(GRAPH_STORE_SWEEP_SECONDS)
+
+
+def start_sweeper():
+    """Start the background eviction task on the running event loop (GRAPH_STORE_SWEEP_SECONDS=0 disables it)."""
+    global _sweeper
+    if _sweeper is None and GRAPH_STORE_SWEEP_SECONDS > 0:
+        _sweeper = asyncio.get_running_loop().create_task(_sweep_forever())
+
+
+def stop_sweeper():
+    global _sweeper
+    if _sweeper is not None:
+        _sweeper.cancel()
+        _sweeper = None
+
+
+def store_stats() -> dict:
+    with _lock:
+        stats = dict(_counters)
+        stats["last_sweep"] = dict(_last_sweep) or None
+    stats["max_bytes"] = GRAPH_STORE_MAX_BYTES
+    stats["max_age_days"] = GRAPH_STORE_MAX_AGE_DAYS
+    stats["sweep_seconds"] = GRAPH_STORE_SWEEP_SECONDS
+    return stats
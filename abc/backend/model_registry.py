@@ -1,19 +1,196 @@
-import joblib
+import hashlib
 import os
+import threading
+import time
+from collections.abc import Mapping
+
+import joblib
+
+import model_store
+
+MODEL_DIR = os.getenv(
+    "MODEL_DIR",
+    "C:\\Users\\SAPTARSHI MONDAL\\Copsight\\copsight-police-app\\abc\\saved_models",
+)
+
+# ⚙️ joblib mmap mode for model arrays ("r" shares them between workers through the
+# page cache; empty disables it). Artifacts are re-checked for changes at most every
+# MODEL_RELOAD_CHECK_SECONDS (negative disables hot reload).
+MODEL_MMAP_MODE = os.getenv("MODEL_MMAP_MODE", "r") or None
+MODEL_RELOAD_CHECK_SECONDS = float(os.getenv("MODEL_RELOAD_CHECK_SECONDS", "2"))
+
+
+def _file_digest(path, chunk_size=1024 * 1024):
+    digest = hashlib.sha256()
+    with open(path, "rb") as handle:
+        for block in iter(lambda: handle.read(chunk_size), b""):
+            digest.update(block)
+    return digest.hexdigest()[:16]
+
+
+def _stat_signature(path):
+    stat = os.stat(path)
+    return stat.st_mtime_ns, stat.st_size
+
+
+class LazyModelRegistry(Mapping):
+    """
+    Read-only mapping of model name → estimator backed by the artifacts in a folder.
+
+    A name resolves to its live version in the model_store manifest, or to the flat
+    <name>.pkl for unversioned models. Models are loaded on first access
+    (memory-mapped when MODEL_MMAP_MODE is set) and reloaded when the resolved file
+    changes: a promotion in the manifest, or a retrained flat artifact dropped in
+    with an atomic rename (os.replace). The swap is a single dict assignment under a
+    lock, so callers see either the old or the new estimator, never a half-loaded one.
+    """
+
+    def __init__(self):
+        self._dir = None
+        self._names = set()
+        self._models = {}      # (name, version or None) → (estimator, path, stat signature)
+        self._digests = {}     # path → (stat signature, digest)
+        self._checked = {}     # name → last time the artifact was re-resolved
+        self._last_scan = 0.0
+        self._lock = threading.RLock()
+
+    # ---------------------- INDEX ----------------------
+
+    @property
+    def model_dir(self):
+        return self._dir
+
+    def configure(self, model_dir):
+        with self._lock:
+            if model_dir != self._dir:
+                self._models.clear()
+                self._digests.clear()
+                self._checked.clear()
+            self._dir = model_dir
+            self._scan()
 
-MODEL_REGISTRY = {}
+    def _scan(self):
+        names = {os.path.splitext(file)[0] for file in os.listdir(self._dir) if file.endswith(".pkl")}
+        names.update(model_store.versioned_names(self._dir))
+        self._names = names
+        self._last_scan = time.monotonic()
 
-def load_models(model_dir="C:\\Users\\SAPTARSHI MONDAL\\Copsight\\copsight-police-app\\abc\\saved_models"):
+    def _maybe_rescan(self):
+        if self._dir is None or MODEL_RELOAD_CHECK_SECONDS < 0:
+            return
+        if time.monotonic() - self._last_scan >= MODEL_RELOAD_CHECK_SECONDS:
+            with self._lock:
+                self._scan()
+
+    # ---------------------- LOADING ----------------------
+
+    def _load(self, key, path):
+        signature = _stat_signature(path)
+        model = joblib.load(path, mmap_mode=MODEL_MMAP_MODE)
+        with self._lock:
+            self._models[key] = (model, path, signature)
+        return model
+
+    def _is_stale(self, name, path, signature):
+        if MODEL_RELOAD_CHECK_SECONDS < 0:
+            return False
+        now = time.monotonic()
+        if now - self._checked.get(name, 0.0) < MODEL_RELOAD_CHECK_SECONDS:
+            return False
+        self._checked[name] = now
+        try:
+            return model_store.resolve(self._dir, name)[0] != path or _stat_signature(path) != signature
+        except OSError:
+            return False  # mid-replace or removed: keep serving the loaded model
+
+    def __getitem__(self, name):
+        self._maybe_rescan()
+        if name not in self._names:
+            raise KeyError(name)
+
+        entry = self._models.get((name, None))
+        if entry is not None:
+            model, path, signature = entry
+            if not self._is_stale(name, path, signature):
+                return model
+            print(f"🔄 Reloading updated model artifact: {name}")
+
+        path, _ = model_store.resolve(self._dir, name)
+        self._checked[name] = time.monotonic()
+        return self._load((name, None), path)
+
+    def load_version(self, name, version_id):
+        """A specific manifest version of a model (e.g. the shadow candidate); versions are immutable."""
+        entry = self._models.get((name, version_id))
+        if entry is not None:
+            return entry[0]
+        path, resolved = model_store.resolve(self._dir, name, version_id)
+        if resolved != version_id:
+            raise KeyError(f"{name}@{version_id}")
+        return self._load((name, version_id), path)
+
+    def candidate(self, name):
+        """(version id, estimator) of the model's shadow candidate, or (None, None)."""
+        version_id = model_store.candidate_version(self._dir, name) if self._dir else None
+        if not version_id:
+            return None, None
+        return version_id, self.load_version(name, version_id)
+
+    def __iter__(self):
+        return iter(sorted(self._names))
+
+    def __len__(self):
+        return len(self._names)
+
+    def __contains__(self, name):
+        return name in self._names
+
+    def preload(self, names=None):
+        """Load the given models (or every indexed model) now instead of on first use."""
+        for name in sorted(self._names) if names is None else names:
+            if name and name in self._names:
+                self[name]
+
+    def loaded(self):
+        return [name for name, version in self._models if version is None]
+
+    def version(self, name):
+        """
+        Live manifest version id of a model; for unversioned models a short SHA-256 of
+        the flat artifact, recomputed only when the file changes.
+        """
+        if self._dir is None or name not in self._names:
+            return None
+        path, version_id = model_store.resolve(self._dir, name)
+        if version_id:
+            return version_id
+        try:
+            signature = _stat_signature(path)
+        except OSError:
+            return None
+        cached = self._digests.get(path)
+        if cached is None or cached[0] != signature:
+            cached = (signature, _file_digest(path))
+            self._digests[path] = cached
+        return cached[1]
+
+
+MODEL_REGISTRY = LazyModelRegistry()
+
+
+def load_models(model_dir=MODEL_DIR, preload=None):
     """
-    Loads all trained models (.pkl) into a registry dictionary.
+    Indexes all trained models (.pkl) in `model_dir`. Models load lazily on first use;
+    pass `preload` (a list of names, or True for all) to load some up front.
     """
-    global MODEL_REGISTRY
-    MODEL_REGISTRY.clear()
+    MODEL_REGISTRY.configure(model_dir)
+    if preload:
+        MODEL_REGISTRY.preload(None if preload is True else preload)
+
+    print(f"✅ Indexed {len(MODEL_REGISTRY)} models ({len(MODEL_REGISTRY.loaded())} loaded).")
+    return MODEL_REGISTRY
 
-    for file in os.listdir(model_dir):
-        if file.endswith(".pkl"):
-            name = os.path.splitext(file)[0]
-            MODEL_REGISTRY[name] = joblib.load(os.path.join(model_dir, file))
 
-    print(f"✅ Loaded {len(MODEL_REGISTRY)} models into registry.")
-    return MODEL_REGISTRY
\ No newline at end of file
+def model_version(name):
+    """Artifact version of a model, or None if it isn't in the registry."""
+    return MODEL_REGISTRY.version(name)
@@ -0,0 +1,204 @@
+"""
+Versioned model artifacts under saved_models/.
+
+    saved_models/
+        conviction_model.pkl                 ← legacy flat artifact (still served if unversioned)
+        manifest.json                        ← live / candidate / history per model
+        versions/conviction_model/<id>.pkl   ← immutable versioned artifacts
+
+CLI:
+    python model_store.py list
+    python model_store.py register conviction_model path/to/new.pkl --features a b c --trained-at 2025-06-01
+    python model_store.py promote conviction_model [<version_id>]
+    python model_store.py candidate conviction_model <version_id|none>
+"""
+import argparse
+import hashlib
+import json
+import os
+import shutil
+from datetime import datetime
+
+MANIFEST_NAME = "manifest.json"
+VERSIONS_DIRNAME = "versions"
+
+_manifest_cache = {}  # model_dir → (stat signature, manifest)
+
+
+def _manifest_path(model_dir):
+    return os.path.join(model_dir, MANIFEST_NAME)
+
+
+def _sha256(path, chunk_size=1024 * 1024):
+    digest = hashlib.sha256()
+    with open(path, "rb") as handle:
+        for block in iter(lambda: handle.read(chunk_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+# ---------------------- MANIFEST ----------------------
+
+def read_manifest(model_dir) -> dict:
+    """Current manifest ({"models": {...}}); re-read only when the file changes."""
+    path = _manifest_path(model_dir)
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return {"models": {}}
+
+    signature = (stat.st_mtime_ns, stat.st_size)
+    cached = _manifest_cache.get(model_dir)
+    if cached and cached[0] == signature:
+        return cached[1]
+
+    with open(path, "r", encoding="utf-8") as handle:
+        manifest = json.load(handle)
+    manifest.setdefault("models", {})
+    _manifest_cache[model_dir] = (signature, manifest)
+    return manifest
+
+
+def write_manifest(model_dir, manifest):
+    """Atomically replace the manifest: readers see the old or the new file, never a partial one."""
+    path = _manifest_path(model_dir)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as handle:
+        json.dump(manifest, handle, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+    _manifest_cache.pop(model_dir, None)
+
+
+def _model_entry(manifest, name):
+    return manifest["models"].setdefault(name, {"live": None, "candidate": None, "previous": None, "versions": {}})
+
+
+# ---------------------- RESOLUTION ----------------------
+
+def versioned_names(model_dir):
+    return [name for name, entry in read_manifest(model_dir)["models"].items() if entry.get("live")]
+
+
+def resolve(model_dir, name, version_id=None):
+    """
+    (artifact path, version id) for a model's live version, or for `version_id`.
+    Unversioned models resolve to the flat saved_models/<name>.pkl with version None.
+    """
+    entry = read_manifest(model_dir)["models"].get(name)
+    version_id = version_id or (entry or {}).get("live")
+    if entry and version_id in entry["versions"]:
+        return os.path.join(model_dir, entry["versions"][version_id]["file"]), version_id
+    return os.path.join(model_dir, f"{name}.pkl"), None
+
+
+def candidate_version(model_dir, name):
+    entry = read_manifest(model_dir)["models"].get(name)
+    return entry.get("candidate") if entry else None
+
+
+def version_info(model_dir, name, version_id):
+    entry = read_manifest(model_dir)["models"].get(name) or {}
+    return entry.get("versions", {}).get(version_id)
+
+
+# ---------------------- REGISTER / PROMOTE ----------------------
+
+def register_version(model_dir, name, source_path, features=None, trained_at=None, candidate=True):
+    """
+    Copy an artifact into versions/<name>/ and record it in the manifest.
+    The first version of a model goes live immediately; later ones become the
+    shadow candidate (unless candidate=False) until promoted.
+    """
+    digest = _sha256(source_path)
+    version_id = f"{datetime.now().strftime('%Y%m%d%H%M%S')}-{digest[:8]}"
+    rel_file = os.path.join(VERSIONS_DIRNAME, name, f"{version_id}.pkl")
+    target = os.path.join(model_dir, rel_file)
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+
+    tmp_target = f"{target}.tmp"
+    shutil.copyfile(source_path, tmp_target)
+    os.replace(tmp_target, target)
+
+    manifest = read_manifest(model_dir)
+    entry = _model_entry(manifest, name)
+    entry["versions"][version_id] = {
+        "file": rel_file.replace(os.sep, "/"),
+        "sha256": digest,
+        "trained_at": trained_at,
+        "registered_at": datetime.now().isoformat(timespec="seconds"),
+        "features": list(features or []),
+    }
+    if entry["live"] is None:
+        entry["live"] = version_id
+    elif candidate:
+        entry["candidate"] = version_id
+    write_manifest(model_dir, manifest)
+    return version_id
+
+
+def promote(model_dir, name, version_id=None):
+    """Make `version_id` (default: the current candidate) live in one manifest swap."""
+    manifest = read_manifest(model_dir)
+    entry = manifest["models"].get(name)
+    if not entry:
+        raise ValueError(f"Unknown model '{name}'")
+    version_id = version_id or entry.get("candidate")
+    if version_id not in entry["versions"]:
+        raise ValueError(f"Unknown version '{version_id}' for model '{name}'")
+
+    entry["previous"], entry["live"] = entry["live"], version_id
+    if entry.get("candidate") == version_id:
+        entry["candidate"] = None
+    write_manifest(model_dir, manifest)
+    return version_id
+
+
+def set_candidate(model_dir, name, version_id):
+    """Select (or clear, with None) the version scored in shadow mode."""
+    manifest = read_manifest(model_dir)
+    entry = manifest["models"].get(name)
+    if not entry:
+        raise ValueError(f"Unknown model '{name}'")
+    if version_id is not None and version_id not in entry["versions"]:
+        raise ValueError(f"Unknown version '{version_id}' for model '{name}'")
+    entry["candidate"] = version_id
+    write_manifest(model_dir, manifest)
+
+
+def main():
+    from model_registry import MODEL_DIR
+
+    parser = argparse.ArgumentParser(description="Manage versioned model artifacts.")
+    parser.add_argument("--model-dir", default=MODEL_DIR)
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("list")
+    reg = sub.add_parser("register")
+    reg.add_argument("name")
+    reg.add_argument("path")
+    reg.add_argument("--features", nargs="*", default=[])
+    reg.add_argument("--trained-at")
+    reg.add_argument("--no-candidate", action="store_true")
+    pro = sub.add_parser("promote")
+    pro.add_argument("name")
+    pro.add_argument("version", nargs="?")
+    cand = sub.add_parser("candidate")
+    cand.add_argument("name")
+    cand.add_argument("version")
+    args = parser.parse_args()
+
+    if args.command == "list":
+        print(json.dumps(read_manifest(args.model_dir), indent=2))
+    elif args.command == "register":
+        version_id = register_version(args.model_dir, args.name, args.path, args.features,
+                                      args.trained_at, candidate=not args.no_candidate)
+        print(f"✅ Registered {args.name} {version_id}")
+    elif args.command == "promote":
+        print(f"✅ {args.name} live version is now {promote(args.model_dir, args.name, args.version)}")
+    elif args.command == "candidate":
+        version_id = None if args.version.lower() == "none" else args.version
+        set_candidate(args.model_dir, args.name, version_id)
+        print(f"✅ {args.name} shadow candidate set to {version_id}")
+
+
+if __name__ == "__main__":
+    main()
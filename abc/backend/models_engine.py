@@ -1,13 +1,32 @@
+import asyncio
+import json
+import time
 import pandas as pd  # type: ignore
 import numpy as np  # type: ignore
-from model_registry import MODEL_REGISTRY
-from feature_builder import *   # ✅ fixed import
-from prophet import Prophet  # type: ignore
+from model_registry import model_version
+from compact_models import predictor_for
+from csv_ingest import IngestError, ingest_summary, iter_dataset, new_report, read_dataset
+from dataset_registry import DATASETS_BY_NAME, detect_dataset, read_csv_header
+from executors import run_cpu, run_io
+from feature_cache import cached_features
+from result_cache import cache_key, get_cached_result, store_result
+from pendency_forecast import (
+    DEFAULT_ENGINE, DEFAULT_FREQ, DEFAULT_PERIODS, run_forecast, validate_engine, validate_horizon,
+)
 from report_generator import generate_analysis_report
-from visualizer import generate_graphs
+from visualizer import publish_graphs, publish_graphs_async
+from graph_store import touch_folder
 from db_manager import save_prediction_to_db
+from shadow_eval import submit_shadow, wants_shadow
 import os
-from geo_mapper import get_geo_location
+from geo_mapper import locate_districts
+
+# Rows per chunk when run_inference is called with stream=True.
+STREAM_CHUNK_ROWS = int(os.getenv("PREDICT_STREAM_CHUNK_ROWS", "50000"))
+
+# Build features in feature_builder's compact mode (int32/float32 columns, categorical
+# district, period month, only the columns downstream stages use).
+COMPACT_FEATURES = os.getenv("FEATURE_COMPACT_MODE", "0").lower() in ("1", "true", "yes")
 
 
 def _normalise_predictions(preds):
@@ -33,260 +52,426 @@ def _extract_month(df_row):
     return str(month)
 
 
-def _determine_band(efficiency: float) -> str:
-    if efficiency >= 85:
-        return "high"
-    if efficiency >= 75:
-        return "moderate"
-    return "watch"
+def _month_strings(month: pd.Series) -> pd.Series:
+    """Vectorised _extract_month: "%Y-%m" for datetimes, str() otherwise, None when missing."""
+    if pd.api.types.is_datetime64_any_dtype(month) or isinstance(month.dtype, pd.PeriodDtype):
+        out = month.dt.strftime("%Y-%m")
+    else:
+        out = month.map(_extract_month, na_action="ignore")
+    return out.astype(object).where(out.notna(), None)
+
+
+def _determine_bands(efficiency: np.ndarray) -> np.ndarray:
+    return np.select([efficiency >= 85, efficiency >= 75], ["high", "moderate"], default="watch")
 
 
 def _build_map_points(dataset_label: str, df_proc: pd.DataFrame, preds) -> list:
+    """
+    One map point per district, taken from its latest month.
+
+    District keys are normalised once, coordinates come from a single vectorised
+    lookup, and the latest row per district is picked with groupby/idxmax over month
+    ranks (first occurrence wins ties; rows without a month rank lowest).
+    """
     if "district" not in df_proc.columns:
         return []
 
+    raw = np.array(preds, dtype=float).flatten()
     normalised = _normalise_predictions(preds)
-    results = {}
-
-    for idx, (district, normalised_score, raw_score) in enumerate(
-        zip(df_proc["district"], normalised, np.array(preds).flatten())
-    ):
-        if pd.isna(district):
-            continue
-
-        location = get_geo_location(str(district))
-        if not location:
-            continue
+    n = min(len(df_proc), len(raw))
+    if n == 0:
+        return []
 
-        month_value = None
-        if "month" in df_proc.columns:
-            month_col_value = df_proc.iloc[idx]["month"]
-            month_value = _extract_month(month_col_value)
+    district = df_proc["district"].iloc[:n].reset_index(drop=True)
+    location = locate_districts(district)
+    frame = pd.DataFrame({
+        "district": district.astype(str),
+        "key": district.astype(str).str.strip().str.lower(),
+        "lat": location["lat"].to_numpy(),
+        "lng": location["lng"].to_numpy(),
+        "state": location["state"].to_numpy(),
+        "efficiency": normalised[:n],
+        "raw_score": raw[:n],
+    })
+    if "month" in df_proc.columns:
+        frame["month"] = _month_strings(df_proc["month"].iloc[:n].reset_index(drop=True))
+    else:
+        frame["month"] = None
 
-        band = _determine_band(float(normalised_score))
+    frame = frame[district.notna().to_numpy() & frame["lat"].notna().to_numpy()]
+    if frame.empty:
+        return []
 
-        payload = {
-            "district": str(district),
-            "state": location.get("state"),
-            "latitude": float(location["lat"]),
-            "longitude": float(location["lng"]),
-            "efficiency": float(normalised_score),
+    # Month strings sort chronologically ("YYYY-MM"); rank them so idxmax can pick the latest.
+    months = frame["month"]
+    ranks = pd.Series(-1, index=frame.index)
+    present = months.notna()
+    if present.any():
+        ranks[present] = pd.factorize(months[present], sort=True)[0]
+    latest = frame.loc[ranks.groupby(frame["key"], sort=False).idxmax().to_numpy()]
+
+    bands = _determine_bands(latest["efficiency"].to_numpy())
+    category = dataset_label.replace("_", " ")
+    return [
+        {
+            "district": district_name,
+            "state": state,
+            "latitude": float(lat),
+            "longitude": float(lng),
+            "efficiency": float(efficiency),
             "raw_score": float(raw_score),
             "dataset": dataset_label,
-            "category": dataset_label.replace("_", " "),
-            "month": month_value,
-            "band": band,
+            "category": category,
+            "month": month,
+            "band": str(band),
         }
+        for district_name, state, lat, lng, efficiency, raw_score, month, band in zip(
+            latest["district"], latest["state"], latest["lat"], latest["lng"],
+            latest["efficiency"], latest["raw_score"], latest["month"], bands,
+        )
+    ]
+
+
+def _forecast_options(options) -> dict:
+    """Fill in and validate the forecast horizon and engine for the CrimePendency pipeline."""
+    options = dict(options or {})
+    periods, freq = validate_horizon(options.get("periods", DEFAULT_PERIODS), options.get("freq", DEFAULT_FREQ))
+    engine = validate_engine(options.get("engine", DEFAULT_ENGINE), freq)
+    return {"periods": periods, "freq": freq, "engine": engine}
+
+
+def _predict_features(model, X, features, df_proc):
+    start = time.perf_counter()
+    preds = model.predict(X)
+    predict_ms = (time.perf_counter() - start) * 1000
+    return X, df_proc, preds, features, predict_ms
 
-        key = str(district).strip().lower()
-        existing = results.get(key)
-        if existing is None:
-            results[key] = payload
-        else:
-            existing_month = existing.get("month")
-            if month_value and (existing_month is None or month_value > existing_month):
-                results[key] = payload
 
-    return list(results.values())
+def _predict_frame(spec: dict, model, df: pd.DataFrame):
+    X, features, df_proc = spec["builder"](df, compact=COMPACT_FEATURES)
+    return _predict_features(model, X, features, df_proc)
 
 
-def run_inference(csv_path, single_input=None):
+def _predict_stream(spec: dict, model, csv_path: str, chunksize: int, report: dict, keep_x: bool = False):
     """
-    Auto-detects dataset type and runs prediction using the correct model.
-    Works for all 10 datasets.
+    Chunked variant of _predict_frame.
+
+    Each chunk goes through the feature builder and model.predict on its own, so the
+    working set is bounded by `chunksize`. Only the columns downstream stages need
+    (district, month, model features, target) are kept from every chunk.
+
+    Builders with carry_over derive their target from the district's next row, which
+    may live in a later chunk. The last row of every district seen so far is therefore
+    prepended to the next chunk: the builder drops it (no successor yet) in one chunk
+    and emits it, now with its target filled in, in the next one. iter_dataset keeps a
+    running index across chunks, so sorting by it restores the original row order.
+    Blank and rejected rows are counted into `report`. The model input X is only
+    collected (for shadow scoring) when `keep_x` is set; otherwise None is returned.
+    """
+    frames, pred_parts, x_parts = [], [], []
+    carry = None
+    features, predict_ms = [], 0.0
+
+    for chunk in iter_dataset(csv_path, spec, chunksize, report):
+        if carry is not None and len(carry):
+            chunk = pd.concat([carry, chunk])
+        if spec["carry_over"]:
+            carry = chunk.groupby("district", sort=False).tail(1)
+
+        X, features, df_proc = spec["builder"](chunk, compact=COMPACT_FEATURES)
+        if len(X) == 0:
+            continue
+
+        start = time.perf_counter()
+        pred_parts.append(pd.Series(np.asarray(model.predict(X)).ravel(), index=X.index))
+        predict_ms += (time.perf_counter() - start) * 1000
+        if keep_x:
+            x_parts.append(X)
+        keep = [c for c in ("district", "month") if c in df_proc.columns] + features
+        if "target_efficiency" in df_proc.columns:
+            keep.append("target_efficiency")
+        frames.append(df_proc[list(dict.fromkeys(keep))])
+
+    if not frames:
+        return None, pd.DataFrame(), np.array([]), features, predict_ms
+
+    df_proc = pd.concat(frames).sort_index()
+    preds = pd.concat(pred_parts).sort_index().to_numpy()
+    X = pd.concat(x_parts).sort_index() if keep_x else None
+    return X, df_proc, preds, features, predict_ms
+
+
+def _run_model_pipeline(spec: dict, df_proc: pd.DataFrame, preds, file_name: str, version=None) -> dict:
+    graphs_info = publish_graphs(spec["graph_label"], df_proc, preds)
+    report = generate_analysis_report(spec["graph_label"], df_proc, preds)
+    save_prediction_to_db(spec["db_label"], file_name, preds, report, graphs_info["folder"], model_version=version)
+    map_points = _build_map_points(spec["label"], df_proc, preds)
+    return _model_payload(df_proc, preds, report, graphs_info, map_points)
+
+
+def _model_payload(df_proc: pd.DataFrame, preds, report, graphs_info, map_points) -> dict:
+    return {
+        "predictions": preds.tolist(),
+        "districts": df_proc["district"].tolist() if "district" in df_proc.columns else [],
+        "analysis_report": report,
+        "graphs": graphs_info,
+        "map_points": map_points,
+    }
+
+
+def _forecast_payload(scored: dict) -> dict:
+    return {"forecast": scored["forecast"], "forecast_engine": scored["forecast_engine"]}
+
+
+def _finalise_result(spec: dict, result: dict, ingest=None) -> dict:
+    result = {"dataset": spec["label"], **result}
+    if ingest:
+        result["ingest"] = ingest
+    if spec["postprocess"]:
+        result = spec["postprocess"](result)
+    return result
+
+
+def _lookup_cached_result(csv_path, forecast_options=None):
+    """Return (cache_key, cached_result); both None when the upload can't be cached."""
+    if not csv_path:
+        return None, None
+    spec = detect_dataset(read_csv_header(csv_path), csv_path=csv_path)
+    if spec is None:
+        return None, None
+    variant = ""
+    if spec["pipeline"] == "forecast":
+        variant = json.dumps(_forecast_options(forecast_options), sort_keys=True)
+    key = cache_key(csv_path, spec, variant)
+    cached = get_cached_result(key)
+    # A result whose graph folder has been swept from the graph store is stale.
+    if cached is not None and cached.get("graphs") and not touch_folder(cached["graphs"]["folder"]):
+        return key, None
+    return key, cached
+
+
+def score_dataset(csv_path, single_input=None, stream=False, chunksize=None, forecast_options=None) -> dict:
+    """
+    CPU stage of the pipeline: detect the dataset, read it, build features and predict
+    (or fit the pendency forecast). Module-level and picklable so it can run in the
+    inference process pool.
+
+    The model comes from compact_models.predictor_for, so INFERENCE_BACKEND=numpy
+    scores with the compiled arrays instead of estimator.predict.
+
+    CSVs are read through csv_ingest (typed schema columns only, blank rows dropped,
+    bad rows rejected); "ingest" summarises what was dropped, or is None.
+
+    Returns {"status": "error", ...}, {"name", "forecast", "ingest"} or
+    {"name", "df_proc", "preds", "features", "X", "model_version", "predict_ms", "ingest"}.
+    "X" is the exact model input, kept only when a shadow candidate will score it
+    (None otherwise, so it isn't pickled back from the pool for nothing).
     """
+    df = None
     if csv_path:
-        df = pd.read_csv(csv_path)
-    elif single_input:
+        spec = detect_dataset(read_csv_header(csv_path), csv_path=csv_path)
+    else:
         df = pd.DataFrame([single_input])
+        spec = detect_dataset(df.columns, df=df)
+
+    # 🚨 Unknown Dataset
+    if spec is None:
+        return {"status": "error", "message": "❌ Unknown dataset structure"}
+
+    stream = bool(stream and csv_path)
+    chunksize = chunksize or STREAM_CHUNK_ROWS
+    report = new_report()
+    try:
+        return _score_spec(spec, csv_path, df, stream, chunksize, forecast_options, report)
+    except IngestError as e:
+        return {"status": "error", "message": str(e), "ingest": e.report}
+
+
+def _score_spec(spec, csv_path, df, stream, chunksize, forecast_options, report) -> dict:
+    """score_dataset once the dataset is known; `df` is the single-input frame, if any."""
+    if spec["pipeline"] == "forecast":
+        if csv_path and stream:
+            df = pd.concat(iter_dataset(csv_path, spec, chunksize, report), ignore_index=True)
+        elif csv_path:
+            df, report = read_dataset(csv_path, spec)
+        options = _forecast_options(forecast_options)
+        forecast = run_forecast(df, periods=options["periods"], freq=options["freq"], engine=options["engine"])
+        return {"name": spec["name"], "forecast": forecast, "forecast_engine": options["engine"],
+                "ingest": ingest_summary(report)}
+
+    model = predictor_for(spec["model_key"])
+    if model is None:
+        return {"status": "error", "message": f"⚠️ Model '{spec['model_key']}' is not loaded"}
+
+    keep_x = wants_shadow(spec)
+    if stream:
+        X, df_proc, preds, features, predict_ms = _predict_stream(spec, model, csv_path, chunksize, report, keep_x)
+    elif csv_path:
+        # Unchanged files skip CSV parsing and feature building via the Arrow feature cache.
+        X, features, df_proc = cached_features(csv_path, spec, compact=COMPACT_FEATURES)
+        report = df_proc.attrs.get("ingest", report)
+        X, df_proc, preds, features, predict_ms = _predict_features(model, X, features, df_proc)
     else:
+        X, df_proc, preds, features, predict_ms = _predict_frame(spec, model, df)
+    return {
+        "name": spec["name"],
+        "df_proc": df_proc,
+        "preds": preds,
+        "features": list(features),
+        "X": X if keep_x else None,
+        "model_version": model_version(spec["model_key"]),
+        "predict_ms": predict_ms,
+        "ingest": ingest_summary(report),
+    }
+
+
+def run_inference(csv_path, single_input=None, file_name=None, stream=False, chunksize=None,
+                  forecast_options=None):
+    """
+    Auto-detects dataset type from DATASET_REGISTRY and runs prediction using the correct model.
+    Works for all 10 datasets.
+    With stream=True the CSV is read and scored in chunks of `chunksize` rows
+    (default STREAM_CHUNK_ROWS) instead of being loaded whole.
+    forecast_options ({"periods", "freq", "engine"}) sets the CrimePendency forecast horizon and engine.
+    """
+    if not csv_path and not single_input:
         return {"status": "error", "message": "No input provided"}
-    cols = set(df.columns)
+    if file_name is None:
+        file_name = os.path.basename(csv_path) if csv_path else "single_input"
 
     try:
-        # 1️⃣ Convictions → Performance Model
-        if {"ipc_trials", "ipc_convictions", "sll_trials"}.issubset(cols):
-            model = MODEL_REGISTRY.get("conviction_model")
-            X, _, df_proc = create_conviction_features(df)
-            preds = model.predict(X)
-            graphs_info = generate_graphs("Convictions", df_proc, preds)
-            report = generate_analysis_report("Convictions", df_proc, preds)
-            save_prediction_to_db("Convictions", os.path.basename(csv_path), preds, report, graphs_info["folder"])
-            map_points = _build_map_points("Convictions", df_proc, preds)
-            return {
-                "dataset": "Convictions",
-                "predictions": preds.tolist(),
-                "districts": df_proc["district"].tolist() if "district" in df_proc.columns else [],
-                "analysis_report": report,
-                "graphs": graphs_info,
-                "map_points": map_points,
-            }
-
-        # 2️⃣ Crime Pendency → Prophet Forecast
-        elif {"pendency_percent", "target_close"}.issubset(cols):
-            results = {}
-            for district in df["district"].unique():
-                district_df = df[df["district"] == district]
-                if len(district_df) < 3:
-                    continue
-                m = Prophet(daily_seasonality=False, weekly_seasonality=False, yearly_seasonality=True)
-                district_df["ds"] = pd.to_datetime(district_df["month"], format="%Y-%m")
-                district_df["y"] = district_df["pendency_percent"]
-                m.fit(district_df[["ds", "y"]])
-                future = m.make_future_dataframe(periods=3, freq="MS")
-                forecast = m.predict(future)
-                results[district] = forecast[["ds", "yhat"]].tail(3).to_dict(orient="records")
-            return {"dataset": "CrimePendancy", "forecast": results}
-
-        # 3️⃣ Excise Act → Efficiency Model
-        elif {"cases_registered", "persons_arrested"}.issubset(cols) and "details_of_seizure" in cols:
-            # Distinguish from OPG by keyword check
-            if "fermented wash" in str(df["details_of_seizure"].iloc[0]).lower():
-                model = MODEL_REGISTRY.get("excise_efficiency_model")
-                X, _, df_proc = create_excise_features(df)
-                preds = model.predict(X)
-                graphs_info = generate_graphs("Fermented_wash", df_proc, preds)
-                report = generate_analysis_report("Fermented_wash", df_proc, preds)
-                save_prediction_to_db("Excise_Act", os.path.basename(csv_path), preds, report, graphs_info["folder"])
-                map_points = _build_map_points("Excise_Act", df_proc, preds)
-                return {
-                    "dataset": "Excise_Act",
-                    "predictions": preds.tolist(),
-                    "districts": df_proc["district"].tolist() if "district" in df_proc.columns else [],
-                    "analysis_report": report,
-                    "graphs": graphs_info["files"],
-                    "map_points": map_points,
-                }
-
-        # 4️⃣ Firearms → Efficiency Model
-        elif {"gun_rifle", "pistol", "ammunition"}.issubset(cols):
-            model = MODEL_REGISTRY.get("firearms_efficiency_model")
-            X, _, df_proc = create_firearms_features(df)
-            preds = model.predict(X)
-            graphs_info = generate_graphs("Firearms", df_proc, preds)
-            report = generate_analysis_report("Firearms", df_proc, preds)
-            save_prediction_to_db("Firearms", os.path.basename(csv_path), preds, report, graphs_info["folder"])
-            map_points = _build_map_points("Firearms_Drive", df_proc, preds)
-            return {
-                "dataset": "Firearms_Drive",
-                "predictions": preds.tolist(),
-                "districts": df_proc["district"].tolist() if "district" in df_proc.columns else [],
-                "analysis_report": report,
-                "graphs": graphs_info,
-                "map_points": map_points,
-            }
-
-        # 5️⃣ Missing Persons → Recovery Efficiency
-        elif {"missing_boys_start", "traced_boys"}.issubset(cols):
-            model = MODEL_REGISTRY.get("missing_persons_efficiency_model")
-            X, _, df_proc = create_missing_features(df)
-            preds = model.predict(X)
-            graphs_info = generate_graphs("MissingPersons", df_proc, preds)
-            report = generate_analysis_report("MissingPersons", df_proc, preds)
-            save_prediction_to_db("MissingPersons", os.path.basename(csv_path), preds, report, graphs_info["folder"])
-            map_points = _build_map_points("MissingPersons_Drive", df_proc, preds)
-            return {
-                "dataset": "MissingPersons_Drive",
-                "predictions": preds.tolist(),
-                "districts": df_proc["district"].tolist() if "district" in df_proc.columns else [],
-                "analysis_report": report,
-                "graphs": graphs_info,
-                "map_points": map_points,
-            }
-
-        # 6️⃣ NBW Drive → Execution Efficiency
-        elif {"nbw_pending_start", "nbw_received", "nbw_executed_drive"}.issubset(cols) and "ganja_kg" not in cols:
-            model = MODEL_REGISTRY.get("nbw_efficiency_model")
-            X, _, df_proc = create_nbw_features(df)
-            preds = model.predict(X)
-            graphs_info = generate_graphs("NBW", df_proc, preds)
-            report = generate_analysis_report("NBW", df_proc, preds)
-            save_prediction_to_db("NBW", os.path.basename(csv_path), preds, report, graphs_info["folder"])
-            map_points = _build_map_points("NBW_Drive", df_proc, preds)
-            return {
-                "dataset": "NBW_Drive",
-                "predictions": preds.tolist(),
-                "districts": df_proc["district"].tolist() if "district" in df_proc.columns else [],
-                "analysis_report": report,
-                "graphs": graphs_info,
-                "map_points": map_points,
-            }
-
-        # 7️⃣ Narcotics Drive → Operations Efficiency
-        elif {"ganja_kg", "brownsugar_g", "cough_syrup_bottles"}.issubset(cols):
-            model = MODEL_REGISTRY.get("narcotics_efficiency_model")
-            X, _, df_proc = create_narcotics_features(df)
-            preds = model.predict(X)
-            graphs_info = generate_graphs("Narcotics", df_proc, preds)
-            report = generate_analysis_report("Narcotics", df_proc, preds)
-            save_prediction_to_db("Narcotics", os.path.basename(csv_path), preds, report, graphs_info["folder"])
-            map_points = _build_map_points("Narcotics_Drive", df_proc, preds)
-            return {
-                "dataset": "Narcotics_Drive",
-                "predictions": preds.tolist(),
-                "districts": df_proc["district"].tolist() if "district" in df_proc.columns else [],
-                "analysis_report": report,
-                "graphs": graphs_info,
-                "map_points": map_points,
-            }
-
-        # 8️⃣ OPG Act → Cash/Mobile Seizure Efficiency
-        elif {"details_of_seizure"}.issubset(cols) and "mobile" in str(df["details_of_seizure"].iloc[0]).lower():
-            model = MODEL_REGISTRY.get("opg_efficiency_model")
-            X, _, df_proc = create_opg_features(df)
-            preds = model.predict(X)
-            graphs_info = generate_graphs("OPG_Act", df_proc, preds)
-            report = generate_analysis_report("OPG_Act", df_proc, preds)
-            save_prediction_to_db("OPG_Act", os.path.basename(csv_path), preds, report, graphs_info["folder"])
-            map_points = _build_map_points("OPG_Act", df_proc, preds)
-            return {
-                "dataset": "OPG_Act",
-                "predictions": preds.tolist(),
-                "districts": df_proc["district"].tolist() if "district" in df_proc.columns else [],
-                "analysis_report": report,
-                "graphs": graphs_info,
-                "map_points": map_points,
-            }
-
-        # 9️⃣ Preventive Measures → Law Enforcement Efficiency
-        elif {"notice_129_bnss", "bound_126_bnss"}.issubset(cols):
-            model = MODEL_REGISTRY.get("preventive_efficiency_model")
-            X, _, df_proc = create_preventive_features(df)
-            preds = model.predict(X)
-            graphs_info = generate_graphs("PreventiveMeasures", df_proc, preds)
-            report = generate_analysis_report("PreventiveMeasures", df_proc, preds)
-            save_prediction_to_db("PreventiveMeasures", os.path.basename(csv_path), preds, report, graphs_info["folder"])
-            map_points = _build_map_points("PreventiveMeasures", df_proc, preds)
-            return {
-                "dataset": "PreventiveMeasures",
-                "predictions": preds.tolist(),
-                "districts": df_proc["district"].tolist() if "district" in df_proc.columns else [],
-                "analysis_report": report,
-                "graphs": graphs_info,
-                "map_points": map_points,
-            }
-
-        # 🔟 Sand Mining → Resource Efficiency
-        elif {"vehicles_seized", "notices_served"}.issubset(cols):
-            model = MODEL_REGISTRY.get("sand_mining_efficiency_model")
-            X, _, df_proc = create_mining_features(df)
-            preds = model.predict(X)
-            graphs_info = generate_graphs("Sand_Mining", df_proc, preds)
-            report = generate_analysis_report("Sand_Mining", df_proc, preds)
-            save_prediction_to_db("Sand_Mining", os.path.basename(csv_path), preds, report, graphs_info["folder"])
-            map_points = _build_map_points("SandMining", df_proc, preds)
-            return {
-                "dataset": "SandMining",
-                "predictions": preds.tolist(),
-                "districts": df_proc["district"].tolist() if "district" in df_proc.columns else [],
-                "analysis_report": report,
-                "graphs": graphs_info,
-                "map_points": map_points,
-            }
-
-        # 🚨 Unknown Dataset
+        key, cached = _lookup_cached_result(csv_path, forecast_options)
+        if cached is not None:
+            return {**cached, "cached": True}
+
+        scored = score_dataset(csv_path, single_input, stream=stream, chunksize=chunksize,
+                               forecast_options=forecast_options)
+        if scored.get("status") == "error":
+            return scored
+
+        spec = DATASETS_BY_NAME[scored["name"]]
+        if "forecast" in scored:
+            result = _finalise_result(spec, _forecast_payload(scored), scored["ingest"])
         else:
-            return {"status": "error", "message": "❌ Unknown dataset structure"}
+            submit_shadow(spec, scored, file_name)
+            result = _run_model_pipeline(spec, scored["df_proc"], scored["preds"], file_name,
+                                         scored["model_version"])
+            result = _finalise_result(spec, result, scored["ingest"])
+        if key:
+            store_result(key, result)
+        return result
+
+    except Exception as e:
+        return {"status": "error", "message": f"⚠️ Inference failed: {str(e)}"}
+
+
+# Stages reported to on_stage callbacks, in the order they start.
+PIPELINE_STAGES = ("score", "map_points", "graphs", "report", "save")
+
+
+async def run_inference_staged(csv_path, single_input=None, file_name=None, stream=False,
+                               chunksize=None, forecast_options=None, on_stage=None):
+    """
+    Staged version of run_inference_async.
+
+    on_stage(stage, state, payload) is called as each stage of PIPELINE_STAGES moves
+    through "running" → "done" / "failed" / "skipped". `payload` holds the part of the
+    response that stage produced, so callers can publish predictions and map points
+    while graphs and the LLM report are still being built.
+    """
+    def notify(stage, state, payload=None):
+        if on_stage is not None:
+            on_stage(stage, state, payload or {})
+
+    if not csv_path and not single_input:
+        return {"status": "error", "message": "No input provided"}
+    if file_name is None:
+        file_name = os.path.basename(csv_path) if csv_path else "single_input"
+
+    stage = "score"
+    try:
+        key, cached = await run_io(_lookup_cached_result, csv_path, forecast_options)
+        if cached is not None:
+            # Identical upload against the same model version: replay every stage from the cache.
+            for cached_stage in PIPELINE_STAGES:
+                notify(cached_stage, "done", cached if cached_stage == "score" else None)
+            return {**cached, "cached": True}
+
+        notify(stage, "running")
+        scored = await run_cpu(score_dataset, csv_path, single_input, stream=stream, chunksize=chunksize,
+                               forecast_options=forecast_options)
+        if scored.get("status") == "error":
+            notify(stage, "failed", scored)
+            return scored
+
+        spec = DATASETS_BY_NAME[scored["name"]]
+        if "forecast" in scored:
+            result = _finalise_result(spec, _forecast_payload(scored), scored["ingest"])
+            notify(stage, "done", result)
+            for skipped in PIPELINE_STAGES[1:]:
+                notify(skipped, "skipped")
+            if key:
+                await run_io(store_result, key, result)
+            return result
+
+        df_proc, preds = scored["df_proc"], scored["preds"]
+        submit_shadow(spec, scored, file_name)
+        notify(stage, "done", {
+            "dataset": spec["label"],
+            "predictions": preds.tolist(),
+            "districts": df_proc["district"].tolist() if "district" in df_proc.columns else [],
+        })
+
+        stage = "map_points"
+        notify(stage, "running")
+        map_points = await run_cpu(_build_map_points, spec["label"], df_proc, preds)
+        notify(stage, "done", {"map_points": map_points})
+
+        async def _concurrent_stage(name, key, work):
+            notify(name, "running")
+            try:
+                value = await work
+            except Exception as e:
+                notify(name, "failed", {"message": str(e)})
+                raise
+            notify(name, "done", {key: value})
+            return value
+
+        # Graphs and report report their own failures.
+        stage = None
+        graphs_info, report = await asyncio.gather(
+            # Only stores the chart data unless LAZY_GRAPHS=0; /graphs renders on first request.
+            _concurrent_stage("graphs", "graphs", publish_graphs_async(spec["graph_label"], df_proc, preds)),
+            _concurrent_stage("report", "analysis_report",
+                              run_io(generate_analysis_report, spec["graph_label"], df_proc, preds)),
+        )
+
+        stage = "save"
+        notify(stage, "running")
+        await run_io(save_prediction_to_db, spec["db_label"], file_name, preds, report, graphs_info["folder"],
+                     model_version=scored["model_version"])
+        notify(stage, "done")
+
+        result = _finalise_result(spec, _model_payload(df_proc, preds, report, graphs_info, map_points),
+                                  scored["ingest"])
+        if key:
+            await run_io(store_result, key, result)
+        return result
 
     except Exception as e:
-        return {"status": "error", "message": f"⚠️ Inference failed: {str(e)}"}
\ No newline at end of file
+        error = {"status": "error", "message": f"⚠️ Inference failed: {str(e)}"}
+        if stage is not None:
+            notify(stage, "failed", error)
+        return error
+
+
+async def run_inference_async(csv_path, single_input=None, file_name=None, stream=False, chunksize=None,
+                              forecast_options=None):
+    """
+    Same contract as run_inference, but keeps the event loop free: scoring and map
+    building run in the inference process pool, and the Gemini report and the Postgres
+    insert run in the I/O thread pool. Charts are rendered on their first /graphs
+    request (or, with LAZY_GRAPHS=0, in parallel in the chart pool alongside the report).
+    """
+    return await run_inference_staged(csv_path, single_input, file_name=file_name, stream=stream,
+                                      chunksize=chunksize, forecast_options=forecast_options)
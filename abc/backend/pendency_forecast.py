@@ -0,0 +1,350 @@
+import hashlib
+import json
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import numpy as np  # type: ignore
+import pandas as pd  # type: ignore
+
+from result_cache import evict_lru
+
+# ⚙️ Per-district Prophet fits are spread across this many processes (0 = fit serially).
+# Inside inference workers the same number of threads is used instead.
+FORECAST_POOL_WORKERS = int(os.getenv("FORECAST_POOL_WORKERS", str(max(1, (os.cpu_count() or 2) // 2))))
+FORECAST_CACHE_DIR = os.getenv(
+    "FORECAST_CACHE_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "forecast_cache"),
+)
+# ⚙️ Fitted-model cache limits; the least recently used models are evicted past either.
+FORECAST_CACHE_MAX_BYTES = int(os.getenv("FORECAST_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+FORECAST_CACHE_MAX_ENTRIES = int(os.getenv("FORECAST_CACHE_MAX_ENTRIES", "5000"))
+
+DEFAULT_PERIODS = 3
+DEFAULT_FREQ = "MS"
+MAX_PERIODS = 36
+
+# "prophet" fits one Stan model per district; the others are vectorised over all districts.
+FORECAST_ENGINES = ("prophet", "holt_winters", "seasonal_naive")
+DEFAULT_ENGINE = os.getenv("FORECAST_ENGINE", "prophet")
+# The vectorised engines emit month-start dates, so they only serve "MS".
+MONTHLY_FREQS = {"MS"}
+# Aliases pandas 3 no longer accepts (pandas 2 only warns, so they are refused up front).
+REMOVED_FREQS = {"M": "ME"}
+SEASON_LENGTH = 12
+
+# Part of every cache key: changing the model settings invalidates cached fits.
+PROPHET_SETTINGS = {"daily_seasonality": False, "weekly_seasonality": False, "yearly_seasonality": True}
+
+_pool = None
+_in_worker = False
+
+
+def validate_horizon(periods, freq):
+    """Return (periods, freq) or raise ValueError for an unusable horizon."""
+    periods = int(periods)
+    if not 1 <= periods <= MAX_PERIODS:
+        raise ValueError(f"forecast periods must be between 1 and {MAX_PERIODS}")
+    pd.tseries.frequencies.to_offset(freq)
+    return periods, freq
+
+
+def validate_engine(engine, freq=DEFAULT_FREQ):
+    """Return the engine name or raise ValueError if it is unknown or can't produce `freq`."""
+    if engine not in FORECAST_ENGINES:
+        raise ValueError(f"forecast engine must be one of {', '.join(FORECAST_ENGINES)}")
+    if freq in REMOVED_FREQS:
+        raise ValueError(f"forecast freq '{freq}' is no longer supported; use '{REMOVED_FREQS[freq]}' or 'MS'")
+    if engine != "prophet" and freq not in MONTHLY_FREQS:
+        raise ValueError(f"the {engine} engine forecasts month-start dates; use freq 'MS'")
+    return engine
+
+
+def district_histories(df: pd.DataFrame) -> dict:
+    """district → (ds, y) frame for every district with at least 3 months of data."""
+    history = pd.DataFrame({
+        "district": df["district"],
+        "ds": pd.to_datetime(df["month"], format="%Y-%m"),
+        "y": df["pendency_percent"],
+    })
+    histories = {}
+    for district, frame in history.groupby("district", sort=False):
+        if len(frame) < 3:
+            continue
+        histories[district] = frame[["ds", "y"]].reset_index(drop=True)
+    return histories
+
+
+def history_hash(frame: pd.DataFrame) -> str:
+    """Content hash of one district's history plus the Prophet settings."""
+    digest = hashlib.sha256()
+    digest.update(json.dumps(PROPHET_SETTINGS, sort_keys=True).encode("utf-8"))
+    digest.update(frame["ds"].to_numpy(dtype="datetime64[ns]").tobytes())
+    digest.update(frame["y"].to_numpy(dtype=np.float64).tobytes())
+    return digest.hexdigest()
+
+
+# ---------------------- FITTED MODEL CACHE ----------------------
+
+def _cache_path(key: str) -> str:
+    return os.path.join(FORECAST_CACHE_DIR, f"{key}.json")
+
+
+def _load_cached_model(key: str):
+    path = _cache_path(key)
+    try:
+        with open(path, "r", encoding="utf-8") as handle:
+            model_json = handle.read()
+        os.utime(path)  # mtime doubles as the LRU timestamp
+    except OSError:
+        return None
+    return model_json
+
+
+def _store_cached_model(key: str, model_json: str):
+    try:
+        os.makedirs(FORECAST_CACHE_DIR, exist_ok=True)
+        tmp_path = f"{_cache_path(key)}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as handle:
+            handle.write(model_json)
+        os.replace(tmp_path, _cache_path(key))
+    except OSError as e:
+        print(f"⚠️ Forecast cache store failed: {e}")
+
+
+# ---------------------- FIT / PREDICT ----------------------
+
+def _forecast_district(history: pd.DataFrame, model_json, periods: int, freq: str):
+    """
+    Fit (or restore) one district's Prophet model and forecast `periods` steps ahead.
+    Runs in the forecast pool, so it must stay module-level and picklable.
+    Returns (model_json, records); model_json is None when the model was restored.
+    """
+    from prophet import Prophet  # type: ignore
+    from prophet.serialize import model_from_json, model_to_json  # type: ignore
+
+    if model_json is not None:
+        m = model_from_json(model_json)
+        fitted_json = None
+    else:
+        m = Prophet(**PROPHET_SETTINGS)
+        m.fit(history)
+        fitted_json = model_to_json(m)
+
+    future = m.make_future_dataframe(periods=periods, freq=freq)
+    forecast = m.predict(future)
+    return fitted_json, forecast[["ds", "yhat"]].tail(periods).to_dict(orient="records")
+
+
+def _get_pool():
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(max_workers=FORECAST_POOL_WORKERS)
+    return _pool
+
+
+def use_worker_threads():
+    """
+    Called by the inference worker initializer. A worker is itself a pool child and
+    is never told to shut anything down, so it must not own a forecast pool; its
+    fits run on a thread pool that is joined before forecast_prophet returns.
+    """
+    global _in_worker
+    _in_worker = True
+
+
+def _fit_all(executor, histories: dict, cached: dict, periods: int, freq: str) -> dict:
+    futures = {
+        district: executor.submit(_forecast_district, frame, cached[district], periods, freq)
+        for district, frame in histories.items()
+    }
+    return {district: future.result() for district, future in futures.items()}
+
+
+def forecast_prophet(df: pd.DataFrame, periods: int = DEFAULT_PERIODS, freq: str = DEFAULT_FREQ,
+                     use_cache: bool = True) -> dict:
+    """
+    Per-district Prophet forecast. Districts whose history hash already has a fitted
+    model on disk skip the fit; the rest are fitted in parallel in the forecast pool
+    (on threads inside an inference worker).
+    Returns {district: [{ds, yhat}, ...]}.
+    """
+    histories = district_histories(df)
+    keys = {district: history_hash(frame) for district, frame in histories.items()}
+    cached = {
+        district: _load_cached_model(key) if use_cache else None
+        for district, key in keys.items()
+    }
+
+    if FORECAST_POOL_WORKERS > 0 and len(histories) > 1 and _in_worker:
+        # cmdstan fits in a subprocess, so the threads overlap.
+        with ThreadPoolExecutor(max_workers=FORECAST_POOL_WORKERS, thread_name_prefix="forecast") as threads:
+            outputs = _fit_all(threads, histories, cached, periods, freq)
+    elif FORECAST_POOL_WORKERS > 0 and len(histories) > 1:
+        outputs = _fit_all(_get_pool(), histories, cached, periods, freq)
+    else:
+        outputs = {
+            district: _forecast_district(frame, cached[district], periods, freq)
+            for district, frame in histories.items()
+        }
+
+    results = {}
+    stored = 0
+    for district, (fitted_json, records) in outputs.items():
+        if fitted_json is not None and use_cache:
+            _store_cached_model(keys[district], fitted_json)
+            stored += 1
+        results[district] = records
+    if stored:
+        evicted = evict_lru(FORECAST_CACHE_DIR, "*.json", FORECAST_CACHE_MAX_BYTES, FORECAST_CACHE_MAX_ENTRIES)
+        if evicted:
+            print(f"✅ Forecast cache: evicted {evicted} fitted model(s).")
+
+    refit = sum(1 for model_json in cached.values() if model_json is None)
+    print(f"✅ Pendency forecast: {len(results)} districts, {refit} refit, {len(results) - refit} from cache.")
+    return results
+
+
+# ---------------------- VECTORISED ENGINES ----------------------
+
+def district_month_matrix(df: pd.DataFrame):
+    """
+    Pivot pendency into a district × month matrix, right-aligned so every row ends
+    at that district's own last month (like a per-district Prophet fit would).
+    Gaps are forward-filled and the leading padding takes the first observed value.
+    Returns (districts, last_month per district, matrix) for districts with ≥ 3 months.
+    """
+    frame = pd.DataFrame({
+        "district": df["district"],
+        "month": pd.to_datetime(df["month"], format="%Y-%m").dt.to_period("M"),
+        "y": pd.to_numeric(df["pendency_percent"], errors="coerce"),
+    }).dropna(subset=["district", "month", "y"])
+
+    counts = frame.groupby("district", sort=False)["month"].nunique()
+    keep = counts[counts >= 3].index
+    frame = frame[frame["district"].isin(keep)]
+    if frame.empty:
+        return [], pd.PeriodIndex([], freq="M"), np.empty((0, 0))
+
+    months = pd.period_range(frame["month"].min(), frame["month"].max(), freq="M")
+    pivot = frame.pivot_table(index="district", columns="month", values="y", aggfunc="mean", sort=False)
+    pivot = pivot.reindex(index=list(keep), columns=months)
+
+    observed = pivot.notna().to_numpy()
+    last_idx = observed.shape[1] - 1 - np.argmax(observed[:, ::-1], axis=1)
+    matrix = pivot.ffill(axis=1).to_numpy(dtype=np.float64)
+
+    # Right-align each row: column T-1 becomes the district's last observed month.
+    n_months = matrix.shape[1]
+    shift = (n_months - 1) - last_idx
+    cols = np.arange(n_months)[None, :] - shift[:, None]
+    aligned = np.where(cols >= 0, matrix[np.arange(len(matrix))[:, None], np.clip(cols, 0, None)], np.nan)
+    aligned = pd.DataFrame(aligned).bfill(axis=1).to_numpy()
+
+    return list(pivot.index), months[last_idx], aligned
+
+
+def _seasonal_naive(matrix: np.ndarray, periods: int, season: int = SEASON_LENGTH) -> np.ndarray:
+    """Repeat the last observed season; falls back to the last value for short histories."""
+    n_months = matrix.shape[1]
+    if n_months < season:
+        return np.repeat(matrix[:, -1:], periods, axis=1)
+    steps = np.arange(periods) % season
+    return matrix[:, n_months - season + steps]
+
+
+# Smoothing parameter grid searched per district (alpha, beta, gamma).
+_HW_GRID = np.array([
+    (alpha, beta, gamma)
+    for alpha in (0.2, 0.5, 0.8)
+    for beta in (0.0, 0.1, 0.3)
+    for gamma in (0.0, 0.1, 0.3)
+])
+
+
+def _holt_winters(matrix: np.ndarray, periods: int, season: int = SEASON_LENGTH) -> np.ndarray:
+    """
+    Additive Holt-Winters over every district at once. The recursion runs over months;
+    each step updates a (grid × district) state array. Each district keeps the grid
+    point with the lowest one-step-ahead squared error. Histories shorter than two
+    seasons drop the seasonal term (Holt's linear trend).
+    """
+    n_districts, n_months = matrix.shape
+    seasonal = n_months >= 2 * season
+    m = season if seasonal else 1
+
+    alpha = _HW_GRID[:, 0, None]
+    beta = _HW_GRID[:, 1, None]
+    gamma = _HW_GRID[:, 2, None] if seasonal else np.zeros_like(alpha)
+    grid = len(_HW_GRID)
+
+    if seasonal:
+        first = matrix[:, :season].mean(axis=1)
+        second = matrix[:, season:2 * season].mean(axis=1)
+        level = np.broadcast_to(first, (grid, n_districts)).copy()
+        trend = np.broadcast_to((second - first) / season, (grid, n_districts)).copy()
+        season_state = np.broadcast_to(
+            (matrix[:, :season] - first[:, None]).T, (grid, season, n_districts)
+        ).copy()
+    else:
+        level = np.broadcast_to(matrix[:, 0], (grid, n_districts)).copy()
+        trend = np.broadcast_to(matrix[:, 1] - matrix[:, 0], (grid, n_districts)).copy()
+        season_state = np.zeros((grid, 1, n_districts))
+
+    sse = np.zeros((grid, n_districts))
+    for t in range(n_months):
+        y = matrix[:, t]
+        s = season_state[:, t % m]
+        fitted = level + trend + s
+        sse += (y - fitted) ** 2
+        new_level = alpha * (y - s) + (1 - alpha) * (level + trend)
+        trend = beta * (new_level - level) + (1 - beta) * trend
+        season_state[:, t % m] = gamma * (y - new_level) + (1 - gamma) * s
+        level = new_level
+
+    best = np.argmin(sse, axis=0)
+    cols = np.arange(n_districts)
+    horizon = np.arange(1, periods + 1)
+    season_idx = (n_months + horizon - 1) % m
+    return (
+        level[best, cols][:, None]
+        + trend[best, cols][:, None] * horizon[None, :]
+        + season_state[best[:, None], season_idx[None, :], cols[:, None]]
+    )
+
+
+def forecast_vectorised(df: pd.DataFrame, periods: int = DEFAULT_PERIODS, freq: str = DEFAULT_FREQ,
+                        engine: str = "holt_winters") -> dict:
+    """
+    Lightweight alternative to forecast_prophet for monthly pendency dashboards.
+    Returns the same {district: [{ds, yhat}, ...]} structure.
+    """
+    districts, last_months, matrix = district_month_matrix(df)
+    if not districts:
+        return {}
+
+    yhat = _holt_winters(matrix, periods) if engine == "holt_winters" else _seasonal_naive(matrix, periods)
+    offset = pd.tseries.frequencies.to_offset("MS")
+    starts = last_months.to_timestamp(how="start")
+    return {
+        district: [
+            {"ds": start + offset * (step + 1), "yhat": float(value)}
+            for step, value in enumerate(row)
+        ]
+        for district, start, row in zip(districts, starts, yhat)
+    }
+
+
+def run_forecast(df: pd.DataFrame, periods: int = DEFAULT_PERIODS, freq: str = DEFAULT_FREQ,
+                 engine: str = DEFAULT_ENGINE) -> dict:
+    """Dispatch the CrimePendency forecast to the requested engine."""
+    if engine == "prophet":
+        return forecast_prophet(df, periods=periods, freq=freq)
+    return forecast_vectorised(df, periods=periods, freq=freq, engine=engine)
+
+
+def shutdown_forecast_pool():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
@@ -0,0 +1,116 @@
+import asyncio
+import os
+import time
+import uuid
+from typing import Dict, Optional
+
+from models_engine import PIPELINE_STAGES, run_inference_staged
+
+# ⚙️ Finished jobs are kept this long for polling, and at most MAX_JOBS are held.
+JOB_TTL_SECONDS = int(os.getenv("PREDICT_JOB_TTL_SECONDS", "3600"))
+MAX_JOBS = int(os.getenv("PREDICT_MAX_JOBS", "500"))
+
+# In-memory job table: job_id → job dict. Jobs live in the process that accepted them.
+JOBS: Dict[str, dict] = {}
+_TASKS = set()
+
+
+def _prune_jobs():
+    now = time.time()
+    expired = [
+        job_id for job_id, job in JOBS.items()
+        if job["finished_at"] and now - job["finished_at"] > JOB_TTL_SECONDS
+    ]
+    for job_id in expired:
+        JOBS.pop(job_id, None)
+
+    # Drop the oldest finished jobs if the table is still over capacity.
+    finished = sorted((j for j in JOBS.values() if j["finished_at"]), key=lambda j: j["finished_at"])
+    while len(JOBS) > MAX_JOBS and finished:
+        JOBS.pop(finished.pop(0)["job_id"], None)
+
+
+def _stage_callback(job: dict):
+    def on_stage(stage, state, payload):
+        job["stages"][stage] = state
+        if state == "failed":
+            job["errors"][stage] = payload.get("message")
+        elif payload:
+            job["result"].update(payload)
+        job["updated_at"] = time.time()
+    return on_stage
+
+
+async def _run_job(job: dict, temp_path: str, stream: bool, forecast_options=None):
+    job["status"] = "running"
+    try:
+        result = await run_inference_staged(
+            temp_path, file_name=job["file_name"], stream=stream,
+            forecast_options=forecast_options, on_stage=_stage_callback(job),
+        )
+        if result.get("status") == "error":
+            job["status"] = "failed"
+            job["errors"].setdefault("pipeline", result.get("message"))
+        else:
+            job["result"] = {**result, "file_name": job["file_name"], "status": "success"}
+            job["status"] = "completed"
+    except Exception as e:
+        job["status"] = "failed"
+        job["errors"]["pipeline"] = str(e)
+    finally:
+        job["finished_at"] = time.time()
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+
+def submit_job(temp_path: str, file_name: str, stream: bool = False, forecast_options=None) -> dict:
+    """
+    Register a prediction job for an uploaded CSV already written to `temp_path` and
+    start it in the background. The job owns the temp file and removes it when done.
+    """
+    _prune_jobs()
+    job_id = uuid.uuid4().hex
+    now = time.time()
+    job = {
+        "job_id": job_id,
+        "file_name": file_name,
+        "status": "queued",
+        "stages": {stage: "pending" for stage in PIPELINE_STAGES},
+        "errors": {},
+        "result": {},
+        "created_at": now,
+        "updated_at": now,
+        "finished_at": None,
+    }
+    JOBS[job_id] = job
+
+    task = asyncio.create_task(_run_job(job, temp_path, stream, forecast_options))
+    _TASKS.add(task)
+    task.add_done_callback(_TASKS.discard)
+    return job
+
+
+def get_job(job_id: str) -> Optional[dict]:
+    return JOBS.get(job_id)
+
+
+def job_status(job: dict) -> dict:
+    """Status view without the (potentially large) result payload."""
+    stages = job["stages"]
+    settled = sum(1 for state in stages.values() if state in ("done", "skipped", "failed"))
+    return {
+        "job_id": job["job_id"],
+        "file_name": job["file_name"],
+        "status": job["status"],
+        "stages": dict(stages),
+        "progress": round(settled / len(stages), 2),
+        "errors": dict(job["errors"]),
+        "created_at": job["created_at"],
+        "updated_at": job["updated_at"],
+        "finished_at": job["finished_at"],
+    }
+
+
+def job_result(job: dict) -> dict:
+    """Whatever the pipeline has produced so far, plus the status view."""
+    return {**job_status(job), "partial": job["status"] != "completed", "result": dict(job["result"])}
@@ -0,0 +1,213 @@
+import asyncio
+import bisect
+import os
+import time
+from functools import partial
+
+import numpy as np  # type: ignore
+import pandas as pd  # type: ignore
+
+from dataset_registry import DATASET_REGISTRY, DATASETS_BY_NAME, detect_dataset
+from executors import run_cpu
+from model_registry import model_version
+from compact_models import predictor_for
+
+# ⚙️ Micro-batching for POST /predict/record: concurrent records for the same dataset
+# are held for up to RECORD_BATCH_WINDOW_MS and scored with one model.predict call,
+# or sooner once RECORD_BATCH_MAX records are waiting.
+RECORD_BATCH_WINDOW_MS = float(os.getenv("RECORD_BATCH_WINDOW_MS", "5"))
+RECORD_BATCH_MAX = int(os.getenv("RECORD_BATCH_MAX", "64"))
+
+LATENCY_BUCKETS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000)
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256)
+
+
+class Histogram:
+    """Fixed-bucket histogram; counts[i] holds values <= bounds[i], the last slot the overflow."""
+
+    def __init__(self, bounds):
+        self.bounds = tuple(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.total = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.total += 1
+        self.sum += value
+
+    def snapshot(self) -> dict:
+        labels = [f"<={bound}" for bound in self.bounds] + [f">{self.bounds[-1]}"]
+        return {
+            "buckets": dict(zip(labels, self.counts)),
+            "count": self.total,
+            "mean": round(self.sum / self.total, 3) if self.total else None,
+        }
+
+
+# ---------------------- SCORING ----------------------
+
+def resolve_record_dataset(record: dict, dataset=None) -> dict:
+    """Registry entry for a record, by explicit name/label or detected from its fields."""
+    if dataset:
+        spec = DATASETS_BY_NAME.get(dataset) or next(
+            (s for s in DATASET_REGISTRY if dataset in (s["label"], s["db_label"])), None
+        )
+        if spec is None:
+            raise ValueError(f"Unknown dataset '{dataset}'")
+    else:
+        spec = detect_dataset(record.keys(), df=pd.DataFrame([record]))
+        if spec is None:
+            raise ValueError("❌ Unknown dataset structure")
+    if spec["pipeline"] != "model":
+        raise ValueError(f"{spec['label']} is forecast per district and can't be scored one record at a time")
+    return spec
+
+
+def _record_features(spec: dict, df: pd.DataFrame):
+    """
+    Run the dataset's feature builder on stacked records.
+
+    carry_over builders drop rows without a next month (their training target), so
+    every record gets a private group key and a successor copy: shift(-1) fills the
+    original rows and drops the copies, leaving the features untouched.
+    """
+    if not spec["carry_over"]:
+        X, _, _ = spec["builder"](df)
+        return X
+
+    keyed = df.assign(district=np.arange(len(df)))
+    X, _, _ = spec["builder"](pd.concat([keyed, keyed], ignore_index=True))
+    return X.iloc[:len(df)]
+
+
+def score_records(name: str, records: list) -> dict:
+    """
+    Score a list of records of one dataset with a single model.predict call.
+    Module-level and picklable so it can run in the inference process pool.
+    """
+    spec = DATASETS_BY_NAME[name]
+    model = predictor_for(spec["model_key"])
+    if model is None:
+        raise RuntimeError(f"Model '{spec['model_key']}' is not loaded")
+
+    X = _record_features(spec, pd.DataFrame(records))
+    if len(X) != len(records):
+        raise ValueError("Record could not be turned into model features")
+
+    start = time.perf_counter()
+    preds = np.asarray(model.predict(X)).ravel()
+    return {
+        "predictions": preds.tolist(),
+        "model_version": model_version(spec["model_key"]),
+        "predict_ms": round((time.perf_counter() - start) * 1000, 3),
+    }
+
+
+# ---------------------- MICRO-BATCHER ----------------------
+
+class RecordBatcher:
+    """
+    Coalesces concurrent single-record requests per dataset into one scoring call.
+    A batch is flushed when its window expires or it reaches max_batch records.
+    If a batch fails, its records are retried one by one so a malformed record only
+    fails its own request.
+    """
+
+    def __init__(self, window_ms=RECORD_BATCH_WINDOW_MS, max_batch=RECORD_BATCH_MAX):
+        self.window = max(0.0, window_ms) / 1000
+        self.max_batch = max(1, max_batch)
+        self._pending = {}   # dataset name → [(record, future), ...]
+        self._timers = {}    # dataset name → asyncio.TimerHandle
+        self._tasks = set()  # running flushes; the loop itself only keeps weak references
+        self.latency_ms = Histogram(LATENCY_BUCKETS_MS)
+        self.batch_size = Histogram(BATCH_SIZE_BUCKETS)
+        self.errors = 0
+
+    async def submit(self, name: str, record: dict) -> dict:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        start = time.perf_counter()
+
+        queue = self._pending.setdefault(name, [])
+        queue.append((record, future))
+        if len(queue) >= self.max_batch:
+            self._flush(name)
+        elif name not in self._timers:
+            self._timers[name] = loop.call_later(self.window, self._flush, name)
+
+        try:
+            return await future
+        finally:
+            self.latency_ms.observe((time.perf_counter() - start) * 1000)
+
+    def _flush(self, name: str):
+        timer = self._timers.pop(name, None)
+        if timer is not None:
+            timer.cancel()
+        batch = self._pending.pop(name, [])
+        if batch:
+            task = asyncio.ensure_future(self._run(name, batch))
+            self._tasks.add(task)
+            task.add_done_callback(partial(self._flush_done, name, batch))
+
+    def _flush_done(self, name: str, batch: list, task):
+        self._tasks.discard(task)
+        if task.cancelled() or task.exception() is None:
+            return
+        error = task.exception()
+        self.errors += 1
+        print(f"❌ Record batch for {name} failed: {str(error)}")
+        # Don't leave callers waiting on a flush that died.
+        for _, future in batch:
+            if not future.done():
+                future.set_exception(error)
+
+    async def _run(self, name: str, batch: list):
+        self.batch_size.observe(len(batch))
+        try:
+            scored = await run_cpu(score_records, name, [record for record, _ in batch])
+            for index, (_, future) in enumerate(batch):
+                self._resolve(future, scored, index, len(batch))
+        except Exception as e:
+            if len(batch) == 1:
+                self.errors += 1
+                if not batch[0][1].done():
+                    batch[0][1].set_exception(e)
+                return
+            await asyncio.gather(*[self._run(name, [item]) for item in batch])
+
+    @staticmethod
+    def _resolve(future, scored: dict, index: int, size: int):
+        if future.done():
+            return
+        future.set_result({
+            "prediction": scored["predictions"][index],
+            "model_version": scored["model_version"],
+            "batch_size": size,
+        })
+
+    def stats(self) -> dict:
+        return {
+            "window_ms": self.window * 1000,
+            "max_batch": self.max_batch,
+            "errors": self.errors,
+            "latency_ms": self.latency_ms.snapshot(),
+            "batch_size": self.batch_size.snapshot(),
+        }
+
+
+RECORD_BATCHER = RecordBatcher()
+
+
+async def predict_record(record: dict, dataset=None) -> dict:
+    """Score one district-month record through the shared micro-batcher."""
+    spec = resolve_record_dataset(record, dataset)
+    scored = await RECORD_BATCHER.submit(spec["name"], record)
+    return {
+        "status": "success",
+        "dataset": spec["label"],
+        "district": record.get("district"),
+        "month": record.get("month"),
+        **scored,
+    }
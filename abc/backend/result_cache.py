@@ -0,0 +1,144 @@
+import glob
+import hashlib
+import json
+import os
+import threading
+from typing import Optional
+
+from model_registry import model_version
+
+# ⚙️ On-disk store for finished /predict/ results, keyed by upload content + model version.
+RESULT_CACHE_DIR = os.getenv("RESULT_CACHE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "result_cache"))
+RESULT_CACHE_MAX_BYTES = int(os.getenv("RESULT_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+RESULT_CACHE_MAX_ENTRIES = int(os.getenv("RESULT_CACHE_MAX_ENTRIES", "2000"))
+RESULT_CACHE_ENABLED = os.getenv("RESULT_CACHE_ENABLED", "1") != "0"
+
+# Bump when the cached payload shape changes so old entries stop matching.
+CACHE_SCHEMA_VERSION = "1"
+
+_lock = threading.Lock()
+_counters = {"hits": 0, "misses": 0, "evictions": 0, "stores": 0}
+
+
+def _bump(counter: str, amount: int = 1):
+    with _lock:
+        _counters[counter] += amount
+
+
+# ---------------------- KEYING ----------------------
+
+def content_digest(csv_path: str) -> str:
+    """
+    SHA-256 of the normalised CSV content: BOM and line endings stripped, trailing
+    whitespace removed and blank/comma-only rows (the ",,,," tails of exported
+    sheets) skipped, so byte-level noise doesn't defeat the cache.
+    """
+    digest = hashlib.sha256()
+    with open(csv_path, "rb") as handle:
+        for i, line in enumerate(handle):
+            if i == 0 and line.startswith(b"\xef\xbb\xbf"):
+                line = line[3:]
+            line = line.rstrip()
+            if not line.replace(b",", b"").strip():
+                continue
+            digest.update(line)
+            digest.update(b"\n")
+    return digest.hexdigest()
+
+
+def cache_key(csv_path: str, spec: dict, variant: str = "") -> str:
+    """`variant` distinguishes request options that change the output (e.g. forecast horizon)."""
+    artifact = model_version(spec["model_key"]) if spec["model_key"] else spec["pipeline"]
+    parts = [CACHE_SCHEMA_VERSION, spec["name"], str(artifact), variant, content_digest(csv_path)]
+    return hashlib.sha256("|".join(parts).encode("utf-8")).hexdigest()
+
+
+def _entry_path(key: str) -> str:
+    return os.path.join(RESULT_CACHE_DIR, f"{key}.json")
+
+
+# ---------------------- LOOKUP / STORE ----------------------
+
+def get_cached_result(key: str) -> Optional[dict]:
+    """Return the stored result for `key` and mark it recently used, or None."""
+    if not RESULT_CACHE_ENABLED:
+        return None
+    path = _entry_path(key)
+    try:
+        with open(path, "r", encoding="utf-8") as handle:
+            result = json.load(handle)
+        os.utime(path)  # mtime doubles as the LRU timestamp
+    except (OSError, ValueError):
+        _bump("misses")
+        return None
+    _bump("hits")
+    return result
+
+
+def _json_default(value):
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    if hasattr(value, "tolist"):
+        return value.tolist()
+    return str(value)
+
+
+def store_result(key: str, result: dict):
+    """Write a result atomically, then evict least-recently-used entries over the limits."""
+    if not RESULT_CACHE_ENABLED:
+        return
+    try:
+        os.makedirs(RESULT_CACHE_DIR, exist_ok=True)
+        path = _entry_path(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as handle:
+            json.dump(result, handle, ensure_ascii=False, default=_json_default)
+        os.replace(tmp_path, path)
+        _bump("stores")
+        _evict()
+    except Exception as e:
+        print(f"⚠️ Result cache store failed: {e}")
+
+
+def _evict():
+    evicted = evict_lru(RESULT_CACHE_DIR, "*.json", RESULT_CACHE_MAX_BYTES, RESULT_CACHE_MAX_ENTRIES)
+    if evicted:
+        _bump("evictions", evicted)
+
+
+def evict_lru(directory: str, pattern: str, max_bytes: int, max_entries: Optional[int] = None) -> int:
+    """
+    Remove the least recently used files matching `pattern` in `directory` (mtime is
+    the LRU timestamp) until they fit in `max_bytes` and `max_entries`. Returns the count.
+    """
+    entries = []
+    for path in glob.glob(os.path.join(directory, pattern)):
+        try:
+            stat = os.stat(path)
+        except OSError:
+            continue
+        entries.append((stat.st_mtime, stat.st_size, path))
+
+    total = sum(size for _, size, _ in entries)
+    entries.sort()
+    evicted = 0
+    while entries and (total > max_bytes or (max_entries is not None and len(entries) > max_entries)):
+        _, size, path = entries.pop(0)
+        try:
+            os.remove(path)
+        except OSError:
+            continue
+        total -= size
+        evicted += 1
+    return evicted
+
+
+def cache_stats() -> dict:
+    with _lock:
+        stats = dict(_counters)
+    lookups = stats["hits"] + stats["misses"]
+    stats["hit_rate"] = round(stats["hits"] / lookups, 4) if lookups else 0.0
+    stats["enabled"] = RESULT_CACHE_ENABLED
+    stats["max_bytes"] = RESULT_CACHE_MAX_BYTES
+    stats["max_entries"] = RESULT_CACHE_MAX_ENTRIES
+    return stats
@@ -0,0 +1,118 @@
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import numpy as np  # type: ignore
+
+import model_store
+from model_registry import MODEL_REGISTRY
+
+# ⚙️ Shadow scoring: when MODEL_SHADOW_MODE is on and a model has a candidate version
+# in the manifest, the candidate scores the same features as the live model in a
+# background thread and the deltas are appended to SHADOW_LOG_PATH as JSON lines.
+# At most SHADOW_MAX_PENDING evaluations wait at once; later ones are dropped.
+SHADOW_MODE = os.getenv("MODEL_SHADOW_MODE", "0").lower() in ("1", "true", "yes")
+SHADOW_LOG_PATH = os.getenv("SHADOW_LOG_PATH", os.path.join(os.path.dirname(__file__), "logs", "shadow_eval.jsonl"))
+SHADOW_MAX_PENDING = int(os.getenv("SHADOW_MAX_PENDING", "4"))
+
+_pool = None
+_pending = 0
+_lock = threading.Lock()
+
+stats = {"submitted": 0, "dropped": 0, "completed": 0, "failed": 0}
+
+
+def _candidate_features(model_name, version_id, features, X):
+    """Feature list recorded for the candidate in the manifest, if the live model input has all of it."""
+    info = model_store.version_info(MODEL_REGISTRY.model_dir, model_name, version_id) or {}
+    recorded = info.get("features") or []
+    if recorded and all(column in X.columns for column in recorded):
+        return recorded
+    return features
+
+
+def _append_log(record):
+    os.makedirs(os.path.dirname(SHADOW_LOG_PATH), exist_ok=True)
+    with _lock, open(SHADOW_LOG_PATH, "a", encoding="utf-8") as handle:
+        handle.write(json.dumps(record) + "\n")
+
+
+def _evaluate(model_name, live_version, features, X, live_preds, live_ms, file_name):
+    global _pending
+    try:
+        candidate_version, candidate = MODEL_REGISTRY.candidate(model_name)
+        if candidate is None:
+            return
+
+        # X is exactly what the live model scored (after any fillna), not df_proc.
+        columns = _candidate_features(model_name, candidate_version, features, X)
+        start = time.perf_counter()
+        candidate_preds = np.asarray(candidate.predict(X[columns]), dtype=float).ravel()
+        candidate_ms = (time.perf_counter() - start) * 1000
+
+        live = np.asarray(live_preds, dtype=float).ravel()
+        delta = np.abs(candidate_preds - live) if len(live) else np.array([0.0])
+        _append_log({
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "model": model_name,
+            "file_name": file_name,
+            "live_version": live_version,
+            "candidate_version": candidate_version,
+            "rows": int(len(live)),
+            "mean_abs_delta": round(float(delta.mean()), 6),
+            "max_abs_delta": round(float(delta.max()), 6),
+            "rmse": round(float(np.sqrt(np.mean(delta ** 2))), 6),
+            "live_latency_ms": round(float(live_ms or 0.0), 3),
+            "candidate_latency_ms": round(candidate_ms, 3),
+        })
+        with _lock:
+            stats["completed"] += 1
+    except Exception as e:
+        with _lock:
+            stats["failed"] += 1
+        print(f"⚠️ Shadow evaluation of {model_name} failed: {str(e)}")
+    finally:
+        with _lock:
+            _pending -= 1
+
+
+def wants_shadow(spec: dict) -> bool:
+    """True when shadow mode is on and spec's model has a candidate version to score."""
+    model_name = spec.get("model_key")
+    if not SHADOW_MODE or not model_name or MODEL_REGISTRY.model_dir is None:
+        return False
+    return bool(model_store.candidate_version(MODEL_REGISTRY.model_dir, model_name))
+
+
+def submit_shadow(spec: dict, scored: dict, file_name=None) -> bool:
+    """
+    Fire-and-forget: score the shadow candidate of spec's model on the model input X
+    the live model just scored. Never blocks the request; returns False when skipped
+    or dropped.
+    """
+    global _pool, _pending
+    if scored.get("X") is None or not scored.get("features") or not wants_shadow(spec):
+        return False
+
+    with _lock:
+        if _pending >= SHADOW_MAX_PENDING:
+            stats["dropped"] += 1
+            return False
+        _pending += 1
+        stats["submitted"] += 1
+        if _pool is None:
+            _pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="shadow")
+
+    _pool.submit(_evaluate, spec["model_key"], scored.get("model_version"), scored["features"], scored["X"],
+                 scored["preds"], scored.get("predict_ms"), file_name)
+    return True
+
+
+def shutdown_shadow_pool():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
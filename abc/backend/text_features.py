@@ -0,0 +1,134 @@
+import re
+
+import numpy as np  # type: ignore
+import pandas as pd  # type: ignore
+
+try:
+    import pyarrow as pa  # type: ignore
+    import pyarrow.compute as pc  # type: ignore
+except ImportError:  # pragma: no cover - optional dependency
+    pa = None
+
+# Compiled once. Every pattern runs over the *distinct* values of a column only
+# (free-text CCTNS fields repeat heavily) and the results are broadcast back to all
+# rows with the factorize codes. Patterns stay RE2-compatible with named groups so
+# pyarrow's extract_regex can run them; without pyarrow, Series.str.extract does.
+CASH_PATTERN = re.compile(r"Rs\.?\s?(?P<amount>[\d,]+)")
+PHONE_PATTERN = re.compile(r"(?i)(?P<count>\d[\d,]*)\s*(?:mobile\s*phones?|mobiles?|phones?|handsets?)")
+PHONE_MENTION_PATTERN = re.compile(r"(?i)mobile|phone|handset")
+QUANTITY_PATTERN = re.compile(
+    r"(?i)(?P<quantity>\d+(?:\.\d+)?)\s*"
+    r"(?P<unit>kg|kgs|grams?|g|liters?|litres?|ltrs?|bottles?|pouch(?:es)?|packets?)\b"
+)
+SENTENCE_PATTERN = re.compile(
+    r"(?i)(?P<length>\d+(?:\.\d+)?)\s*(?P<unit>years?|yrs?|months?)\s*"
+    r"(?P<kind>RI|SI|R\.I\.|S\.I\.|Rigorous Imprisonment|Simple Imprisonment|Imprisonment|Probation)?"
+)
+ACQUITTED_PATTERN = re.compile(r"(?i)acquit")
+
+UNIT_ALIASES = {
+    "kg": "kg", "kgs": "kg", "g": "g", "gram": "g", "grams": "g",
+    "liter": "liter", "liters": "liter", "litre": "liter", "litres": "liter", "ltr": "liter", "ltrs": "liter",
+    "bottle": "bottle", "bottles": "bottle", "pouch": "pouch", "pouches": "pouch", "packet": "packet", "packets": "packet",
+}
+SEIZURE_COLUMNS = ["cash_value", "phone_count", "phones_seized", "seizure_quantity", "seizure_unit"]
+PUNISHMENT_COLUMNS = ["sentence_years", "probation_years", "fine_amount", "acquitted"]
+
+
+# ---------------------- SHARED HELPERS ----------------------
+
+def _distinct(series: pd.Series):
+    """(codes, unique values as strings) — codes are -1 for missing values."""
+    codes, uniques = pd.factorize(series)
+    return codes, pd.Series(uniques).astype(str)
+
+
+def _broadcast(codes, values, fill, dtype, index):
+    """Map per-unique results back to rows; missing inputs get `fill`."""
+    values = np.asarray(values, dtype=dtype)
+    out = np.full(len(codes), fill, dtype=dtype)
+    present = codes >= 0
+    out[present] = values[codes[present]]
+    return pd.Series(out, index=index)
+
+
+def _extract(uniques: pd.Series, pattern) -> pd.DataFrame:
+    """One column per named group of `pattern` (first match), None where it doesn't match."""
+    if pa is None:
+        return uniques.str.extract(pattern).astype(object).where(lambda df: df.notna(), None)
+
+    matches = pc.extract_regex(pa.array(uniques, type=pa.string(), from_pandas=True), pattern.pattern)
+    missing = matches.is_null()
+    return pd.DataFrame({
+        name: pc.if_else(missing, pa.scalar(None, pa.string()), pc.struct_field(matches, [i])).to_pandas()
+        for i, name in enumerate(pattern.groupindex)
+    }, index=uniques.index)
+
+
+def _amount(matches: pd.Series) -> np.ndarray:
+    """'1,20,000'-style digit groups → float, 0 where missing."""
+    if pa is None:
+        return pd.to_numeric(matches.str.replace(",", "", regex=False), errors="coerce").fillna(0).to_numpy(float)
+    digits = pc.replace_substring(pa.array(matches, type=pa.string(), from_pandas=True), ",", "")
+    digits = pc.if_else(pc.equal(digits, ""), pa.scalar(None, pa.string()), digits)
+    return pc.fill_null(pc.cast(digits, pa.float64()), 0.0).to_numpy(zero_copy_only=False)
+
+
+def _contains(uniques: pd.Series, pattern) -> np.ndarray:
+    return uniques.str.contains(pattern.pattern, regex=True).to_numpy(bool)
+
+
+# ---------------------- SEIZURE DETAILS ----------------------
+
+def cash_value(series: pd.Series) -> pd.Series:
+    """Rupees in text like 'Rs. 4983 mobile phones and cash' (first 'Rs.' amount; 0 when absent)."""
+    codes, uniques = _distinct(series)
+    return _broadcast(codes, _amount(_extract(uniques, CASH_PATTERN)["amount"]), 0.0, float, series.index)
+
+
+def seizure_features(series: pd.Series) -> pd.DataFrame:
+    """
+    Typed columns from a details_of_seizure text column:
+    cash_value (Rs.), phone_count (explicit count before 'mobile/phone', 0 otherwise),
+    phones_seized (0/1 mention flag), seizure_quantity and seizure_unit (e.g. 520 / 'kg').
+    """
+    codes, uniques = _distinct(series)
+    # The cash amount often sits right before "mobile phones"; drop it before counting phones.
+    without_cash = uniques.str.replace(CASH_PATTERN.pattern, " ", regex=True)
+    quantity = _extract(uniques, QUANTITY_PATTERN)
+    units = pd.Categorical(quantity["unit"].str.lower().map(UNIT_ALIASES), categories=sorted(set(UNIT_ALIASES.values())))
+
+    index = series.index
+    return pd.DataFrame({
+        "cash_value": _broadcast(codes, _amount(_extract(uniques, CASH_PATTERN)["amount"]), 0.0, float, index),
+        "phone_count": _broadcast(codes, _amount(_extract(without_cash, PHONE_PATTERN)["count"]), 0, np.int64, index),
+        "phones_seized": _broadcast(codes, _contains(uniques, PHONE_MENTION_PATTERN), 0, np.int8, index),
+        "seizure_quantity": _broadcast(codes, _amount(quantity["quantity"]), 0.0, float, index),
+        "seizure_unit": pd.Categorical.from_codes(
+            _broadcast(codes, units.codes, -1, np.int8, index), categories=units.categories
+        ),
+    }, index=index)
+
+
+# ---------------------- PUNISHMENT ----------------------
+
+def punishment_features(series: pd.Series) -> pd.DataFrame:
+    """
+    Typed columns from a Convictions punishment text column, e.g. '5 years RI + Rs. 10,000 fine':
+    sentence_years (imprisonment, months converted), probation_years, fine_amount (Rs.)
+    and acquitted (0/1).
+    """
+    codes, uniques = _distinct(series)
+    sentence = _extract(uniques, SENTENCE_PATTERN)
+    length = _amount(sentence["length"])
+    in_months = sentence["unit"].str.lower().str.startswith("m").fillna(False).to_numpy(bool)
+    years = np.where(in_months, length / 12, length)
+    probation = sentence["kind"].str.lower().eq("probation").fillna(False).to_numpy(bool)
+
+    index = series.index
+    return pd.DataFrame({
+        "sentence_years": _broadcast(codes, np.where(probation, 0.0, years), 0.0, float, index),
+        "probation_years": _broadcast(codes, np.where(probation, years, 0.0), 0.0, float, index),
+        "fine_amount": _broadcast(codes, _amount(_extract(uniques, CASH_PATTERN)["amount"]), 0.0, float, index),
+        "acquitted": _broadcast(codes, _contains(uniques, ACQUITTED_PATTERN), 0, np.int8, index),
+    }, index=index)
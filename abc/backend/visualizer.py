@@ -1,74 +1,361 @@
+import asyncio
+import atexit
+import hashlib
 import os
+import threading
+import time
+import numpy as np
 import pandas as pd
-import matplotlib.pyplot as plt
+import matplotlib
 import seaborn as sns
-from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
+from matplotlib import dates as mdates
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.collections import LineCollection
+from matplotlib.figure import Figure
+from matplotlib.lines import Line2D
 
-plt.switch_backend("Agg")
+import graph_store
+from chart_data import trend_matrix
 
-def generate_graphs(dataset_name, df, preds):
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    base_dir = r"C:\Users\SAPTARSHI MONDAL\Copsight\copsight-police-app\abc\generated_graphs"
-    save_dir = os.path.join(base_dir, f"{dataset_name}_{timestamp}")
-    os.makedirs(save_dir, exist_ok=True)
+matplotlib.use("Agg")
+
+# ⚙️ Charts render in a pool of warm worker processes, one task per chart, so a call
+# takes about as long as its slowest chart. CHART_POOL_WORKERS=0 renders them one
+# after another in the calling thread.
+CHART_POOL_WORKERS = int(os.getenv("CHART_POOL_WORKERS", str(min(5, os.cpu_count() or 1))))
+
+# ⚙️ Lazy graphs: a prediction only puts each chart's data in the graph store, and
+# GET /graphs/<folder>/<file> renders the chart on first request. LAZY_GRAPHS=0
+# renders every chart while the prediction runs, as before.
+LAZY_GRAPHS = os.getenv("LAZY_GRAPHS", "1") != "0"
+
+# ⚙️ Trend chart: the TREND_TOP_N districts with the highest mean efficiency get a colour
+# and a legend entry, the rest are drawn as grey "others". Above TREND_MAX_POINTS
+# district-month points, months are rolled up into quarters, then years.
+TREND_TOP_N = int(os.getenv("TREND_TOP_N", "10"))
+TREND_MAX_POINTS = int(os.getenv("TREND_MAX_POINTS", "2000"))
+
+_chart_pool = None
+_chart_pool_lock = threading.Lock()
+_templates = threading.local()
+_rendering = {}  # PNG path → in-flight render task, so concurrent first requests render once
+
+
+# ---------------------- CHARTS ----------------------
+# Each chart draws on a fresh axes of its figure template from a small payload
+# (only the columns it needs), so tasks are cheap to ship to a worker.
+
+def _bar_chart(ax, title, data):
+    sns.barplot(x="district", y="predicted_efficiency", data=data, palette="Blues_d", ax=ax)
+    ax.set_title(f"{title} — Predicted Efficiency by District")
+    ax.tick_params(axis="x", labelrotation=45)
+
+
+def _trend_periods(matrix):
+    """(matrix, period name) at the finest of month / quarter / year within TREND_MAX_POINTS."""
+    for rule, period in (("MS", "Month"), ("QS", "Quarter"), ("YS", "Year")):
+        if rule != "MS":
+            matrix = matrix.resample(rule).mean()
+        if matrix.size <= TREND_MAX_POINTS:
+            break
+    return matrix, period
+
+
+def _line_trend(ax, title, data):
+    matrix, period = _trend_periods(trend_matrix(data))
+    means = matrix.mean()
+    top = means.sort_values(ascending=False, kind="stable").index[:TREND_TOP_N]
+    others = matrix.columns.difference(top, sort=False)
+
+    # All districts in one LineCollection: others first (grey), then the top ones in
+    # colour on top of them. NaN months leave gaps in a district's line.
+    x = mdates.date2num(matrix.index)
+    columns = list(others) + list(top)
+    lines = matrix[columns].to_numpy(np.float64).T
+    segments = np.stack([np.broadcast_to(x, lines.shape), lines], axis=-1)
+    palette = matplotlib.colormaps["tab10" if len(top) <= 10 else "tab20"]
+    colours = [(0.75, 0.75, 0.75, 0.6)] * len(others) + [palette(i % palette.N) for i in range(len(top))]
+    widths = [0.8] * len(others) + [1.6] * len(top)
+    ax.add_collection(LineCollection(segments, colors=colours, linewidths=widths))
+    if len(x) == 1:
+        ax.scatter(np.repeat(x, len(columns)), lines[:, 0], color=colours, zorder=3)
+    ax.autoscale_view()
+
+    locator = mdates.AutoDateLocator()
+    ax.xaxis.set_major_locator(locator)
+    ax.xaxis.set_major_formatter(mdates.ConciseDateFormatter(locator))
+    handles = [Line2D([], [], color=colours[len(others) + i], linewidth=1.6, label=str(d)) for i, d in enumerate(top)]
+    if len(others):
+        handles.append(Line2D([], [], color=colours[0], linewidth=0.8, label=f"Others ({len(others)})"))
+    ax.legend(handles=handles, fontsize="small", ncol=2 if len(handles) > 6 else 1)
+    ax.set_xlabel(period if period == "Month" else f"{period} (mean of months)")
+    ax.set_title(f"{title} — Efficiency Trend Over Time")
+
+
+def _scatter(ax, title, data):
+    ax.scatter(data["target_efficiency"], data["predicted_efficiency"], alpha=0.6, color="purple")
+    ax.set_xlabel("Actual Efficiency")
+    ax.set_ylabel("Predicted Efficiency")
+    ax.set_title(f"{title} — Actual vs Predicted")
 
-    df_plot = df.copy()
-    df_plot["predicted_efficiency"] = preds
 
-    # 1️⃣ Bar Chart
-    plt.figure(figsize=(8, 4))
-    sns.barplot(x="district", y="predicted_efficiency", data=df_plot, palette="Blues_d")
-    plt.title(f"{dataset_name} — Predicted Efficiency by District")
-    plt.xticks(rotation=45)
-    plt.tight_layout()
-    plt.savefig(os.path.join(save_dir, "bar_chart.png"))
-    plt.close()
+def _histogram(ax, title, data):
+    sns.histplot(data["predicted_efficiency"], bins=10, kde=True, color="green", ax=ax)
+    ax.set_title(f"{title} — Efficiency Distribution")
 
-    # 2️⃣ Line Chart
+
+def _heatmap(ax, title, data):
+    sns.heatmap(data, cmap="coolwarm", annot=True, ax=ax)
+    ax.set_title(f"{title} — Feature Correlation Heatmap")
+
+
+# name → (file, figsize, draw)
+CHARTS = {
+    "bar_chart": ("bar_chart.png", (8, 4), _bar_chart),
+    "line_trend": ("line_trend.png", (8, 4), _line_trend),
+    "scatter": ("scatter_actual_vs_pred.png", (6, 4), _scatter),
+    "histogram": ("histogram_efficiency.png", (6, 4), _histogram),
+    "heatmap": ("heatmap_correlation.png", (8, 6), _heatmap),
+}
+_CHART_BY_FILE = {file_name: chart for chart, (file_name, _, _) in CHARTS.items()}
+
+
+def _chart_tasks(df, preds):
+    """(chart, payload) for every chart that applies to this frame."""
+    columns = [c for c in ("district", "month", "target_efficiency") if c in df.columns]
+    df_plot = df[columns].copy()
+    df_plot["predicted_efficiency"] = preds
+    if "month" in df_plot.columns and isinstance(df_plot["month"].dtype, pd.PeriodDtype):
+        df_plot["month"] = df_plot["month"].dt.to_timestamp()
+
+    tasks = [("bar_chart", df_plot[["district", "predicted_efficiency"]])]
     if "month" in df_plot.columns:
-        plt.figure(figsize=(8, 4))
-        for d in df_plot["district"].unique():
-            subset = df_plot[df_plot["district"] == d]
-            plt.plot(subset["month"], subset["predicted_efficiency"], marker="o", label=d)
-        plt.title(f"{dataset_name} — Efficiency Trend Over Time")
-        plt.legend()
-        plt.xticks(rotation=45)
-        plt.tight_layout()
-        plt.savefig(os.path.join(save_dir, "line_trend.png"))
-        plt.close()
-
-    # 3️⃣ Scatter Plot
+        tasks.append(("line_trend", trend_matrix(df_plot[["district", "month", "predicted_efficiency"]])))
     if "target_efficiency" in df_plot.columns:
-        plt.figure(figsize=(6, 4))
-        plt.scatter(df_plot["target_efficiency"], df_plot["predicted_efficiency"], alpha=0.6, color="purple")
-        plt.xlabel("Actual Efficiency")
-        plt.ylabel("Predicted Efficiency")
-        plt.title(f"{dataset_name} — Actual vs Predicted")
-        plt.tight_layout()
-        plt.savefig(os.path.join(save_dir, "scatter_actual_vs_pred.png"))
-        plt.close()
-
-    # 4️⃣ Histogram
-    plt.figure(figsize=(6, 4))
-    sns.histplot(df_plot["predicted_efficiency"], bins=10, kde=True, color="green")
-    plt.title(f"{dataset_name} — Efficiency Distribution")
-    plt.tight_layout()
-    plt.savefig(os.path.join(save_dir, "histogram_efficiency.png"))
-    plt.close()
-
-    # 5️⃣ Correlation Heatmap
-    numeric_cols = df_plot.select_dtypes(include='number')
-    if len(numeric_cols.columns) > 1:
-        plt.figure(figsize=(8, 6))
-        sns.heatmap(numeric_cols.corr(), cmap="coolwarm", annot=True)
-        plt.title(f"{dataset_name} — Feature Correlation Heatmap")
-        plt.tight_layout()
-        plt.savefig(os.path.join(save_dir, "heatmap_correlation.png"))
-        plt.close()
-
-    print(f"✅ Graphs saved in: {save_dir}")
-
-    # ✅ Return structured info
-    folder_name = os.path.basename(save_dir)
-    files = [f for f in os.listdir(save_dir) if f.endswith(".png")]
-    return {"folder": folder_name, "files": files}
\ No newline at end of file
+        tasks.append(("scatter", df_plot[["target_efficiency", "predicted_efficiency"]]))
+    tasks.append(("histogram", df_plot[["predicted_efficiency"]]))
+    # The correlation matrix is tiny; compute it here rather than ship every numeric column.
+    numeric = df.select_dtypes(include="number").assign(predicted_efficiency=preds)
+    if len(numeric.columns) > 1:
+        tasks.append(("heatmap", numeric.corr()))
+    return tasks
+
+
+# ---------------------- RENDERING ----------------------
+
+def _figure(chart):
+    """This thread's reusable figure for a chart, cleared for the next drawing."""
+    figures = getattr(_templates, "figures", None)
+    if figures is None:
+        figures = _templates.figures = {}
+    fig = figures.get(chart)
+    if fig is None:
+        fig = figures[chart] = Figure(figsize=CHARTS[chart][1])
+        FigureCanvasAgg(fig)
+    else:
+        fig.clear()
+    return fig
+
+
+def render_chart(chart, title, data, path):
+    """Draw one chart to the PNG at `path`. Returns the render time in ms."""
+    start = time.perf_counter()
+    fig = _figure(chart)
+    CHARTS[chart][2](fig.add_subplot(), title, data)
+    fig.tight_layout()
+    # Written under a per-thread temporary name and swapped in, so /graphs never serves
+    # half a PNG and inline renders of the same chart don't share a temp file.
+    graph_store._write_atomic(path, lambda tmp_path: fig.savefig(tmp_path, format="png"))
+    return (time.perf_counter() - start) * 1000
+
+
+def _warm_chart_worker():
+    """Runs once per chart worker: builds the figure templates and renders each chart
+    type once so fonts, colormaps and seaborn are loaded before the first request."""
+    warm = pd.DataFrame({
+        "district": ["a", "b"], "month": pd.to_datetime(["2024-01", "2024-02"]),
+        "target_efficiency": [0.5, 0.6], "predicted_efficiency": [0.4, 0.7],
+    })
+    for chart, data in _chart_tasks(warm, warm["predicted_efficiency"].to_numpy()):
+        fig = _figure(chart)
+        CHARTS[chart][2](fig.add_subplot(), "warm-up", data)
+        fig.canvas.draw()
+
+
+def chart_pool():
+    """The chart worker pool (created on first use), or None when CHART_POOL_WORKERS=0."""
+    global _chart_pool
+    if CHART_POOL_WORKERS <= 0:
+        return None
+    with _chart_pool_lock:
+        if _chart_pool is None:
+            _chart_pool = ProcessPoolExecutor(max_workers=CHART_POOL_WORKERS, initializer=_warm_chart_worker)
+            atexit.register(shutdown_chart_pool)
+    return _chart_pool
+
+
+def start_chart_pool():
+    """Create the chart pool and start (and warm) every worker now rather than on the first request."""
+    pool = chart_pool()
+    if pool is not None:
+        pids = {f.result() for f in [pool.submit(os.getpid) for _ in range(CHART_POOL_WORKERS)]}
+        print(f"✅ Chart pool ready with {len(pids)} warm worker(s).")
+
+
+def shutdown_chart_pool():
+    global _chart_pool
+    with _chart_pool_lock:
+        if _chart_pool is not None:
+            _chart_pool.shutdown(wait=False, cancel_futures=True)
+            _chart_pool = None
+
+
+def _prepare(dataset_name, df, preds):
+    """Put the chart payloads in the graph store. Returns (folder, tasks, keys)."""
+    tasks = _chart_tasks(df, preds)
+    folder, keys = graph_store.store_prediction(dataset_name, dict(tasks))
+    return folder, tasks, keys
+
+
+def _chart_list(folder, tasks):
+    """{"folder", "files", "charts": [{"chart", "file", "url"}], "data_url"} for the charts in `tasks`."""
+    charts = [{"chart": chart, "file": CHARTS[chart][0], "url": f"/graphs/{folder}/{CHARTS[chart][0]}"}
+              for chart, _ in tasks]
+    return {"folder": folder, "files": [c["file"] for c in charts], "charts": charts,
+            "data_url": f"/graphs/{folder}/data"}
+
+
+def _pending(tasks, keys):
+    """(chart, data, png path) for the charts the store hasn't rendered yet."""
+    jobs = [(chart, data, graph_store.object_path(keys[chart], "png")) for chart, data in tasks]
+    return [job for job in jobs if not os.path.exists(job[2])]
+
+
+def _graphs_info(folder, tasks, timings, started):
+    """_chart_list plus "timings": {chart: ms} (0 for charts already in the store) and "render_ms"."""
+    total_ms = (time.perf_counter() - started) * 1000
+    print(f"✅ Graphs ready in: {folder} ({total_ms:.0f} ms)")
+    return {
+        **_chart_list(folder, tasks),
+        "timings": {chart: round(timings.get(chart, 0.0), 1) for chart, _ in tasks},
+        "render_ms": round(total_ms, 1),
+    }
+
+
+def _render_inline(title, jobs):
+    return [render_chart(chart, title, data, path) for chart, data, path in jobs]
+
+
+def generate_graphs(dataset_name, df, preds):
+    """
+    Render every chart that applies to df/preds into the graph store now.
+    Returns {"folder", "files", "charts", "data_url", "timings": {chart: ms}, "render_ms"}.
+    """
+    started = time.perf_counter()
+    folder, tasks, keys = _prepare(dataset_name, df, preds)
+    jobs = _pending(tasks, keys)
+    pool = chart_pool()
+    if pool is None:
+        rendered = _render_inline(dataset_name, jobs)
+    else:
+        futures = [pool.submit(render_chart, chart, dataset_name, data, path) for chart, data, path in jobs]
+        rendered = [future.result() for future in futures]
+    return _graphs_info(folder, tasks, dict(zip((job[0] for job in jobs), rendered)), started)
+
+
+async def generate_graphs_async(dataset_name, df, preds):
+    """generate_graphs without blocking the event loop: charts render concurrently in the pool."""
+    started = time.perf_counter()
+    folder, tasks, keys = await asyncio.to_thread(_prepare, dataset_name, df, preds)
+    jobs = _pending(tasks, keys)
+    pool = chart_pool()
+    if pool is None:
+        rendered = await asyncio.to_thread(_render_inline, dataset_name, jobs)
+    else:
+        loop = asyncio.get_running_loop()
+        rendered = await asyncio.gather(*[
+            loop.run_in_executor(pool, render_chart, chart, dataset_name, data, path) for chart, data, path in jobs
+        ])
+    return _graphs_info(folder, tasks, dict(zip((job[0] for job in jobs), rendered)), started)
+
+
+# ---------------------- LAZY RENDERING ----------------------
+
+def prepare_graphs(dataset_name, df, preds):
+    """
+    Store the chart data for a prediction without rendering anything. Returns the
+    same folder/files/charts listing as generate_graphs; each PNG is drawn by
+    ensure_chart when it is first requested.
+    """
+    folder, tasks, _ = _prepare(dataset_name, df, preds)
+    return {**_chart_list(folder, tasks), "lazy": True}
+
+
+def publish_graphs(dataset_name, df, preds):
+    """What a prediction returns under "graphs": prepare_graphs, or generate_graphs with LAZY_GRAPHS=0."""
+    return (prepare_graphs if LAZY_GRAPHS else generate_graphs)(dataset_name, df, preds)
+
+
+async def publish_graphs_async(dataset_name, df, preds):
+    if LAZY_GRAPHS:
+        return await asyncio.to_thread(prepare_graphs, dataset_name, df, preds)
+    return await generate_graphs_async(dataset_name, df, preds)
+
+
+def render_stored_chart(chart, title, data_path, path):
+    """Render one chart from its stored payload. Returns the PNG path, or None once the payload is gone."""
+    try:
+        data = pd.read_pickle(data_path, compression=None)
+    except OSError:
+        return None
+    render_chart(chart, title, data, path)
+    return path
+
+
+async def _render_on_demand(chart, title, key):
+    args = (chart, title, graph_store.object_path(key, "pkl"), graph_store.object_path(key, "png"))
+    pool = chart_pool()
+    if pool is None:
+        return await asyncio.to_thread(render_stored_chart, *args)
+    return await asyncio.get_running_loop().run_in_executor(pool, render_stored_chart, *args)
+
+
+async def ensure_chart(folder, file_name):
+    """
+    Path of a chart's PNG, rendering it first if this is its first request.
+    None for unknown folders and charts, or when the chart's data has been evicted.
+    """
+    chart = _CHART_BY_FILE.get(file_name)
+    folder_dir = graph_store.folder_path(folder)
+    if chart is None or folder_dir is None:
+        return None
+    legacy = os.path.join(folder_dir, file_name)
+    if os.path.exists(legacy):
+        graph_store.touch_folder(folder)
+        return legacy
+    manifest = await asyncio.to_thread(graph_store.read_manifest, folder)
+    if manifest is None or chart not in manifest["charts"]:
+        return None
+    graph_store.touch_folder(folder)
+    key = manifest["charts"][chart]
+    path = graph_store.object_path(key, "png")
+    if os.path.exists(path):
+        return path
+    task = _rendering.get(path)
+    if task is None:
+        task = _rendering[path] = asyncio.ensure_future(_render_on_demand(chart, manifest["title"], key))
+        task.add_done_callback(lambda _: _rendering.pop(path, None))
+    # Shielded: one client disconnecting mustn't cancel a render others are waiting on.
+    return await asyncio.shield(task)
+
+
+def chart_etag(stat_result, variant: str = ""):
+    """
+    Quoted ETag for a rendered chart, derived from its mtime and size (as Starlette does).
+    `variant` tells apart responses built from the same file (e.g. chart data parameters).
+    """
+    base = f"{stat_result.st_mtime}-{stat_result.st_size}"
+    if variant:
+        base = f"{base}-{variant}"
+    return f'"{hashlib.md5(base.encode(), usedforsecurity=False).hexdigest()}"'